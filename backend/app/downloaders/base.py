@@ -5,6 +5,8 @@ from typing import Optional, Union
 
 from app.enmus.note_enums import DownloadQuality
 from app.models.notes_model import AudioDownloadResult
+from app.models.audio_model import AudioStreamSource, MediaProbe
+from app.models.transcriber_model import TranscriptResult
 from os import getenv
 QUALITY_MAP = {
     "fast": "32",
@@ -36,3 +38,31 @@ class Downloader(ABC):
     def download_video(self, video_url: str,
                        output_dir: Union[str, None] = None) -> str:
         pass
+
+    def probe(self, video_url: str) -> Optional[MediaProbe]:
+        '''
+        预检：只获取时长、体积、可用格式等元信息，不下载任何媒体数据
+
+        :param video_url: 资源链接
+        :return: MediaProbe，平台不支持预检时返回 None
+        '''
+        return None
+
+    def get_audio_stream(self, video_url: str) -> Optional[AudioStreamSource]:
+        '''
+        获取可边下边转写的音频直链，仅解析元信息，不下载任何数据
+
+        :param video_url: 资源链接
+        :return: AudioStreamSource，不支持流式的平台返回 None
+        '''
+        return None
+
+    def download_subtitles(self, video_url: str, output_dir: str = None) -> Optional[TranscriptResult]:
+        '''
+        获取平台自带的字幕（人工字幕 / 自动字幕），命中时可跳过语音识别
+
+        :param video_url: 资源链接
+        :param output_dir: 输出路径
+        :return: TranscriptResult，没有字幕或平台不支持时返回 None
+        '''
+        return None
@@ -1 +1,162 @@
-# def download():
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import yt_dlp
+from dotenv import load_dotenv
+
+from app.models.audio_model import MediaProbe
+from app.models.transcriber_model import TranscriptResult
+from app.utils.logger import get_logger
+from app.utils.subtitle_parser import SUPPORTED_SUBTITLE_EXTS, parse_subtitle
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 字幕语言优先级，ai-zh 为 B 站 AI 字幕
+SUBTITLE_LANGS = [
+    lang.strip() for lang in os.getenv("SUBTITLE_LANGS", "zh-Hans,zh-CN,zh,zh-Hant,ai-zh,en").split(",")
+    if lang.strip()
+]
+
+# 只解析不下载时使用的格式，与音频下载保持一致，保证直链与体积估算对应同一条音频流
+YTDLP_AUDIO_FORMAT = 'bestaudio[ext=m4a]/bestaudio/best'
+# 解析结果中的直链带签名，有效期有限，只做短时缓存
+INFO_CACHE_TTL = int(os.getenv("YTDLP_INFO_CACHE_TTL", "600"))
+
+_info_cache: Dict[str, Tuple[float, dict]] = {}
+_info_lock = threading.Lock()
+
+
+def extract_ytdlp_info(video_url: str) -> dict:
+    """
+    只解析元信息（download=False），并在短时间内复用结果。
+    预检、字幕、流式直链都基于同一份 info，避免对同一链接重复请求平台。
+
+    :param video_url: 视频链接
+    :return: yt-dlp 的 info 字典
+    """
+    now = time.monotonic()
+    with _info_lock:
+        cached = _info_cache.get(video_url)
+        if cached and now - cached[0] < INFO_CACHE_TTL:
+            return cached[1]
+
+    opts = {
+        'format': YTDLP_AUDIO_FORMAT,
+        'skip_download': True,
+        'noplaylist': True,
+        'quiet': True,
+    }
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+
+    with _info_lock:
+        # 顺带清理过期条目
+        for key in [k for k, (ts, _) in _info_cache.items() if now - ts >= INFO_CACHE_TTL]:
+            _info_cache.pop(key, None)
+        _info_cache[video_url] = (now, info)
+    return info
+
+
+def _pick_track(tracks: dict, langs: List[str], allow_any: bool) -> Optional[Tuple[str, dict]]:
+    """
+    按语言优先级与格式优先级挑选一条字幕轨
+    """
+    candidates = [lang for lang in langs if lang in tracks]
+    if allow_any:
+        # 弹幕不是字幕
+        candidates += [lang for lang in tracks if lang not in candidates and lang != "danmaku"]
+
+    for lang in candidates:
+        formats = {fmt.get("ext"): fmt for fmt in tracks.get(lang) or []}
+        for ext in SUPPORTED_SUBTITLE_EXTS:
+            if ext in formats:
+                return lang, formats[ext]
+    return None
+
+
+def probe_from_ytdlp_info(info: dict, platform: str) -> MediaProbe:
+    """
+    从 yt-dlp info 中提取预检所需的时长、体积与格式摘要
+
+    :param info: extract_ytdlp_info 返回的 info
+    :param platform: 平台标识
+    :return: MediaProbe
+    """
+    duration = float(info.get("duration") or 0)
+    filesize = info.get("filesize") or info.get("filesize_approx")
+    if not filesize and duration:
+        # 没有体积信息时按码率估算（tbr/abr 单位为 kbps）
+        bitrate = info.get("abr") or info.get("tbr")
+        if bitrate:
+            filesize = int(duration * bitrate * 1000 / 8)
+
+    formats = [
+        {
+            "format_id": f.get("format_id"),
+            "ext": f.get("ext"),
+            "acodec": f.get("acodec"),
+            "vcodec": f.get("vcodec"),
+            "tbr": f.get("tbr"),
+            "filesize": f.get("filesize") or f.get("filesize_approx"),
+        }
+        for f in info.get("formats") or []
+    ]
+
+    return MediaProbe(
+        platform=platform,
+        video_id=info.get("id"),
+        title=info.get("title"),
+        duration=duration,
+        filesize=int(filesize) if filesize else None,
+        formats=formats,
+    )
+
+
+def _untranslated(tracks: dict) -> dict:
+    """
+    去掉机器翻译的字幕格式（YouTube 翻译轨的地址带 tlang 参数）
+    """
+    return {
+        lang: [fmt for fmt in formats if "tlang=" not in (fmt.get("url") or "")]
+        for lang, formats in tracks.items()
+    }
+
+
+def fetch_ytdlp_subtitles(video_url: str) -> Optional[TranscriptResult]:
+    """
+    通过 yt-dlp 获取平台字幕（人工字幕优先，其次自动字幕），不下载音视频
+
+    :param video_url: 视频链接
+    :return: TranscriptResult，没有可用字幕时返回 None
+    """
+    info = extract_ytdlp_info(video_url)
+    video_lang = info.get("language")
+
+    # 人工字幕按 SUBTITLE_LANGS 优先，其余语言也可用；
+    # 自动字幕几乎覆盖所有语言的机器翻译，只接受视频原语言的识别结果（YouTube 为 -orig 轨）
+    picked = _pick_track(info.get("subtitles") or {}, SUBTITLE_LANGS + ([video_lang] if video_lang else []),
+                         allow_any=True)
+    if not picked and video_lang:
+        picked = _pick_track(_untranslated(info.get("automatic_captions") or {}),
+                             [f"{video_lang}-orig", video_lang], allow_any=False)
+    if not picked:
+        logger.info(f"未找到可用字幕：{video_url}")
+        return None
+
+    lang, track = picked
+    ext = track.get("ext")
+    if track.get("data"):
+        content = track["data"]
+    else:
+        with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+            content = ydl.urlopen(track["url"]).read().decode("utf-8", errors="ignore")
+
+    # zh-Hans / ai-zh / en-orig 等统一归一为 zh、en
+    language = lang.removeprefix("ai-").split("-")[0]
+    result = parse_subtitle(content, ext, language=language)
+    if result:
+        logger.info(f"使用平台字幕：lang={lang}, ext={ext}, 共 {len(result.segments)} 条")
+    return result
@@ -5,22 +5,25 @@ import re
 from typing import Union, Optional
 from urllib.parse import quote, urlencode
 
-import httpx
-import requests
 from pydantic import BaseModel
 
 from app.downloaders.base import Downloader
-from app.downloaders.douyin_helper.abogus import ABogus
+from app.downloaders.douyin_helper.abogus_fast import FastABogus
+from app.downloaders.douyin_helper.token_manager import DouyinTokenManager
 from app.enmus.note_enums import DownloadQuality
 from app.models.audio_model import AudioDownloadResult
 from app.services.cookie_manager import CookieConfigManager
+from app.utils.async_runner import run_sync
+from app.utils.http_client import get_async_client, stream_to_file
+from app.utils.logger import get_logger
 from app.utils.path_helper import get_data_dir
+from app.utils.url_resolver import resolve_short_url
 from dotenv import load_dotenv
 
 load_dotenv()
+logger = get_logger(__name__)
 DOUYIN_DOMAIN = "https://www.douyin.com"
 
-cfm=CookieConfigManager()
 def get_timestamp(unit: str = "milli"):
     """
     根据给定的单位获取当前时间 (Get the current time based on the given unit)
@@ -72,6 +75,14 @@ class DouyinConfig:
     }
 
 
+# 所有 DouyinDownloader 实例共享的 msToken / ttwid 缓存
+token_manager = DouyinTokenManager(
+    ms_token_config=DouyinConfig.MS_TOKEN,
+    ttwid_config=DouyinConfig.TTWID,
+    user_agent=DouyinConfig.HEADERS["User-Agent"],
+)
+
+
 class BaseRequestModel(BaseModel):
     device_platform: str = "webapp"
     aid: str = "6383"
@@ -113,27 +124,29 @@ class DouyinDownloader(Downloader):
     def __init__(self, cookie=None):
         super().__init__()
         self.headers_config = DouyinConfig.HEADERS.copy()
-        self.headers_config["Cookie"] = cfm.get('douyin')
-        print(self.headers_config)
+        self.headers_config["Cookie"] = CookieConfigManager().get('douyin')
         self.proxies_config = DouyinConfig.PROXIES.copy()
         self.ttwid_config = DouyinConfig.TTWID.copy()
         self.ms_token_config = DouyinConfig.MS_TOKEN.copy()
 
+    def _request_headers(self) -> dict:
+        # 未配置 Cookie 时为 None，httpx 不接受 None 值的请求头
+        return {k: v for k, v in self.headers_config.items() if v}
+
     @staticmethod
     def find_url(string: str) -> list:
         url = re.findall('http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', string)
         return url
 
     def extract_video_id(self, url: str) -> str:
+        return run_sync(self.aextract_video_id(url))
+
+    async def aextract_video_id(self, url: str) -> str:
         video_url = self.find_url(url)
 
         if len(video_url):
             video_url = video_url[0]
-            try:
-                response = requests.head(video_url, allow_redirects=True)
-                url = response.url
-            except Exception as e:
-                return ""
+            url = await resolve_short_url(video_url)
         patterns = [
             r'video/(\d+)',
             r'aweme_id=(\d+)',
@@ -144,68 +157,54 @@ class DouyinDownloader(Downloader):
                 return match.group(1)
         return ""
 
-    def gen_real_msToken(self) -> str:
-        try:
-            payload = json.dumps(
-                {
-                    "magic": self.ms_token_config["magic"],
-                    "version": self.ms_token_config["version"],
-                    "dataType": self.ms_token_config["dataType"],
-                    "strData": self.ms_token_config["strData"],
-                    "tspFromClient": get_timestamp(),
-                }
-            )
-            headers = {
-                "User-Agent": self.headers_config["User-Agent"],
-                "Content-Type": "application/json",
-            }
-            transport = httpx.HTTPTransport(retries=5)
-            with httpx.Client(transport=transport) as client:
-                try:
-                    response = client.post(
-                        self.ms_token_config["url"], content=payload, headers=headers
-                    )
-                    response.raise_for_status()
-
-                    msToken = str(httpx.Cookies(response.cookies).get("msToken"))
-                    if len(msToken) not in [120, 128]:
-                        raise ValueError("响应内容：{0}， Douyin msToken API 的响应内容不符合要求。".format(msToken))
+    async def agen_real_msToken(self) -> str:
+        return await token_manager.get_ms_token()
 
-                    return msToken
-                except Exception as e:
-                    raise ValueError("Douyin msToken API 请求失败：{0}".format(e))
-        except Exception as e:
-            raise ValueError("Douyin msToken API{0}".format(e))
+    def gen_real_msToken(self) -> str:
+        return run_sync(self.agen_real_msToken())
 
-    def fetch_video_info(self, video_url: str) -> json:
+    async def afetch_video_info(self, video_url: str) -> json:
         try:
 
-            aweme_id = self.extract_video_id(video_url)
-            kwargs = self.headers_config
-            print("@kwargs:", kwargs)
+            aweme_id = await self.aextract_video_id(video_url)
+            kwargs = self._request_headers()
+            cookie = kwargs.get("Cookie") or ""
+            guest_ttwid = False
+            if "ttwid=" not in cookie:
+                # 未配置登录 Cookie 时补上游客 ttwid；获取失败不影响详情请求，不带 ttwid 继续
+                try:
+                    ttwid = await token_manager.get_ttwid()
+                    kwargs["Cookie"] = f"{cookie}; ttwid={ttwid}" if cookie else f"ttwid={ttwid}"
+                    guest_ttwid = True
+                except Exception as e:
+                    logger.warning(f"获取游客 ttwid 失败，不带 ttwid 继续请求：{e}")
             base_params = BaseRequestModel().model_dump()
-            base_params["msToken"] = self.gen_real_msToken()
+            base_params["msToken"] = await self.agen_real_msToken()
 
             base_params["aweme_id"] = aweme_id
-            bogus = ABogus()
+            # ua_code 与请求头的 User-Agent 绑定，按 UA 缓存，不会每次重算
+            bogus = FastABogus(user_agent=kwargs.get("User-Agent"))
             ab_value = bogus.get_value(base_params)
             a_bogus = quote(ab_value, safe='')
-            print("@a_bogus:", a_bogus)
-            print(base_params)
             query_str = urlencode(base_params)
             full_url = f"{DOUYIN_DOMAIN}/aweme/v1/web/aweme/detail/?{query_str}&a_bogus={a_bogus}"
 
             print("Request URL:", full_url)
 
-
-            response = requests.get(full_url, headers=kwargs)
-
-            print("Response JSON:", response.content)
+            response = await get_async_client().get(full_url, headers=kwargs)
+            response.raise_for_status()
+            if not response.content:
+                # 空响应通常是令牌失效，丢弃缓存让下次重新获取
+                token_manager.invalidate("msToken")
+                if guest_ttwid:
+                    token_manager.invalidate("ttwid")
             return response.json()
         except Exception as e:
             print("请求失败:", e)
             raise ValueError("请求失败:", e)
-        # print(kwargs)
+
+    def fetch_video_info(self, video_url: str) -> json:
+        return run_sync(self.afetch_video_info(video_url))
 
     def download(
             self,
@@ -214,51 +213,57 @@ class DouyinDownloader(Downloader):
             quality: DownloadQuality = "fast",
             need_video: Optional[bool] = False
     ) -> AudioDownloadResult:
-        try:
-            print(
-                f"正在下载视频: {video_url}，保存路径: {output_dir}，质量: {quality}"
-            )
-            if output_dir is None:
-                output_dir = get_data_dir()
-            if not output_dir:
-                output_dir = self.cache_data
-            os.makedirs(output_dir, exist_ok=True)
+        return run_sync(self.adownload(video_url, output_dir, quality, need_video))
 
-            output_path = os.path.join(output_dir, "%(id)s.%(ext)s")
-
-            video_data = self.fetch_video_info(video_url)
-            output_path = output_path % {
-                "id": video_data['aweme_detail']['aweme_id'],
-                "ext": "mp3",
-            }
-            url = video_data['aweme_detail']['music']['play_url']['uri']
-            # 下载音频
-            audio_data = requests.get(url)
-            with open(output_path, 'wb') as f:
-                f.write(audio_data.content)
-            print(url)
-            tags = []
-            for tag in video_data['aweme_detail']['video_tag']:
-                if tag['tag_name']:
-                    tags.append(tag['tag_name'])
-
-            return AudioDownloadResult(
-                file_path=output_path,
-                title=video_data['aweme_detail']['item_title'],
-                duration=video_data['aweme_detail']['video']['duration'],
-                cover_url=video_data['aweme_detail']['video']['cover_original_scale']['url_list'][0] if
-                video_data['aweme_detail']['video']['cover'] else video_data['video']['big_thumbs']['img_url'],
-                platform="douyin",
-                video_id=video_data['aweme_detail']['aweme_id'],
-                raw_info={
-                    'tags': video_data['aweme_detail']['caption'] + ''.join(tags),
-                },
-                video_path=None  # ❗音频下载不包含视频路径
-            )
-        except Exception as e:
-            raise e
+    async def adownload(
+            self,
+            video_url: str,
+            output_dir: Union[str, None] = None,
+            quality: DownloadQuality = "fast",
+            need_video: Optional[bool] = False
+    ) -> AudioDownloadResult:
+        print(
+            f"正在下载视频: {video_url}，保存路径: {output_dir}，质量: {quality}"
+        )
+        if output_dir is None:
+            output_dir = get_data_dir()
+        if not output_dir:
+            output_dir = self.cache_data
+        os.makedirs(output_dir, exist_ok=True)
+
+        output_path = os.path.join(output_dir, "%(id)s.%(ext)s")
+
+        video_data = await self.afetch_video_info(video_url)
+        output_path = output_path % {
+            "id": video_data['aweme_detail']['aweme_id'],
+            "ext": "mp3",
+        }
+        url = video_data['aweme_detail']['music']['play_url']['uri']
+        # 下载音频：分块写盘，内存占用与文件大小无关
+        await stream_to_file(url, output_path)
+        tags = []
+        for tag in video_data['aweme_detail']['video_tag']:
+            if tag['tag_name']:
+                tags.append(tag['tag_name'])
+
+        return AudioDownloadResult(
+            file_path=output_path,
+            title=video_data['aweme_detail']['item_title'],
+            duration=video_data['aweme_detail']['video']['duration'],
+            cover_url=video_data['aweme_detail']['video']['cover_original_scale']['url_list'][0] if
+            video_data['aweme_detail']['video']['cover'] else video_data['video']['big_thumbs']['img_url'],
+            platform="douyin",
+            video_id=video_data['aweme_detail']['aweme_id'],
+            raw_info={
+                'tags': video_data['aweme_detail']['caption'] + ''.join(tags),
+            },
+            video_path=None  # ❗音频下载不包含视频路径
+        )
 
     def download_video(self, video_url: str, output_dir: Union[str, None] = None) -> str:
+        return run_sync(self.adownload_video(video_url, output_dir))
+
+    async def adownload_video(self, video_url: str, output_dir: Union[str, None] = None) -> str:
 
         try:
 
@@ -268,7 +273,7 @@ class DouyinDownloader(Downloader):
                 output_dir = self.cache_data
             os.makedirs(output_dir, exist_ok=True)
 
-            video_id = self.extract_video_id(video_url)
+            video_id = await self.aextract_video_id(video_url)
             video_path = os.path.join(output_dir, f"{video_id}.mp4")
             if os.path.exists(video_path):
                 return video_path
@@ -276,17 +281,14 @@ class DouyinDownloader(Downloader):
 
             output_path = os.path.join(output_dir, "%(id)s.%(ext)s")
 
-            video_data = self.fetch_video_info(video_url)
+            video_data = await self.afetch_video_info(video_url)
             output_path = output_path % {
                 "id": video_data['aweme_detail']['aweme_id'],
                 "ext": "mp4",
             }
 
             url=video_data['aweme_detail']['video']['download_addr']['url_list'][0]
-            _data = requests.get(url,allow_redirects=True,headers=self.headers_config)
-
-            with open(output_path, 'wb') as f:
-                f.write(_data.content)
+            await stream_to_file(url, output_path, headers=self._request_headers())
 
             return output_path
         except Exception as e:
@@ -294,7 +296,6 @@ class DouyinDownloader(Downloader):
             raise ValueError("请求失败:", e)
 
 
-
 if __name__ == '__main__':
     dy = DouyinDownloader(
         cookie='')
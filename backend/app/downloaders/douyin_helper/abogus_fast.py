@@ -0,0 +1,252 @@
+"""
+Optimized signing engine for the Douyin `a_bogus` parameter.
+
+`FastABogus` produces exactly the same output as `ABogus` (see abogus.py) but:
+1. Uses a table-driven pure-Python SM3 working on bytes/ints instead of gmssl's
+   list-of-ints + hex-string round trips.
+2. Caches everything that does not depend on the request: the double SM3 of
+   the HTTP method, the per-User-Agent `ua_code` and the RC4 key schedules.
+3. Works on char-code lists end to end (RC4 + custom base64) instead of
+   building and re-parsing intermediate strings with chr()/ord().
+
+Run `python -m app.downloaders.douyin_helper.abogus_fast` from the backend
+directory for a parity check and micro-benchmark against `ABogus`.
+"""
+
+import struct
+from random import random
+from time import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+from app.downloaders.douyin_helper.abogus import ABogus
+
+__all__ = ["FastABogus", "sm3_digest"]
+
+_MASK = 0xFFFFFFFF
+_IV = (
+    0x7380166F, 0x4914B2B9, 0x172442D7, 0xDA8A0600,
+    0xA96F30BC, 0x163138AA, 0xE38DEE4D, 0xB0FB0E4E,
+)
+
+
+def _rotl(x: int, n: int) -> int:
+    n %= 32
+    return ((x << n) & _MASK) | (x >> (32 - n))
+
+
+# T_j <<< j，预先计算好 64 轮常量
+_T_ROT = tuple(_rotl(0x79CC4519, j) for j in range(16)) + tuple(_rotl(0x7A879D8A, j) for j in range(16, 64))
+
+
+def _compress(v: Tuple[int, ...], block: bytes) -> Tuple[int, ...]:
+    w = list(struct.unpack(">16I", block))
+    append = w.append
+    for j in range(16, 68):
+        x = w[j - 16] ^ w[j - 9] ^ (((w[j - 3] << 15) & _MASK) | (w[j - 3] >> 17))
+        x = x ^ (((x << 15) & _MASK) | (x >> 17)) ^ (((x << 23) & _MASK) | (x >> 9))
+        append(x ^ (((w[j - 13] << 7) & _MASK) | (w[j - 13] >> 25)) ^ w[j - 6])
+
+    a, b, c, d, e, f, g, h = v
+    t_rot = _T_ROT
+    for j in range(64):
+        a12 = ((a << 12) & _MASK) | (a >> 20)
+        ss1 = (a12 + e + t_rot[j]) & _MASK
+        ss1 = ((ss1 << 7) & _MASK) | (ss1 >> 25)
+        ss2 = ss1 ^ a12
+        if j < 16:
+            ff = a ^ b ^ c
+            gg = e ^ f ^ g
+        else:
+            ff = (a & b) | (a & c) | (b & c)
+            gg = (e & f) | (~e & g)
+        tt1 = (ff + d + ss2 + (w[j] ^ w[j + 4])) & _MASK
+        tt2 = (gg + h + ss1 + w[j]) & _MASK
+        d = c
+        c = ((b << 9) & _MASK) | (b >> 23)
+        b = a
+        a = tt1
+        h = g
+        g = ((f << 19) & _MASK) | (f >> 13)
+        f = e
+        e = tt2 ^ (((tt2 << 9) & _MASK) | (tt2 >> 23)) ^ (((tt2 << 17) & _MASK) | (tt2 >> 15))
+
+    return (
+        v[0] ^ a, v[1] ^ b, v[2] ^ c, v[3] ^ d,
+        v[4] ^ e, v[5] ^ f, v[6] ^ g, v[7] ^ h,
+    )
+
+
+def sm3_digest(data: bytes) -> bytes:
+    """
+    SM3 哈希（GB/T 32905-2016），返回 32 字节摘要
+    """
+    length = len(data)
+    padded = data + b"\x80" + b"\x00" * ((55 - length) % 64) + struct.pack(">Q", length * 8)
+    v = _IV
+    for i in range(0, len(padded), 64):
+        v = _compress(v, padded[i:i + 64])
+    return struct.pack(">8I", *v)
+
+
+def _rc4_schedule(key: bytes) -> List[int]:
+    s = list(range(256))
+    j = 0
+    key_len = len(key)
+    for i in range(256):
+        j = (j + s[i] + key[i % key_len]) & 255
+        s[i], s[j] = s[j], s[i]
+    return s
+
+
+def _rc4_apply(schedule: List[int], data: Sequence[int]) -> List[int]:
+    # 注意：ABogus 中部分待加密的值会超过 255（如 end_time / 2^32），这里按整数处理以保持一致
+    s = schedule[:]
+    i = j = 0
+    out = []
+    append = out.append
+    for value in data:
+        i = (i + 1) & 255
+        j = (j + s[i]) & 255
+        s[i], s[j] = s[j], s[i]
+        append(s[(s[i] + s[j]) & 255] ^ value)
+    return out
+
+
+def _encode(values: Sequence[int], alphabet: str) -> str:
+    """
+    ABogus.generate_result 的等价实现，输入为字符编码列表而不是字符串
+    """
+    r = []
+    append = r.append
+    length = len(values)
+    full = length - length % 3
+    for i in range(0, full, 3):
+        n = (values[i] << 16) | (values[i + 1] << 8) | values[i + 2]
+        append(alphabet[(n & 0xFC0000) >> 18])
+        append(alphabet[(n & 0x03F000) >> 12])
+        append(alphabet[(n & 0x0FC0) >> 6])
+        append(alphabet[n & 0x3F])
+    rest = length - full
+    if rest:
+        n = values[full] << 16
+        if rest == 2:
+            n |= values[full + 1] << 8
+        append(alphabet[(n & 0xFC0000) >> 18])
+        append(alphabet[(n & 0x03F000) >> 12])
+        if rest == 2:
+            append(alphabet[(n & 0x0FC0) >> 6])
+        append("=" * (3 - rest))
+    return "".join(r)
+
+
+class FastABogus(ABogus):
+    """
+    与 ABogus 输出完全一致的加速实现。与请求无关的中间结果在类级别缓存，
+    多个实例（每个请求一个）共享。
+    """
+
+    _ALPHABETS: Dict[str, str] = ABogus._ABogus__str
+    _END_STRING: str = ABogus._ABogus__end_string
+    _UA_KEY: str = ABogus._ABogus__ua_key
+
+    _rc4_schedules: Dict[bytes, List[int]] = {}
+    _method_codes: Dict[str, List[int]] = {}
+    _ua_codes: Dict[str, List[int]] = {}
+
+    def __init__(self, platform: str = None, user_agent: Optional[str] = None):
+        super().__init__(platform)
+        if user_agent:
+            self.ua_code = self.get_ua_code(user_agent)
+
+    # ---------------- 缓存的中间结果 ----------------
+
+    @classmethod
+    def _get_rc4_schedule(cls, key: bytes) -> List[int]:
+        schedule = cls._rc4_schedules.get(key)
+        if schedule is None:
+            schedule = cls._rc4_schedules[key] = _rc4_schedule(key)
+        return schedule
+
+    @classmethod
+    def get_ua_code(cls, user_agent: str) -> List[int]:
+        """
+        按 User-Agent 计算并缓存 ua_code（与上游 generate_ua_code 算法一致）
+        """
+        code = cls._ua_codes.get(user_agent)
+        if code is None:
+            key = cls._UA_KEY.encode("latin-1")
+            encrypted = _rc4_apply(cls._get_rc4_schedule(key), [ord(c) for c in user_agent])
+            encoded = _encode(encrypted, cls._ALPHABETS["s3"])
+            code = cls._ua_codes[user_agent] = list(sm3_digest(encoded.encode("utf-8")))
+        return code
+
+    # ---------------- 覆盖 ABogus 的热点方法 ----------------
+
+    @classmethod
+    def sm3_to_array(cls, data) -> list:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return list(sm3_digest(bytes(data)))
+
+    def generate_method_code(self, method: str = "GET") -> list:
+        code = self._method_codes.get(method)
+        if code is None:
+            code = self._method_codes[method] = list(
+                sm3_digest(sm3_digest((method + self._END_STRING).encode("utf-8"))))
+        return code
+
+    def generate_params_code(self, params: str) -> list:
+        return list(sm3_digest(sm3_digest((params + self._END_STRING).encode("utf-8"))))
+
+    def get_value(self,
+                  url_params: dict | str,
+                  method="GET",
+                  start_time=0,
+                  end_time=0,
+                  random_num_1=None,
+                  random_num_2=None,
+                  random_num_3=None,
+                  ) -> str:
+        head = self.list_1(random_num_1) + self.list_2(random_num_2) + self.list_3(random_num_3)
+        params = urlencode(url_params) if isinstance(url_params, dict) else url_params
+        a = self.generate_string_2_list(params, method, start_time, end_time)
+        checksum = self.end_check_num(a)
+        a.extend(self.browser_code)
+        a.append(checksum)
+        body = _rc4_apply(self._get_rc4_schedule(b"y"), a)
+        return _encode(head + body, self._ALPHABETS["s4"])
+
+
+def _benchmark(iterations: int = 200) -> None:
+    import timeit
+
+    params = {
+        "device_platform": "webapp", "aid": "6383", "channel": "channel_pc_web",
+        "aweme_id": "7345492945006595379", "msToken": "x" * 128,
+    }
+    fixed = dict(start_time=int(time() * 1000), end_time=int(time() * 1000) + 5,
+                 random_num_1=random() * 10000, random_num_2=random() * 10000, random_num_3=random() * 10000)
+
+    reference_signer, fast_signer = ABogus(), FastABogus()
+    # 浏览器指纹每个实例随机生成，对比前统一
+    fast_signer.browser, fast_signer.browser_len, fast_signer.browser_code = (
+        reference_signer.browser, reference_signer.browser_len, reference_signer.browser_code)
+    reference = reference_signer.get_value(params, **fixed)
+    optimized = fast_signer.get_value(params, **fixed)
+    assert reference == optimized, f"输出不一致:\n{reference}\n{optimized}"
+
+    default_ua = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+    assert FastABogus.get_ua_code(default_ua) == ABogus().ua_code, "ua_code 与内置值不一致"
+    assert sm3_digest(b"abc").hex() == "66c7f0f462eeedd9d1f2d46bdc10e4e24167c4875cf2f7a2297da02b8f4ba8e0"
+    print("parity: OK")
+
+    slow = timeit.timeit(lambda: ABogus().get_value(params), number=iterations)
+    fast = timeit.timeit(lambda: FastABogus().get_value(params), number=iterations)
+    print(f"ABogus:     {slow / iterations * 1000:.3f} ms/op")
+    print(f"FastABogus: {fast / iterations * 1000:.3f} ms/op")
+    print(f"speedup:    {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    _benchmark()
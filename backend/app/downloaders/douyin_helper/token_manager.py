@@ -0,0 +1,142 @@
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from app.utils.http_client import get_async_client
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 令牌有效期（秒），超过 REFRESH_RATIO 比例后在后台提前刷新
+MS_TOKEN_TTL = int(os.getenv("DOUYIN_MSTOKEN_TTL", "1800"))
+TTWID_TTL = int(os.getenv("DOUYIN_TTWID_TTL", "86400"))
+REFRESH_RATIO = 0.8
+
+
+@dataclass
+class _CachedToken:
+    value: str
+    fetched_at: float
+    ttl: int
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    @property
+    def expired(self) -> bool:
+        return self.age >= self.ttl
+
+    @property
+    def stale(self) -> bool:
+        return self.age >= self.ttl * REFRESH_RATIO
+
+
+class DouyinTokenManager:
+    """
+    msToken / ttwid 缓存。
+
+    所有 DouyinDownloader 实例共享同一份令牌：未过期直接复用，接近过期时返回旧值并在后台刷新，
+    只有首次或彻底过期时才会在请求路径上等待一次网络往返。
+    需在后台事件循环（app.utils.async_runner）中使用。
+    """
+
+    def __init__(self, ms_token_config: dict, ttwid_config: dict, user_agent: str):
+        self.ms_token_config = ms_token_config
+        self.ttwid_config = ttwid_config
+        self.user_agent = user_agent
+        self._tokens: Dict[str, _CachedToken] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    async def get_ms_token(self) -> str:
+        return await self._get("msToken", MS_TOKEN_TTL, self._fetch_ms_token)
+
+    async def get_ttwid(self) -> str:
+        return await self._get("ttwid", TTWID_TTL, self._fetch_ttwid)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """
+        令牌被接口拒绝时调用，下次获取会重新请求
+        """
+        if name:
+            self._tokens.pop(name, None)
+        else:
+            self._tokens.clear()
+
+    async def _get(self, name: str, ttl: int, fetcher: Callable[[], Awaitable[str]]) -> str:
+        cached = self._tokens.get(name)
+        if cached and not cached.expired:
+            if cached.stale and name not in self._refreshing:
+                self._refreshing[name] = asyncio.create_task(self._refresh(name, ttl, fetcher))
+            return cached.value
+
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            # 并发请求只需一个真正去拉取
+            cached = self._tokens.get(name)
+            if cached and not cached.expired:
+                return cached.value
+            value = await fetcher()
+            self._tokens[name] = _CachedToken(value=value, fetched_at=time.monotonic(), ttl=ttl)
+            logger.info(f"已获取 Douyin {name}")
+            return value
+
+    async def _refresh(self, name: str, ttl: int, fetcher: Callable[[], Awaitable[str]]) -> None:
+        try:
+            value = await fetcher()
+            self._tokens[name] = _CachedToken(value=value, fetched_at=time.monotonic(), ttl=ttl)
+            logger.info(f"后台刷新 Douyin {name} 成功")
+        except Exception as e:
+            logger.warning(f"后台刷新 Douyin {name} 失败，继续使用旧值：{e}")
+        finally:
+            self._refreshing.pop(name, None)
+
+    async def _fetch_ms_token(self) -> str:
+        payload = json.dumps(
+            {
+                "magic": self.ms_token_config["magic"],
+                "version": self.ms_token_config["version"],
+                "dataType": self.ms_token_config["dataType"],
+                "strData": self.ms_token_config["strData"],
+                "tspFromClient": int(time.time() * 1000),
+            }
+        )
+        headers = {
+            "User-Agent": self.user_agent,
+            "Content-Type": "application/json",
+        }
+        try:
+            response = await get_async_client().post(self.ms_token_config["url"], content=payload, headers=headers)
+            response.raise_for_status()
+        except Exception as e:
+            raise ValueError("Douyin msToken API 请求失败：{0}".format(e))
+
+        ms_token = str(response.cookies.get("msToken"))
+        if len(ms_token) not in [120, 128]:
+            raise ValueError("响应内容：{0}， Douyin msToken API 的响应内容不符合要求。".format(ms_token))
+        return ms_token
+
+    async def _fetch_ttwid(self) -> str:
+        headers = {
+            "User-Agent": self.user_agent,
+            "Content-Type": "application/json",
+        }
+        try:
+            response = await get_async_client().post(
+                self.ttwid_config["url"], content=self.ttwid_config["data"], headers=headers
+            )
+            response.raise_for_status()
+        except Exception as e:
+            raise ValueError("Douyin ttwid API 请求失败：{0}".format(e))
+
+        ttwid = response.cookies.get("ttwid")
+        if not ttwid:
+            raise ValueError("Douyin ttwid API 未返回 ttwid")
+        return ttwid
@@ -0,0 +1,116 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 各平台默认值，可通过环境变量覆盖：
+#   全局：DOWNLOAD_CONCURRENT_FRAGMENTS / DOWNLOAD_RETRIES / DOWNLOAD_RATE_LIMIT ...
+#   平台：BILIBILI_DOWNLOAD_CONCURRENT_FRAGMENTS / YOUTUBE_DOWNLOAD_RATE_LIMIT ...
+PLATFORM_DEFAULTS = {
+    "bilibili": {"concurrent_fragments": 4},
+    "youtube": {"concurrent_fragments": 4},
+}
+
+
+@dataclass
+class DownloadConfig:
+    concurrent_fragments: int = 4        # DASH/HLS 分片并发数
+    retries: int = 10                    # 整体请求重试次数
+    fragment_retries: int = 10           # 单个分片重试次数
+    rate_limit: Optional[int] = None     # 限速（字节/秒），None 为不限速
+    resume: bool = True                  # 断点续传（保留并复用 .part 文件）
+    socket_timeout: int = 30             # 连接超时（秒）
+
+
+def _env(platform: str, key: str) -> Optional[str]:
+    return os.getenv(f"{platform.upper()}_DOWNLOAD_{key}") or os.getenv(f"DOWNLOAD_{key}")
+
+
+def get_download_config(platform: str) -> DownloadConfig:
+    """
+    读取平台下载配置：平台环境变量 > 全局环境变量 > 平台默认值 > 全局默认值
+    """
+    config = DownloadConfig(**PLATFORM_DEFAULTS.get(platform, {}))
+
+    for field_name, key, cast in [
+        ("concurrent_fragments", "CONCURRENT_FRAGMENTS", int),
+        ("retries", "RETRIES", int),
+        ("fragment_retries", "FRAGMENT_RETRIES", int),
+        ("rate_limit", "RATE_LIMIT", int),
+        ("socket_timeout", "SOCKET_TIMEOUT", int),
+    ]:
+        value = _env(platform, key)
+        if value:
+            setattr(config, field_name, cast(value))
+
+    resume = _env(platform, "RESUME")
+    if resume:
+        config.resume = resume.lower() == "true"
+    return config
+
+
+class DownloadMetrics:
+    """
+    单次下载的吞吐统计，作为 yt-dlp progress_hook 使用
+    """
+
+    def __init__(self, platform: str):
+        self.platform = platform
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.downloaded_bytes = 0
+        self.files = 0
+
+    def hook(self, d: dict) -> None:
+        if d.get("status") != "finished":
+            return
+        self.files += 1
+        self.downloaded_bytes += d.get("downloaded_bytes") or d.get("total_bytes") or 0
+        self.finished_at = time.monotonic()
+
+    def summary(self) -> dict:
+        elapsed = (self.finished_at or time.monotonic()) - self.started_at
+        return {
+            "platform": self.platform,
+            "files": self.files,
+            "bytes": self.downloaded_bytes,
+            "seconds": round(elapsed, 2),
+            "mbps": round(self.downloaded_bytes / 1024 / 1024 / elapsed, 2) if elapsed > 0 else 0,
+        }
+
+    def log(self) -> None:
+        s = self.summary()
+        logger.info(f"[{s['platform']}] 下载完成：{s['bytes'] // 1024}KB，用时 {s['seconds']}s，{s['mbps']}MB/s")
+
+
+def build_ydl_opts(platform: str, base_opts: dict) -> Tuple[dict, DownloadMetrics]:
+    """
+    在下载器自身的 yt-dlp 参数上叠加统一的并发分片、断点续传、限速、重试配置
+
+    :param platform: 平台标识
+    :param base_opts: 下载器自身的参数（format / outtmpl / postprocessors 等）
+    :return: (合并后的 ydl_opts, 本次下载的 DownloadMetrics)
+    """
+    config = get_download_config(platform)
+    metrics = DownloadMetrics(platform)
+
+    opts = {
+        'concurrent_fragment_downloads': config.concurrent_fragments,
+        'retries': config.retries,
+        'fragment_retries': config.fragment_retries,
+        'socket_timeout': config.socket_timeout,
+        'continuedl': config.resume,
+        'nopart': not config.resume,
+    }
+    if config.rate_limit:
+        opts['ratelimit'] = config.rate_limit
+    opts.update(base_opts)
+    opts['progress_hooks'] = list(base_opts.get('progress_hooks', [])) + [metrics.hook]
+    return opts, metrics
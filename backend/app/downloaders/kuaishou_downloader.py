@@ -1,14 +1,16 @@
+import asyncio
 import os
-import subprocess
 from abc import ABC
 from typing import Union, Optional
 
-import requests
+import httpx
 
 from app.downloaders.base import Downloader
 from app.downloaders.kuaishou_helper.kuaishou import KuaiShou
 from app.enmus.note_enums import DownloadQuality
 from app.models.audio_model import AudioDownloadResult
+from app.utils.async_runner import run_sync
+from app.utils.http_client import stream_to_file
 from app.utils.path_helper import get_data_dir
 
 
@@ -22,6 +24,15 @@ class KuaiShouDownloader(Downloader, ABC):
             output_dir: Union[str, None] = None,
             quality: str = "fast",
             need_video: Optional[bool] = False
+    ) -> AudioDownloadResult:
+        return run_sync(self.adownload(video_url, output_dir, quality, need_video))
+
+    async def adownload(
+            self,
+            video_url: str,
+            output_dir: Union[str, None] = None,
+            quality: str = "fast",
+            need_video: Optional[bool] = False
     ) -> AudioDownloadResult:
         if output_dir is None:
             output_dir = get_data_dir()
@@ -30,8 +41,7 @@ class KuaiShouDownloader(Downloader, ABC):
         os.makedirs(output_dir, exist_ok=True)
 
         ks = KuaiShou()
-        video_raw_info = ks.run(video_url)
-        print(video_raw_info)
+        video_raw_info = await ks.arun(video_url)
         photo_info = video_raw_info['visionVideoDetail']['photo']
         video_id = photo_info['id']
         title = photo_info['caption'].strip().replace('\n', '').replace(' ', '_')[:50]
@@ -53,21 +63,18 @@ class KuaiShouDownloader(Downloader, ABC):
                 video_path=mp4_path
             )
 
-        # 下载 mp4 视频
-        resp = requests.get(photo_info['photoUrl'], stream=True)
-        if resp.status_code == 200:
-            with open(mp4_path, "wb") as f:
-                for chunk in resp.iter_content(1024 * 1024):
-                    f.write(chunk)
-        else:
-            raise Exception(f"视频下载失败: {resp.status_code}")
-
-        # 使用 ffmpeg 转换为 mp3
+        # 下载 mp4 视频：分块写盘
         try:
-            subprocess.run([
-                "ffmpeg", "-y", "-i", mp4_path, "-vn", "-acodec", "libmp3lame", mp3_path
-            ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except subprocess.CalledProcessError:
+            await stream_to_file(photo_info['photoUrl'], mp4_path)
+        except httpx.HTTPStatusError as e:
+            raise Exception(f"视频下载失败: {e.response.status_code}")
+
+        # 使用 ffmpeg 转换为 mp3（异步子进程，不阻塞事件循环）
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-y", "-i", mp4_path, "-vn", "-acodec", "libmp3lame", mp3_path,
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+        )
+        if await process.wait() != 0:
             raise Exception("ffmpeg 转换 MP3 失败")
 
         return AudioDownloadResult(
@@ -88,7 +95,6 @@ class KuaiShouDownloader(Downloader, ABC):
             video_url: str,
             output_dir: Union[str, None] = None,
     ) -> str:
-        print('self.download(video_url, output_dir).video_path',self.download(video_url, output_dir).video_path)
         return self.download(video_url, output_dir).video_path
 
 
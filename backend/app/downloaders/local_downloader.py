@@ -5,10 +5,11 @@ from typing import Optional
 
 from app.downloaders.base import Downloader
 from app.enmus.note_enums import DownloadQuality
-from app.models.audio_model import AudioDownloadResult
+from app.models.audio_model import AudioDownloadResult, MediaProbe
 import os
 import subprocess
 
+from app.utils.media_probe import ffprobe_media
 from app.utils.video_helper import save_cover_to_static
 
 
@@ -66,6 +67,9 @@ class LocalDownloader(Downloader, ABC):
         if output_path is None:
             base, _ = os.path.splitext(input_path)
             output_path = base + ".mp3"
+        # 上传时已提前抽取的音频（不早于视频文件）直接复用
+        if os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(input_path):
+            return output_path
         try:
         # 调用 ffmpeg 转换
             command = [
@@ -85,14 +89,45 @@ class LocalDownloader(Downloader, ABC):
             return output_path
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"mp3 文件生成失败: {output_path}") from e
-    def download_video(self, video_url: str, output_dir: str = None) -> str:
+    @staticmethod
+    def _resolve_path(video_url: str) -> str:
         """
-        处理本地文件路径，返回视频文件路径
+        将 /uploads 开头的相对路径转换为本地绝对路径
         """
         if video_url.startswith('/uploads'):
             project_root = os.getcwd()
             video_url = os.path.join(project_root, video_url.lstrip('/'))
             video_url = os.path.normpath(video_url)
+        return video_url
+
+    def probe(self, video_url: str) -> Optional[MediaProbe]:
+        """
+        使用 ffprobe 读取本地文件的时长与体积
+        """
+        video_url = self._resolve_path(video_url)
+        if not os.path.exists(video_url):
+            raise FileNotFoundError(f"本地文件不存在: {video_url}")
+
+        info = ffprobe_media(video_url)
+        fmt = info.get("format", {})
+        title, _ = os.path.splitext(os.path.basename(video_url))
+        return MediaProbe(
+            platform="local",
+            video_id=title,
+            title=title,
+            duration=float(fmt.get("duration") or 0),
+            filesize=int(fmt.get("size") or os.path.getsize(video_url)),
+            formats=[
+                {"codec_type": st.get("codec_type"), "codec_name": st.get("codec_name")}
+                for st in info.get("streams", [])
+            ],
+        )
+
+    def download_video(self, video_url: str, output_dir: str = None) -> str:
+        """
+        处理本地文件路径，返回视频文件路径
+        """
+        video_url = self._resolve_path(video_url)
 
         if not os.path.exists(video_url):
             raise FileNotFoundError()
@@ -107,10 +142,7 @@ class LocalDownloader(Downloader, ABC):
         """
         处理本地文件路径，返回音频元信息
         """
-        if video_url.startswith('/uploads'):
-            project_root = os.getcwd()
-            video_url = os.path.join(project_root, video_url.lstrip('/'))
-            video_url = os.path.normpath(video_url)
+        video_url = self._resolve_path(video_url)
 
         if not os.path.exists(video_url):
             raise FileNotFoundError(f"本地文件不存在: {video_url}")
@@ -0,0 +1,48 @@
+import importlib
+import threading
+from typing import Dict, Optional, Type
+
+from app.downloaders.base import Downloader
+from app.services.constant import SUPPORT_PLATFORM_MAP
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_classes: Dict[str, Type[Downloader]] = {}
+_lock = threading.Lock()
+
+
+def get_downloader_class(platform: str) -> Optional[Type[Downloader]]:
+    """
+    按需导入平台对应的下载器类，导入结果缓存；多线程并发调用时只导入一次
+
+    :param platform: 平台标识
+    :return: Downloader 子类，不支持的平台返回 None
+    """
+    cls = _classes.get(platform)
+    if cls is not None:
+        return cls
+
+    with _lock:
+        cls = _classes.get(platform)
+        if cls is not None:
+            return cls
+        target = SUPPORT_PLATFORM_MAP.get(platform)
+        if not target:
+            return None
+        module_path, class_name = target.split(":")
+        cls = getattr(importlib.import_module(module_path), class_name)
+        _classes[platform] = cls
+        logger.info(f"已加载下载器 {platform} -> {cls.__name__}")
+        return cls
+
+
+def create_downloader(platform: str) -> Optional[Downloader]:
+    """
+    为单次任务创建新的下载器实例，实例之间不共享可变状态（如 Cookie、请求头）
+
+    :param platform: 平台标识
+    :return: Downloader 实例，不支持的平台返回 None
+    """
+    cls = get_downloader_class(platform)
+    return cls() if cls else None
@@ -11,9 +11,6 @@ header ={
     'user-agent':'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36'
 }
 
-response = requests.get(url, headers=header)
-print(response.json())
-
 class Xiaoyuzhoufm_download(Downloader):
     def download(
         self,
@@ -22,4 +19,10 @@ class Xiaoyuzhoufm_download(Downloader):
         quality: DownloadQuality = "fast",
         need_video:Optional[bool]=False
     ) -> AudioDownloadResult:
-        pass
\ No newline at end of file
+        pass
+
+
+if __name__ == '__main__':
+    # 仅调试时请求示例数据，导入本模块不会发起网络请求
+    response = requests.get(url, headers=header)
+    print(response.json())
@@ -5,7 +5,11 @@ from typing import Union, Optional
 import yt_dlp
 
 from app.downloaders.base import Downloader, DownloadQuality
+from app.downloaders.common import extract_ytdlp_info, fetch_ytdlp_subtitles, probe_from_ytdlp_info
+from app.downloaders.download_config import build_ydl_opts
+from app.models.audio_model import AudioStreamSource, MediaProbe
 from app.models.notes_model import AudioDownloadResult
+from app.models.transcriber_model import TranscriptResult
 from app.utils.path_helper import get_data_dir
 from app.utils.url_parser import extract_video_id
 
@@ -37,6 +41,7 @@ class YoutubeDownloader(Downloader, ABC):
             'quiet': False,
         }
 
+        ydl_opts, metrics = build_ydl_opts("youtube", ydl_opts)
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(video_url, download=True)
             video_id = info.get("id")
@@ -45,6 +50,7 @@ class YoutubeDownloader(Downloader, ABC):
             cover_url = info.get("thumbnail")
             ext = info.get("ext", "m4a")  # 兜底用 m4a
             audio_path = os.path.join(output_dir, f"{video_id}.{ext}")
+        metrics.log()
         print('os.path.join(output_dir, f"{video_id}.{ext}")',os.path.join(output_dir, f"{video_id}.{ext}"))
 
         return AudioDownloadResult(
@@ -54,10 +60,44 @@ class YoutubeDownloader(Downloader, ABC):
             cover_url=cover_url,
             platform="youtube",
             video_id=video_id,
-            raw_info={'tags':info.get('tags')}, #全部返回会报错
+            raw_info={'tags':info.get('tags'), 'download_metrics': metrics.summary()}, #全部返回会报错
             video_path=None  # ❗音频下载不包含视频路径
         )
 
+    def probe(self, video_url: str) -> Optional[MediaProbe]:
+        """
+        只解析元信息，下载前即可得知时长与体积
+        """
+        return probe_from_ytdlp_info(extract_ytdlp_info(video_url), "youtube")
+
+    def get_audio_stream(self, video_url: str) -> Optional[AudioStreamSource]:
+        """
+        只解析音频直链与元信息，交给 ffmpeg 边下载边切片转写
+        """
+        info = extract_ytdlp_info(video_url)
+
+        stream_url = info.get("url")
+        if not stream_url:
+            # 分离的音视频流（requested_formats）无法直接交给 ffmpeg
+            return None
+
+        return AudioStreamSource(
+            stream_url=stream_url,
+            http_headers=info.get("http_headers") or {},
+            title=info.get("title"),
+            duration=info.get("duration", 0),
+            cover_url=info.get("thumbnail"),
+            platform="youtube",
+            video_id=info.get("id"),
+            raw_info={'tags': info.get('tags')},
+        )
+
+    def download_subtitles(self, video_url: str, output_dir: str = None) -> Optional[TranscriptResult]:
+        """
+        优先使用平台字幕，避免对已有字幕的视频再跑一遍语音识别
+        """
+        return fetch_ytdlp_subtitles(video_url)
+
     def download_video(
         self,
         video_url: str,
@@ -83,10 +123,12 @@ class YoutubeDownloader(Downloader, ABC):
             'merge_output_format': 'mp4',  # 确保合并成 mp4
         }
 
+        ydl_opts, metrics = build_ydl_opts("youtube", ydl_opts)
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(video_url, download=True)
             video_id = info.get("id")
             video_path = os.path.join(output_dir, f"{video_id}.mp4")
+        metrics.log()
 
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"视频文件未找到: {video_path}")
@@ -15,6 +15,13 @@ class ProviderErrorEnum(enum.Enum):
 
 class NoteErrorEnum(enum.Enum):
     PLATFORM_NOT_SUPPORTED = (300101 ,"选择的平台不受支持")
+    MEDIA_TOO_LONG = (300102, "视频时长超出限制")
+    MEDIA_TOO_LARGE = (300103, "视频体积超出限制")
+    UPLOAD_NOT_FOUND = (300104, "上传会话不存在或已过期")
+    UPLOAD_INVALID = (300105, "上传参数不正确")
+    UPLOAD_CHECKSUM_MISMATCH = (300106, "上传文件校验失败")
+    UPLOAD_INCOMPLETE = (300107, "上传分片不完整")
+    UPLOAD_TOO_LARGE = (300108, "上传文件超出大小限制")
 
     def __init__(self, code, message):
         self.code = code
@@ -1,6 +1,5 @@
 from typing import List
 from app.gpt.base import GPT
-from openai import OpenAI
 from app.gpt.prompt import BASE_PROMPT, AI_SUM, SCREENSHOT
 from app.gpt.utils import fix_markdown
 from app.models.gpt_model import GPTSource
@@ -15,6 +14,7 @@ class DeepSeekGPT(GPT):
         self.base_url = getenv("DEEP_SEEK_API_BASE_URL")
         self.model=getenv('DEEP_SEEK_MODEL')
         print(self.model)
+        from openai import OpenAI
         self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
         self.screenshot = False
 
@@ -1,12 +1,12 @@
 from typing import Optional, Union
 
-from openai import OpenAI
-
 from app.utils.logger import get_logger
 
 logging= get_logger(__name__)
 class OpenAICompatibleProvider:
     def __init__(self, api_key: str, base_url: str, model: Union[str, None]=None):
+        # openai SDK 导入较慢，只在真正创建客户端时加载
+        from openai import OpenAI
         self.client = OpenAI(api_key=api_key, base_url=base_url)
         self.model = model
 
@@ -16,6 +16,7 @@ class OpenAICompatibleProvider:
 
     @staticmethod
     def test_connection(api_key: str, base_url: str) -> bool:
+        from openai import OpenAI
         try:
             client = OpenAI(api_key=api_key, base_url=base_url)
             model = client.models.list()
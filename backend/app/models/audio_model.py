@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 
 @dataclass
@@ -13,3 +13,24 @@ class AudioDownloadResult:
     raw_info: dict               # yt-dlp 的原始 info 字典
     video_path: Optional[str] = None  #  新增字段：可选视频文件路径
 
+
+@dataclass
+class AudioStreamSource:
+    stream_url: str              # 可直接被 ffmpeg 读取的音频直链
+    http_headers: dict           # 访问直链所需的请求头（Referer / User-Agent 等）
+    title: str                   # 视频标题
+    duration: float              # 视频时长（秒）
+    cover_url: Optional[str]     # 视频封面图
+    platform: str                # 平台，如 "bilibili"
+    video_id: str                # 唯一视频ID
+    raw_info: dict               # 平台原始元信息
+
+
+@dataclass
+class MediaProbe:
+    platform: str                # 平台，如 "bilibili"
+    video_id: Optional[str]      # 唯一视频ID
+    title: Optional[str]         # 视频标题
+    duration: float              # 时长（秒），未知时为 0
+    filesize: Optional[int]      # 待下载音频体积（字节），未知时为 None
+    formats: List[dict] = field(default_factory=list)  # 可用格式摘要
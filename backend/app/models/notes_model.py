@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from typing import Optional
 
 from app.models.audio_model import AudioDownloadResult
@@ -9,4 +9,12 @@ from app.models.transcriber_model import TranscriptResult
 class NoteResult:
     markdown: str                  # GPT 总结的 Markdown 内容
     transcript: TranscriptResult                # Whisper 转写结果
-    audio_meta: AudioDownloadResult  # 音频下载的元信息（title、duration、封面等）
\ No newline at end of file
+    audio_meta: AudioDownloadResult  # 音频下载的元信息（title、duration、封面等）
+
+    def to_dict(self) -> dict:
+        # 转写分段为列式存储，不能直接 asdict
+        return {
+            "markdown": self.markdown,
+            "transcript": self.transcript.to_dict(),
+            "audio_meta": asdict(self.audio_meta),
+        }
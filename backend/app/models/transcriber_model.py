@@ -1,16 +1,130 @@
+import bisect
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple, Union
 
-from dataclasses import dataclass
-from typing import List, Optional
-
-@dataclass
+@dataclass(slots=True)
 class TranscriptSegment:
     start: float               # 开始时间（秒）
     end: float                 # 结束时间（秒）
     text: str                  # 该段文字
 
+
+class SegmentStore(Sequence):
+    """
+    列式存储的分段：开始/结束时间为 float 数组，全部文字拼成一个字符串并用偏移量切分。
+    数小时的转写有数万个分段，相比 TranscriptSegment 列表内存占用小一个数量级。
+
+    与 List[TranscriptSegment] 用法一致（遍历、下标、切片、len），取出的分段是临时构造的副本，
+    修改它不会影响存储；需要修改时重新构造一个 SegmentStore。
+    """
+    __slots__ = ("starts", "ends", "offsets", "text_buffer")
+
+    def __init__(self, starts: Optional[array] = None, ends: Optional[array] = None,
+                 offsets: Optional[array] = None, text_buffer: str = ""):
+        self.starts = starts if starts is not None else array("d")
+        self.ends = ends if ends is not None else array("d")
+        # offsets 比分段多一个元素：第 i 段文字为 text_buffer[offsets[i]:offsets[i + 1]]
+        self.offsets = offsets if offsets is not None else array("q", [0])
+        self.text_buffer = text_buffer
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Union[TranscriptSegment, dict]]) -> "SegmentStore":
+        if isinstance(segments, SegmentStore):
+            return segments
+        starts, ends, offsets = array("d"), array("d"), array("q", [0])
+        texts: List[str] = []
+        position = 0
+        for seg in segments:
+            if isinstance(seg, dict):
+                start, end, text = seg["start"], seg["end"], seg["text"]
+            else:
+                start, end, text = seg.start, seg.end, seg.text
+            starts.append(start)
+            ends.append(end)
+            texts.append(text)
+            position += len(text)
+            offsets.append(position)
+        return cls(starts, ends, offsets, "".join(texts))
+
+    def text_at(self, index: int) -> str:
+        return self.text_buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    def joined_text(self, sep: str = " ") -> str:
+        return sep.join(self.text_at(i) for i in range(len(self))).strip()
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return SegmentStore.from_segments(self[i] for i in range(*index.indices(len(self))))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("segment index out of range")
+        return TranscriptSegment(start=self.starts[index], end=self.ends[index], text=self.text_at(index))
+
+    def __iter__(self):
+        starts, ends, offsets, buffer = self.starts, self.ends, self.offsets, self.text_buffer
+        for i in range(len(starts)):
+            yield TranscriptSegment(start=starts[i], end=ends[i], text=buffer[offsets[i]:offsets[i + 1]])
+
+    def time_range(self, start: Optional[float] = None, end: Optional[float] = None) -> Tuple[int, int]:
+        """
+        与 [start, end] 有重叠的分段下标区间 [i, j)（分段按时间排序，二分查找）
+        """
+        i = bisect.bisect_right(self.ends, start) if start is not None else 0
+        j = bisect.bisect_left(self.starts, end) if end is not None else len(self)
+        return i, max(i, j)
+
+    def to_list(self) -> List[dict]:
+        return [{"start": s.start, "end": s.end, "text": s.text} for s in self]
+
+    def __repr__(self) -> str:
+        return f"SegmentStore({len(self)} segments)"
+
+
+class _LazyFullText:
+    """
+    full_text 描述符：未显式传入时由分段文字拼接，首次读取时才生成
+    """
+
+    def __set_name__(self, owner, name):
+        self.attr = "_" + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            # dataclass 以此作为字段默认值
+            return None
+        value = obj.__dict__.get(self.attr)
+        if value is None:
+            value = obj.segments.joined_text()
+            obj.__dict__[self.attr] = value
+        return value
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.attr] = value
+
+
 @dataclass
 class TranscriptResult:
     language: Optional[str]         # 检测语言（如 "zh"、"en"）
-    full_text: str                  # 完整合并后的文本（用于摘要）
-    segments: List[TranscriptSegment]  # 分段结构，适合前端显示时间轴字幕等
-    raw: Optional[dict] = None      # 原始响应数据，便于调试或平台特性处理
\ No newline at end of file
+    full_text: Optional[str] = _LazyFullText()  # 完整合并后的文本（用于摘要），为空时按分段拼接
+    segments: SegmentStore = field(default_factory=SegmentStore)  # 分段结构，适合前端显示时间轴字幕等
+    raw: Optional[dict] = None      # 原始响应数据，便于调试或平台特性处理
+
+    def __post_init__(self):
+        # 各转写器按列表构造，统一转成列式存储
+        self.segments = SegmentStore.from_segments(self.segments)
+
+    def to_dict(self) -> dict:
+        """
+        供 JSON 输出使用（不含 raw，原始响应只在内存中保留）
+        """
+        return {
+            "language": self.language,
+            "full_text": self.full_text,
+            "segments": self.segments.to_list(),
+        }
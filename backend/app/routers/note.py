@@ -1,4 +1,6 @@
 # app/routers/note.py
+import asyncio
+import hashlib
 import json
 import os
 import uuid
@@ -8,18 +10,24 @@ from urllib.parse import urlparse
 
 from fastapi import APIRouter, HTTPException, BackgroundTasks, UploadFile, File
 from pydantic import BaseModel, validator, field_validator
-from dataclasses import asdict
 
 from app.db.video_task_dao import get_task_by_video
 from app.enmus.exception import NoteErrorEnum
 from app.enmus.note_enums import DownloadQuality
 from app.exceptions.note import NoteError
+from app.models.transcriber_model import TranscriptResult
 from app.services.note import NoteGenerator, logger
+from app.services.upload import UPLOAD_MAX_CHUNK_SIZE, StreamingUpload, chunked_upload_service
+from app.transcriber.whisper import COMPUTE_TYPES as WHISPER_COMPUTE_TYPES, MODEL_MAP as WHISPER_MODEL_MAP
+from app.utils.image_cache import ImageProxyError, image_proxy_cache, is_allowed_image_url, snap_width
 from app.utils.response import ResponseWrapper as R
+from app.utils.serializer import cache_path, dump, load
+from app.utils.static_files import STATIC_CACHE_MAX_AGE
+from app.utils.transcript_cache import load_transcript, transcript_cache_path
 from app.utils.url_parser import extract_video_id
 from app.validators.video_url_validator import is_supported_video_url
 from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response
 import httpx
 from app.enmus.task_status_enums import TaskStatus
 
@@ -34,6 +42,24 @@ class RecordRequest(BaseModel):
     platform: str
 
 
+class WhisperOptions(BaseModel):
+    """
+    faster-whisper 推理参数，未填写的字段使用环境变量默认值
+    """
+    beam_size: Optional[int] = None
+    vad_filter: Optional[bool] = None
+    batched: Optional[bool] = None
+    batch_size: Optional[int] = None
+    language: Optional[str] = None
+    compute_type: Optional[str] = None
+
+    @field_validator("compute_type")
+    def validate_compute_type(cls, v):
+        if v and v not in WHISPER_COMPUTE_TYPES:
+            raise ValueError(f"不支持的 compute_type：{v}，可选：{', '.join(WHISPER_COMPUTE_TYPES)}")
+        return v
+
+
 class VideoRequest(BaseModel):
     video_url: str
     platform: str
@@ -49,6 +75,8 @@ class VideoRequest(BaseModel):
     video_understanding: Optional[bool] = False
     video_interval: Optional[int] = 0
     grid_size: Optional[list] = []
+    whisper_model_size: Optional[str] = None
+    whisper_options: Optional[WhisperOptions] = None
 
     @field_validator("video_url")
     def validate_supported_url(cls, v):
@@ -62,21 +90,47 @@ class VideoRequest(BaseModel):
 
         return v
 
+    @field_validator("whisper_model_size")
+    def validate_whisper_model_size(cls, v):
+        if v and v not in WHISPER_MODEL_MAP:
+            raise ValueError(f"不支持的 Whisper 模型：{v}，可选：{', '.join(WHISPER_MODEL_MAP)}")
+        return v
+
 
 NOTE_OUTPUT_DIR = os.getenv("NOTE_OUTPUT_DIR", "note_results")
-UPLOAD_DIR = "uploads"
+# multipart 上传每次读取的字节数
+UPLOAD_READ_SIZE = 1024 * 1024
+
+
+def _result_path(task_id: str) -> Path:
+    return cache_path(Path(NOTE_OUTPUT_DIR), task_id)
+
+
+def client_result(result: dict) -> dict:
+    """
+    只保留前端需要的字段：去掉 audio_meta.raw_info（平台原始元信息）与 transcript.full_text（前端只用分段）
+    """
+    transcript = result.get("transcript") or {}
+    return {
+        "markdown": result.get("markdown"),
+        "transcript": {
+            "language": transcript.get("language"),
+            "segments": transcript.get("segments", []),
+        },
+        "audio_meta": {k: v for k, v in (result.get("audio_meta") or {}).items() if k != "raw_info"},
+    }
 
 
 def save_note_to_file(task_id: str, note):
     os.makedirs(NOTE_OUTPUT_DIR, exist_ok=True)
-    with open(os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.json"), "w", encoding="utf-8") as f:
-        json.dump(asdict(note), f, ensure_ascii=False, indent=2)
+    dump(_result_path(task_id), client_result(note.to_dict()))
 
 
 def run_note_task(task_id: str, video_url: str, platform: str, quality: DownloadQuality,
                   link: bool = False, screenshot: bool = False, model_name: str = None, provider_id: str = None,
                   _format: list = None, style: str = None, extras: str = None, video_understanding: bool = False,
-                  video_interval=0, grid_size=[]
+                  video_interval=0, grid_size=[], whisper_model_size: str = None,
+                  whisper_options: dict = None
                   ):
 
     if not model_name or not provider_id:
@@ -96,7 +150,9 @@ def run_note_task(task_id: str, video_url: str, platform: str, quality: Download
         screenshot=screenshot
         , video_understanding=video_understanding,
         video_interval=video_interval,
-        grid_size=grid_size
+        grid_size=grid_size,
+        whisper_model_size=whisper_model_size,
+        whisper_options=whisper_options,
     )
     logger.info(f"Note generated: {task_id}")
     if not note or not note.markdown:
@@ -118,14 +174,89 @@ def delete_task(data: RecordRequest):
 
 @router.post("/upload")
 async def upload(file: UploadFile = File(...)):
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    file_location = os.path.join(UPLOAD_DIR, file.filename)
+    # 分块拷贝，避免把整个文件读入内存；表单已由 Starlette 完整缓存，不做边传边抽，写完后在后台抽取音频
+    writer = StreamingUpload(file.filename, early_extract=False)
+    try:
+        while chunk := await file.read(UPLOAD_READ_SIZE):
+            await asyncio.to_thread(writer.write, chunk)
+        url = await asyncio.to_thread(writer.finish)
+    except BaseException:
+        writer.abort()
+        raise
+    return R.success({"url": url})
+
+
+@router.put("/upload/stream")
+async def upload_stream(request: Request, filename: str, sha256: Optional[str] = None):
+    """
+    以原始请求体流式上传（Content-Type: application/octet-stream），边接收边写盘并抽取音频
+
+    :param filename: 文件名
+    :param sha256: 整个文件的 sha256（可选），不一致时丢弃
+    """
+    content_length = request.headers.get("content-length")
+    writer = StreamingUpload(filename, int(content_length) if content_length else None)
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                await asyncio.to_thread(writer.write, chunk)
+        url = await asyncio.to_thread(writer.finish, sha256)
+    except BaseException:
+        writer.abort()
+        raise
+    return R.success({"url": url})
+
+
+class UploadSessionRequest(BaseModel):
+    filename: str
+    size: int
+    sha256: Optional[str] = None
+    chunk_size: Optional[int] = None
+
 
-    with open(file_location, "wb+") as f:
-        f.write(await file.read())
+@router.post("/upload/session")
+def create_upload_session(data: UploadSessionRequest):
+    """
+    创建可续传的分片上传会话，返回 upload_id 与服务端采用的 chunk_size
+    """
+    session = chunked_upload_service.create_session(data.filename, data.size, data.sha256, data.chunk_size)
+    return R.success(session.to_dict())
 
-    # 假设你静态目录挂载了 /uploads
-    return R.success({"url": f"/uploads/{file.filename}"})
+
+@router.get("/upload/session/{upload_id}")
+def get_upload_session(upload_id: str):
+    """
+    查询已收到的分片，断点续传时只需上传缺少的分片
+    """
+    return R.success(chunked_upload_service.get_session(upload_id).to_dict())
+
+
+@router.put("/upload/session/{upload_id}/chunk/{index}")
+async def upload_chunk(upload_id: str, index: int, request: Request, checksum: Optional[str] = None):
+    """
+    上传一个分片，请求体为原始字节
+
+    :param checksum: 分片的 sha256，也可通过 X-Chunk-SHA256 请求头传入
+    """
+    checksum = checksum or request.headers.get("x-chunk-sha256")
+    data = bytearray()
+    async for chunk in request.stream():
+        data.extend(chunk)
+        if len(data) > UPLOAD_MAX_CHUNK_SIZE:
+            return R.error(f"分片超过 {UPLOAD_MAX_CHUNK_SIZE} 字节", code=NoteErrorEnum.UPLOAD_INVALID.code)
+    session = await asyncio.to_thread(chunked_upload_service.write_chunk, upload_id, index, bytes(data), checksum)
+    return R.success(session.to_dict())
+
+
+@router.post("/upload/session/{upload_id}/complete")
+def complete_upload(upload_id: str):
+    return R.success({"url": chunked_upload_service.complete(upload_id)})
+
+
+@router.delete("/upload/session/{upload_id}")
+def abort_upload(upload_id: str):
+    chunked_upload_service.abort(upload_id)
+    return R.success(msg="已取消")
 
 
 @router.post("/generate_note")
@@ -153,16 +284,58 @@ def generate_note(data: VideoRequest, background_tasks: BackgroundTasks):
 
         background_tasks.add_task(run_note_task, task_id, data.video_url, data.platform, data.quality, data.link,
                                   data.screenshot, data.model_name, data.provider_id, data.format, data.style,
-                                  data.extras, data.video_understanding, data.video_interval, data.grid_size)
+                                  data.extras, data.video_understanding, data.video_interval, data.grid_size,
+                                  data.whisper_model_size,
+                                  data.whisper_options.model_dump() if data.whisper_options else None)
         return R.success({"task_id": task_id})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _file_etag(*paths, extra: str = "") -> str:
+    """
+    根据文件的修改时间与大小生成弱 ETag，不需要读取文件内容
+    """
+    parts = [extra]
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            parts.append(f"{stat.st_mtime_ns}-{stat.st_size}")
+        except OSError:
+            parts.append("-")
+    return 'W/"' + hashlib.md5("|".join(parts).encode()).hexdigest()[:20] + '"'
+
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+def _with_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _load_result(task_id: str) -> Optional[dict]:
+    result_path = _result_path(task_id)
+    return load(result_path) if result_path.exists() else None
+
+
 @router.get("/task_status/{task_id}")
-def get_task_status(task_id: str):
+def get_task_status(task_id: str, request: Request, include_result: bool = True):
+    """
+    :param include_result: 为 False 时成功状态也不返回笔记内容，客户端按需调用 /task/{task_id}/markdown 等接口分别获取
+    """
     status_path = os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.status.json")
-    result_path = os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.json")
+    etag = _file_etag(status_path, _result_path(task_id), extra=f"status:{include_result}")
+    return _not_modified(request, etag) or _with_etag(_task_status(task_id, include_result), etag)
+
+
+def _task_status(task_id: str, include_result: bool) -> Response:
+    status_path = os.path.join(NOTE_OUTPUT_DIR, f"{task_id}.status.json")
+    result_path = _result_path(task_id)
 
     # 优先读状态文件
     if os.path.exists(status_path):
@@ -175,14 +348,10 @@ def get_task_status(task_id: str):
         if status == TaskStatus.SUCCESS.value:
             # 成功状态的话，继续读取最终笔记内容
             if os.path.exists(result_path):
-                with open(result_path, "r", encoding="utf-8") as rf:
-                    result_content = json.load(rf)
-                return R.success({
-                    "status": status,
-                    "result": result_content,
-                    "message": message,
-                    "task_id": task_id
-                })
+                data = {"status": status, "message": message, "task_id": task_id}
+                if include_result:
+                    data["result"] = client_result(load(result_path))
+                return R.success(data)
             else:
                 # 理论上不会出现，保险处理
                 return R.success({
@@ -203,13 +372,10 @@ def get_task_status(task_id: str):
 
     # 没有状态文件，但有结果
     if os.path.exists(result_path):
-        with open(result_path, "r", encoding="utf-8") as f:
-            result_content = json.load(f)
-        return R.success({
-            "status": TaskStatus.SUCCESS.value,
-            "result": result_content,
-            "task_id": task_id
-        })
+        data = {"status": TaskStatus.SUCCESS.value, "task_id": task_id}
+        if include_result:
+            data["result"] = client_result(load(result_path))
+        return R.success(data)
 
     # 什么都没有，默认PENDING
     return R.success({
@@ -219,28 +385,110 @@ def get_task_status(task_id: str):
     })
 
 
-@router.get("/image_proxy")
-async def image_proxy(request: Request, url: str):
-    headers = {
-        "Referer": "https://www.bilibili.com/",
-        "User-Agent": request.headers.get("User-Agent", ""),
-    }
+@router.get("/task/{task_id}/markdown")
+def get_task_markdown(task_id: str, request: Request):
+    etag = _file_etag(_result_path(task_id), extra="markdown")
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    result = _load_result(task_id)
+    if result is None:
+        return R.error("笔记不存在或尚未生成", code=404)
+    return _with_etag(R.success({"task_id": task_id, "markdown": result.get("markdown")}), etag)
+
+
+@router.get("/task/{task_id}/transcript")
+def get_task_transcript(task_id: str, request: Request, start: Optional[float] = None, end: Optional[float] = None,
+                        offset: int = 0, limit: int = 200):
+    """
+    分页获取转写分段
+
+    :param start: 时间范围起点（秒），只返回与 [start, end] 有重叠的分段
+    :param end: 时间范围终点（秒）
+    :param offset: 范围内的起始条数
+    :param limit: 每页条数，最多 1000
+    """
+    offset = max(0, offset)
+    limit = min(max(1, limit), 1000)
+    cache_file = transcript_cache_path(Path(NOTE_OUTPUT_DIR), task_id)
+    etag = _file_etag(cache_file, _result_path(task_id), extra=f"transcript:{start}:{end}:{offset}:{limit}")
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    # 优先读列式转写缓存（可按时间二分），没有时退回结果文件中的分段
+    if cache_file.exists():
+        transcript = load_transcript(cache_file)
+    else:
+        result = _load_result(task_id)
+        if result is None:
+            return R.error("转写结果不存在或尚未生成", code=404)
+        data = result.get("transcript") or {}
+        transcript = TranscriptResult(language=data.get("language"), segments=data.get("segments", []))
+
+    segments = transcript.segments
+    first, last = segments.time_range(start, end)
+    page_start = min(first + offset, last)
+    page_end = min(page_start + limit, last)
+    return _with_etag(R.success({
+        "task_id": task_id,
+        "language": transcript.language,
+        "total": last - first,
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + limit if page_end < last else None,
+        "segments": segments[page_start:page_end].to_list(),
+    }), etag)
+
+
+@router.get("/task/{task_id}/meta")
+def get_task_meta(task_id: str, request: Request, raw: bool = False):
+    """
+    :param raw: 是否附带平台原始元信息 raw_info（体积较大，默认不返回）
+    """
+    audio_cache = cache_path(Path(NOTE_OUTPUT_DIR), f"{task_id}_audio")
+    etag = _file_etag(audio_cache, _result_path(task_id), extra=f"meta:{raw}")
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    # raw_info 只保存在音频元信息缓存中，结果文件里已去掉
+    if audio_cache.exists():
+        meta = load(audio_cache)
+    else:
+        result = _load_result(task_id)
+        if result is None:
+            return R.error("任务不存在或尚未生成", code=404)
+        meta = result.get("audio_meta") or {}
+    if not raw:
+        meta = {k: v for k, v in meta.items() if k != "raw_info"}
+    return _with_etag(R.success({"task_id": task_id, "audio_meta": meta}), etag)
 
+
+@router.get("/image_proxy")
+async def image_proxy(request: Request, url: str, width: Optional[int] = None):
+    """
+    代理平台图片（绕过防盗链，只允许 IMAGE_PROXY_ALLOWED_HOSTS 中的 CDN 域名），结果缓存在内存与磁盘中，相同图片的并发请求只回源一次
+
+    :param width: 缩略图宽度，向上取到 IMAGE_THUMBNAIL_WIDTHS 中的档位；不传返回原图
+    """
+    if not is_allowed_image_url(url):
+        raise HTTPException(status_code=403, detail="不支持代理该地址的图片")
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.get(url, headers=headers)
-
-            if resp.status_code != 200:
-                raise HTTPException(status_code=resp.status_code, detail="图片获取失败")
-
-            content_type = resp.headers.get("Content-Type", "image/jpeg")
-            return StreamingResponse(
-                resp.aiter_bytes(),
-                media_type=content_type,
-                headers={
-                    "Cache-Control": "public, max-age=86400",  #  缓存一天
-                    "Content-Type": content_type,
-                }
-            )
+        image = await image_proxy_cache.get(url, snap_width(width))
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(status_code=e.response.status_code, detail="图片获取失败")
+    except ImageProxyError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    etag = image.etag
+    headers = {
+        # 平台图片地址带内容哈希，同一 URL 内容不会变化
+        "Cache-Control": f"public, max-age={STATIC_CACHE_MAX_AGE}, immutable",
+        "ETag": etag,
+    }
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=image.content, media_type=image.content_type, headers=headers)
@@ -1,14 +1,9 @@
-from app.downloaders.bilibili_downloader import BilibiliDownloader
-from app.downloaders.douyin_downloader import DouyinDownloader
-from app.downloaders.kuaishou_downloader import KuaiShouDownloader
-from app.downloaders.local_downloader import LocalDownloader
-from app.downloaders.youtube_downloader import YoutubeDownloader
-
+# 平台 -> 下载器（"模块路径:类名"），由 app.downloaders.registry 在首次使用时导入并按任务实例化
 SUPPORT_PLATFORM_MAP = {
-    'youtube':YoutubeDownloader(),
-    'bilibili':BilibiliDownloader(),
-    'tiktok':DouyinDownloader(),
-    'kuaishou':KuaiShouDownloader(),
-    'douyin':DouyinDownloader(),
-    'local':LocalDownloader()
-}
\ No newline at end of file
+    'youtube': 'app.downloaders.youtube_downloader:YoutubeDownloader',
+    'bilibili': 'app.downloaders.bilibili_downloader:BilibiliDownloader',
+    'tiktok': 'app.downloaders.douyin_downloader:DouyinDownloader',
+    'kuaishou': 'app.downloaders.kuaishou_downloader:KuaiShouDownloader',
+    'douyin': 'app.downloaders.douyin_downloader:DouyinDownloader',
+    'local': 'app.downloaders.local_downloader:LocalDownloader'
+}
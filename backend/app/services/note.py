@@ -11,10 +11,7 @@ from pydantic import HttpUrl
 from dotenv import load_dotenv
 
 from app.downloaders.base import Downloader
-from app.downloaders.bilibili_downloader import BilibiliDownloader
-from app.downloaders.douyin_downloader import DouyinDownloader
-from app.downloaders.local_downloader import LocalDownloader
-from app.downloaders.youtube_downloader import YoutubeDownloader
+from app.downloaders.registry import create_downloader
 from app.db.video_task_dao import delete_task_by_video, insert_video_task
 from app.enmus.exception import NoteErrorEnum, ProviderErrorEnum
 from app.enmus.task_status_enums import TaskStatus
@@ -23,16 +20,22 @@ from app.exceptions.note import NoteError
 from app.exceptions.provider import ProviderError
 from app.gpt.base import GPT
 from app.gpt.gpt_factory import GPTFactory
-from app.models.audio_model import AudioDownloadResult
+from app.models.audio_model import AudioDownloadResult, MediaProbe
 from app.models.gpt_model import GPTSource
 from app.models.model_config import ModelConfig
 from app.models.notes_model import AudioDownloadResult, NoteResult
-from app.models.transcriber_model import TranscriptResult, TranscriptSegment
-from app.services.constant import SUPPORT_PLATFORM_MAP
+from app.models.transcriber_model import TranscriptResult
 from app.services.provider import ProviderService
 from app.transcriber.base import Transcriber
+from app.transcriber.streaming import transcribe_chunks
 from app.transcriber.transcriber_provider import get_transcriber, _transcribers
+from app.transcriber.router import TRANSCRIBER_ROUTING, guess_language, transcriber_router
+from app.utils.audio_stream import StreamingAudioSegmenter
+from app.utils.media_probe import check_media_limits, estimate_processing_seconds
+from app.utils.serializer import cache_path, dump as dump_cache, load as load_cache
+from app.utils.transcript_cache import dump_transcript, load_transcript, transcript_cache_path
 from app.utils.note_helper import replace_content_markers
+from app.utils.path_helper import get_data_dir
 from app.utils.status_code import StatusCode
 from app.utils.video_helper import generate_screenshot
 from app.utils.video_reader import VideoReader
@@ -54,6 +57,15 @@ IMAGE_OUTPUT_DIR = os.getenv("OUT_DIR", "./static/screenshots")
 # 图片基础 URL（用于生成 Markdown 中的图片链接，需前端静态目录对应）
 IMAGE_BASE_URL = os.getenv("IMAGE_BASE_URL", "/static/screenshots")
 
+# 流式转写：边下载边转写（仅对支持音频直链的平台生效）
+STREAM_TRANSCRIBE = os.getenv("STREAM_TRANSCRIBE", "false").lower() == "true"
+STREAM_CHUNK_SECONDS = int(os.getenv("STREAM_CHUNK_SECONDS", "300"))
+# 流式拉取的网络读写超时，以及 ffmpeg 无新分片、无输出增长多久判定为卡住（秒），卡住后回退到常规下载
+STREAM_RW_TIMEOUT = float(os.getenv("STREAM_RW_TIMEOUT", "30"))
+STREAM_STALL_TIMEOUT = float(os.getenv("STREAM_STALL_TIMEOUT", "300"))
+# 字幕优先：平台有字幕时直接使用，跳过语音识别
+SUBTITLE_FIRST = os.getenv("SUBTITLE_FIRST", "true").lower() == "true"
+
 # 日志配置
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -66,15 +78,29 @@ class NoteGenerator:
     """
 
     def __init__(self):
-        self.model_size: str = "base"
+        self.model_size: Optional[str] = None
+        self.whisper_options: Optional[dict] = None
         self.device: Optional[str] = None
         self.transcriber_type: str = os.getenv("TRANSCRIBER_TYPE", "fast-whisper")
-        self.transcriber: Transcriber = self._init_transcriber()
+        self._transcriber: Optional[Transcriber] = None
+        # 本任务的转写器类型是否已确定（路由只做一次）
+        self._transcriber_type_resolved = False
         self.video_path: Optional[Path] = None
         self.video_img_urls=[]
+        self.media_probe: Optional[MediaProbe] = None
+        self.platform: Optional[str] = None
         logger.info("NoteGenerator 初始化完成")
 
 
+    @property
+    def transcriber(self) -> Transcriber:
+        """
+        转写器在第一次需要转写时才获取，命中字幕缓存或仅查询状态时不会加载模型
+        """
+        if self._transcriber is None:
+            self._transcriber = self._init_transcriber()
+        return self._transcriber
+
     # ---------------- 公有方法 ----------------
 
     def generate(
@@ -94,6 +120,8 @@ class NoteGenerator:
         video_understanding: bool = False,
         video_interval: int = 0,
         grid_size: Optional[List[int]] = None,
+        whisper_model_size: Optional[str] = None,
+        whisper_options: Optional[dict] = None,
     ) -> NoteResult | None:
         """
         主流程：按步骤依次下载、转写、GPT 总结、截图/链接处理、存库、返回 NoteResult。
@@ -113,10 +141,18 @@ class NoteGenerator:
         :param video_understanding: 是否需要视频拼图理解（生成缩略图）
         :param video_interval: 视频帧截取间隔（秒），仅在 video_understanding 为 True 时生效
         :param grid_size: 生成缩略图时的网格大小，如 [3, 3]
+        :param whisper_model_size: 本次任务使用的 Whisper 模型尺寸（仅 fast-whisper），为空时使用 WHISPER_MODEL_SIZE
+        :param whisper_options: 本次任务的 faster-whisper 推理参数（beam_size / vad_filter / batched / batch_size / language / compute_type），覆盖环境变量默认值
         :return: NoteResult 对象，包含 markdown 文本、转写结果和音频元信息
         """
         if grid_size is None:
             grid_size = []
+        self.platform = platform
+        if whisper_model_size or whisper_options:
+            self.model_size = whisper_model_size or self.model_size
+            self.whisper_options = whisper_options
+            self._transcriber = None
+            self._transcriber_type_resolved = False
 
         try:
             logger.info(f"开始生成笔记 (task_id={task_id})")
@@ -128,31 +164,63 @@ class NoteGenerator:
             gpt = self._get_gpt(model_name, provider_id)
 
             # 缓存文件路径
-            audio_cache_file = NOTE_OUTPUT_DIR / f"{task_id}_audio.json"
-            transcript_cache_file = NOTE_OUTPUT_DIR / f"{task_id}_transcript.json"
+            probe_cache_file = cache_path(NOTE_OUTPUT_DIR, f"{task_id}_probe")
+            audio_cache_file = cache_path(NOTE_OUTPUT_DIR, f"{task_id}_audio")
+            transcript_cache_file = transcript_cache_path(NOTE_OUTPUT_DIR, task_id)
             markdown_cache_file = NOTE_OUTPUT_DIR / f"{task_id}_markdown.md"
             print(audio_cache_file)
-            # 1. 下载音频/视频
-            audio_meta = self._download_media(
+            # 预检：下载前获取时长/体积，超出限制直接拒绝
+            self.media_probe = self._probe_media(
                 downloader=downloader,
                 video_url=video_url,
-                quality=quality,
-                audio_cache_file=audio_cache_file,
-                status_phase=TaskStatus.DOWNLOADING,
-                platform=platform,
-                output_path=output_path,
-                screenshot=screenshot,
-                video_understanding=video_understanding,
-                video_interval=video_interval,
-                grid_size=grid_size,
+                probe_cache_file=probe_cache_file,
             )
+            # 预检后即确定转写器类型，状态文件中的预估耗时按实际使用的转写器计算
+            self._resolve_transcriber_type()
+
+            # 0. 字幕优先：命中后写入转写缓存，后续转写步骤直接读取缓存
+            if SUBTITLE_FIRST:
+                self._fetch_subtitles(
+                    downloader=downloader,
+                    video_url=video_url,
+                    transcript_cache_file=transcript_cache_file,
+                )
 
-            # 2. 转写文字
-            transcript = self._transcribe_audio(
-                audio_file=audio_meta.file_path,
-                transcript_cache_file=transcript_cache_file,
-                status_phase=TaskStatus.TRANSCRIBING,
-            )
+            # 流式模式：下载与转写重叠进行（需要视频时走常规流程）
+            streamed = None
+            if STREAM_TRANSCRIBE and not (screenshot or video_understanding):
+                streamed = self._stream_media(
+                    downloader=downloader,
+                    video_url=video_url,
+                    audio_cache_file=audio_cache_file,
+                    transcript_cache_file=transcript_cache_file,
+                    output_path=output_path,
+                )
+
+            if streamed:
+                audio_meta, transcript = streamed
+            else:
+                # 1. 下载音频/视频
+                audio_meta = self._download_media(
+                    downloader=downloader,
+                    video_url=video_url,
+                    quality=quality,
+                    audio_cache_file=audio_cache_file,
+                    status_phase=TaskStatus.DOWNLOADING,
+                    platform=platform,
+                    output_path=output_path,
+                    screenshot=screenshot,
+                    video_understanding=video_understanding,
+                    video_interval=video_interval,
+                    grid_size=grid_size,
+                )
+
+                # 2. 转写文字
+                transcript = self._transcribe_audio(
+                    audio_file=audio_meta.file_path,
+                    transcript_cache_file=transcript_cache_file,
+                    status_phase=TaskStatus.TRANSCRIBING,
+                )
 
             # 3. GPT 总结
             markdown = self._summarize_text(
@@ -208,14 +276,44 @@ class NoteGenerator:
 
     def _init_transcriber(self) -> Transcriber:
         """
-        根据环境变量 TRANSCRIBER_TYPE 动态获取并实例化转写器
+        根据环境变量 TRANSCRIBER_TYPE 动态获取并实例化转写器。
+        开启 TRANSCRIBER_ROUTING 且请求未指定 Whisper 模型/参数时，按时长、语言与负载为本任务选择转写器
         """
+        self._resolve_transcriber_type()
         if self.transcriber_type not in _transcribers:
             logger.error(f"未找到支持的转写器：{self.transcriber_type}")
             raise Exception(f"不支持的转写器：{self.transcriber_type}")
 
         logger.info(f"使用转写器：{self.transcriber_type}")
-        return get_transcriber(transcriber_type=self.transcriber_type)
+        return get_transcriber(transcriber_type=self.transcriber_type, model_size=self.model_size,
+                               whisper_options=self.whisper_options)
+
+    def _resolve_transcriber_type(self) -> str:
+        """
+        开启 TRANSCRIBER_ROUTING 且请求未指定 Whisper 模型/参数时，按时长、语言与负载为本任务选择转写器类型；
+        只选择一次，不加载模型
+        """
+        if not self._transcriber_type_resolved:
+            self._transcriber_type_resolved = True
+            if TRANSCRIBER_ROUTING and not (self.model_size or self.whisper_options):
+                probe = self.media_probe
+                self.transcriber_type = transcriber_router.choose(
+                    duration=probe.duration if probe else None,
+                    language=guess_language(probe.platform if probe else self.platform, self.whisper_options),
+                    default=self.transcriber_type,
+                )
+        return self.transcriber_type
+
+    def _record_transcriber_usage(self, transcript: TranscriptResult) -> None:
+        """
+        转写成功后计入远程转写接口的每日额度（按预检时长，缺失时按转写结果的末尾时间）
+        """
+        if not TRANSCRIBER_ROUTING:
+            return
+        duration = self.media_probe.duration if self.media_probe else None
+        if not duration and len(transcript.segments):
+            duration = transcript.segments.ends[-1]
+        transcriber_router.record_usage(self.transcriber_type, duration)
 
     def _get_gpt(self, model_name: Optional[str], provider_id: Optional[str]) -> GPT:
         """
@@ -240,34 +338,34 @@ class NoteGenerator:
 
     def _get_downloader(self, platform: str) -> Downloader:
         """
-        根据平台名称获取对应的下载器实例
+        根据平台名称创建对应的下载器实例（每个任务一个新实例，下载器模块首次使用时才导入）
 
         :param platform: 平台标识，需在 SUPPORT_PLATFORM_MAP 中
         :return: 对应的 Downloader 子类实例
         """
-        downloader_cls = SUPPORT_PLATFORM_MAP.get(platform)
         logger.debug(f"实例化下载器 -  {platform}")
-        instance = None
-        if not downloader_cls:
-            logger.error(f"不支持的平台：{platform}")
-            raise NoteError(code=NoteErrorEnum.PLATFORM_NOT_SUPPORTED.code,
-                            message=NoteErrorEnum.PLATFORM_NOT_SUPPORTED.message)
         try:
-            instance = downloader_cls
+            instance = create_downloader(platform)
         except Exception as e:
             logger.error(f"实例化下载器失败：{e}")
+            raise
+        if instance is None:
+            logger.error(f"不支持的平台：{platform}")
+            raise NoteError(code=NoteErrorEnum.PLATFORM_NOT_SUPPORTED.code,
+                            message=NoteErrorEnum.PLATFORM_NOT_SUPPORTED.message)
 
-
-        logger.info(f"使用下载器：{downloader_cls.__class__}")
+        logger.info(f"使用下载器：{instance.__class__}")
         return instance
 
-    def _update_status(self, task_id: Optional[str], status: Union[str, TaskStatus], message: Optional[str] = None):
+    def _update_status(self, task_id: Optional[str], status: Union[str, TaskStatus], message: Optional[str] = None,
+                       progress: Optional[float] = None):
         """
         创建或更新 {task_id}.status.json，记录当前任务状态
 
         :param task_id: 任务唯一 ID
         :param status: TaskStatus 枚举或自定义状态字符串
         :param message: 可选消息，用于记录失败原因等
+        :param progress: 当前阶段进度（0~1），如转写进度
         """
         if not task_id:
             return
@@ -278,6 +376,11 @@ class NoteGenerator:
         data = {"status": status.value if isinstance(status, TaskStatus) else status}
         if message:
             data["message"] = message
+        if progress is not None:
+            data["progress"] = round(progress, 3)
+        if self.media_probe:
+            data["duration"] = self.media_probe.duration
+            data["estimated_seconds"] = estimate_processing_seconds(self.media_probe, self.transcriber_type)
 
         try:
             # First create a temporary file
@@ -377,8 +480,7 @@ class NoteGenerator:
         if audio_cache_file.exists():
             logger.info(f"检测到音频缓存 ({audio_cache_file})，直接读取")
             try:
-                data = json.loads(audio_cache_file.read_text(encoding="utf-8"))
-                return AudioDownloadResult(**data)
+                return AudioDownloadResult(**load_cache(audio_cache_file))
             except Exception as e:
                 logger.warning(f"读取音频缓存失败，将重新下载：{e}")
         # 下载音频
@@ -390,8 +492,8 @@ class NoteGenerator:
                 output_dir=output_path,
                 need_video=need_video,
             )
-            # 缓存 audio 元信息到本地 JSON
-            audio_cache_file.write_text(json.dumps(asdict(audio), ensure_ascii=False, indent=2), encoding="utf-8")
+            # 缓存 audio 元信息
+            dump_cache(audio_cache_file, asdict(audio))
             logger.info(f"音频下载并缓存成功 ({audio_cache_file})")
             return audio
         except Exception as exc:
@@ -400,6 +502,140 @@ class NoteGenerator:
             raise
 
 
+    def _probe_media(
+        self,
+        downloader: Downloader,
+        video_url: Union[str, HttpUrl],
+        probe_cache_file: Path,
+    ) -> MediaProbe | None:
+        """
+        预检：在下载任何数据之前获取时长、体积与格式信息，并执行时长/体积限制。
+        预检本身失败不阻塞任务（回退到无预检流程），超出限制则抛出 NoteError。
+
+        :param downloader: Downloader 实例
+        :param video_url: 视频/音频链接
+        :param probe_cache_file: 预检结果缓存路径
+        :return: MediaProbe，平台不支持预检时返回 None
+        """
+        probe = None
+        if probe_cache_file.exists():
+            try:
+                probe = MediaProbe(**load_cache(probe_cache_file))
+            except Exception as e:
+                logger.warning(f"读取预检缓存失败，将重新预检：{e}")
+
+        if probe is None:
+            try:
+                probe = downloader.probe(video_url)
+            except Exception as exc:
+                logger.warning(f"预检失败，跳过时长/体积检查：{exc}")
+                return None
+            if probe is None:
+                return None
+            dump_cache(probe_cache_file, asdict(probe))
+
+        logger.info(f"预检完成：时长 {probe.duration:.0f}s，体积 {probe.filesize or '未知'} 字节")
+        check_media_limits(probe)
+        return probe
+
+    def _fetch_subtitles(
+        self,
+        downloader: Downloader,
+        video_url: Union[str, HttpUrl],
+        transcript_cache_file: Path,
+    ) -> TranscriptResult | None:
+        """
+        尝试获取平台字幕并写入转写缓存。字幕获取失败不影响主流程，会回退到语音识别。
+
+        :param downloader: Downloader 实例
+        :param video_url: 视频/音频链接
+        :param transcript_cache_file: 转写结果缓存路径
+        :return: 字幕转换得到的 TranscriptResult，没有字幕时返回 None
+        """
+        if transcript_cache_file.exists():
+            return None
+
+        try:
+            transcript = downloader.download_subtitles(video_url)
+        except Exception as exc:
+            logger.warning(f"获取平台字幕失败，将使用语音识别：{exc}")
+            return None
+        if not transcript:
+            return None
+
+        dump_transcript(transcript_cache_file, transcript)
+        logger.info(f"已使用平台字幕作为转写结果 ({transcript_cache_file})")
+        return transcript
+
+    def _stream_media(
+        self,
+        downloader: Downloader,
+        video_url: Union[str, HttpUrl],
+        audio_cache_file: Path,
+        transcript_cache_file: Path,
+        output_path: Optional[str],
+    ) -> Tuple[AudioDownloadResult, TranscriptResult] | None:
+        """
+        流式下载 + 分片转写：ffmpeg 直接拉取音频直链并按固定时长切片，
+        每写完一个分片就立即转写，下载与转写并行推进。
+
+        平台不支持、已有转写缓存（含字幕）或流式过程出错时返回 None，由调用方回退到常规的先下载后转写流程。
+
+        :param downloader: Downloader 实例
+        :param video_url: 视频/音频链接
+        :param audio_cache_file: 音频元信息缓存路径
+        :param transcript_cache_file: 转写结果缓存路径
+        :param output_path: 下载输出目录（可为 None）
+        :return: (AudioDownloadResult, TranscriptResult) 或 None
+        """
+        if transcript_cache_file.exists():
+            return None
+
+        task_id = audio_cache_file.stem.split("_")[0]
+        try:
+            source = downloader.get_audio_stream(video_url)
+        except Exception as exc:
+            logger.warning(f"解析音频直链失败，回退到常规下载：{exc}")
+            return None
+        if not source:
+            return None
+
+        self._update_status(task_id, TaskStatus.TRANSCRIBING)
+        output_dir = output_path or get_data_dir()
+        segmenter = StreamingAudioSegmenter(
+            stream_url=source.stream_url,
+            output_dir=output_dir,
+            file_stem=source.video_id,
+            http_headers=source.http_headers,
+            chunk_seconds=STREAM_CHUNK_SECONDS,
+            rw_timeout=STREAM_RW_TIMEOUT,
+            stall_timeout=STREAM_STALL_TIMEOUT or None,
+        )
+        try:
+            logger.info("开始流式下载并转写")
+            transcript = transcribe_chunks(self.transcriber, segmenter.iter_chunks())
+            self._record_transcriber_usage(transcript)
+        except Exception as exc:
+            logger.warning(f"流式转写失败，回退到常规下载：{exc}")
+            return None
+        finally:
+            segmenter.close()
+
+        audio = AudioDownloadResult(
+            file_path=segmenter.audio_path,
+            title=source.title,
+            duration=source.duration,
+            cover_url=source.cover_url,
+            platform=source.platform,
+            video_id=source.video_id,
+            raw_info=source.raw_info,
+            video_path=None,
+        )
+        dump_cache(audio_cache_file, asdict(audio))
+        dump_transcript(transcript_cache_file, transcript)
+        logger.info(f"流式转写并缓存成功 ({transcript_cache_file})")
+        return audio, transcript
+
     def _transcribe_audio(
         self,
         audio_file: str,
@@ -422,17 +658,20 @@ class NoteGenerator:
         if transcript_cache_file.exists():
             logger.info(f"检测到转写缓存 ({transcript_cache_file})，尝试读取")
             try:
-                data = json.loads(transcript_cache_file.read_text(encoding="utf-8"))
-                segments = [TranscriptSegment(**seg) for seg in data.get("segments", [])]
-                return TranscriptResult(language=data["language"], full_text=data["full_text"], segments=segments)
+                return load_transcript(transcript_cache_file)
             except Exception as e:
                 logger.warning(f"加载转写缓存失败，将重新转写：{e}")
 
         # 调用转写器
         try:
             logger.info("开始转写音频")
-            transcript = self.transcriber.transcript(file_path=audio_file)
-            transcript_cache_file.write_text(json.dumps(asdict(transcript), ensure_ascii=False, indent=2), encoding="utf-8")
+            job = self.transcriber.submit(
+                audio_file,
+                on_progress=lambda progress, message: self._update_status(task_id, status_phase, message, progress),
+            )
+            transcript = job.wait()
+            self._record_transcriber_usage(transcript)
+            dump_transcript(transcript_cache_file, transcript)
             logger.info(f"转写并缓存成功 ({transcript_cache_file})")
             return transcript
         except Exception as exc:
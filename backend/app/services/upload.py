@@ -0,0 +1,374 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.enmus.exception import NoteErrorEnum
+from app.exceptions.note import NoteError
+from app.utils.audio_extract import (
+    EarlyAudioExtractor,
+    audio_path_for,
+    extract_audio_in_background,
+    needs_audio_extraction,
+)
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+UPLOAD_DIR = "uploads"
+# 未完成的上传会话与临时文件，放在静态目录之外，不对外提供访问
+UPLOAD_SESSION_DIR = os.getenv("UPLOAD_SESSION_DIR", "upload_sessions")
+# 分片上传的默认分片大小与允许的最大分片
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# 单个文件上限（字节），与 nginx client_max_body_size 保持一致
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 ** 3)))
+# 未完成的会话保留时长（小时），超时后创建新会话时清理
+UPLOAD_SESSION_TTL_HOURS = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+# 上传过程中即开始抽取音频
+UPLOAD_EARLY_EXTRACT = os.getenv("UPLOAD_EARLY_EXTRACT", "true").lower() == "true"
+# 分片上传超过该秒数没有新分片时结束其边传边抽进程，让出 UPLOAD_MAX_EXTRACTORS 名额
+EXTRACTOR_IDLE_SECONDS = 10 * 60
+
+
+def safe_filename(filename: str) -> str:
+    """
+    去掉客户端文件名中的目录部分，防止写到 uploads 之外
+    """
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    if name in ("", ".", "..") or name.startswith("."):
+        raise NoteError(code=NoteErrorEnum.UPLOAD_INVALID.code,
+                        message=f"{NoteErrorEnum.UPLOAD_INVALID.message}：文件名不合法")
+    return name
+
+
+def _check_size(size: int) -> None:
+    if size > UPLOAD_MAX_BYTES:
+        raise NoteError(code=NoteErrorEnum.UPLOAD_TOO_LARGE.code,
+                        message=f"{NoteErrorEnum.UPLOAD_TOO_LARGE.message}（{size} > {UPLOAD_MAX_BYTES} 字节）")
+
+
+def _checksum_error(detail: str) -> NoteError:
+    return NoteError(code=NoteErrorEnum.UPLOAD_CHECKSUM_MISMATCH.code,
+                     message=f"{NoteErrorEnum.UPLOAD_CHECKSUM_MISMATCH.message}：{detail}")
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _upload_url(filename: str) -> str:
+    # 静态目录挂载在 /uploads
+    return f"/uploads/{filename}"
+
+
+class StreamingUpload:
+    """
+    单次请求的流式上传：分块写入临时文件并计算 sha256，可同时把数据交给 ffmpeg 抽取音频
+    """
+
+    def __init__(self, filename: str, expected_size: Optional[int] = None, early_extract: bool = True):
+        """
+        :param early_extract: 边写入边抽取音频；数据已完整落盘（如 multipart 表单已由框架缓存到临时文件）时
+                              边传边抽没有重叠收益，传 False 改为写完后在后台整体转换
+        """
+        self.filename = safe_filename(filename)
+        if expected_size:
+            _check_size(expected_size)
+        os.makedirs(UPLOAD_SESSION_DIR, exist_ok=True)
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        self.part_path = os.path.join(UPLOAD_SESSION_DIR, f"{uuid.uuid4().hex}.part")
+        self.target_path = os.path.join(UPLOAD_DIR, self.filename)
+        self.size = 0
+        self._hash = hashlib.sha256()
+        self._file = open(self.part_path, "wb")
+        self._extract = UPLOAD_EARLY_EXTRACT and needs_audio_extraction(self.target_path)
+        self._extractor = (EarlyAudioExtractor.start(audio_path_for(self.target_path))
+                           if self._extract and early_extract else None)
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        _check_size(self.size)
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        if self._extractor is not None:
+            self._extractor.feed(chunk)
+
+    def finish(self, sha256: Optional[str] = None) -> str:
+        """
+        :param sha256: 客户端提供的整个文件的 sha256，不一致时丢弃文件
+        :return: 前端访问路径
+        """
+        self._file.close()
+        digest = self._hash.hexdigest()
+        if sha256 and sha256.lower() != digest:
+            raise _checksum_error(f"期望 {sha256}，实际 {digest}")
+        extracted = self._extractor.finish() if self._extractor is not None else False
+        # 临时目录与 uploads 可能位于不同的卷
+        shutil.move(self.part_path, self.target_path)
+        if self._extract and not extracted:
+            extract_audio_in_background(self.target_path)
+        logger.info(f"上传完成：{self.target_path}（{self.size // 1024}KB，音频{'已' if extracted else '未'}提前抽取）")
+        return _upload_url(self.filename)
+
+    def abort(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+        if self._extractor is not None:
+            self._extractor.abort()
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+
+@dataclass
+class UploadSession:
+    upload_id: str
+    filename: str
+    size: int
+    chunk_size: int
+    sha256: Optional[str] = None
+    received: List[int] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def total_chunks(self) -> int:
+        return max(1, -(-self.size // self.chunk_size))
+
+    def chunk_length(self, index: int) -> int:
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["received"] = sorted(self.received)
+        data["total_chunks"] = self.total_chunks
+        data["received_bytes"] = sum(self.chunk_length(i) for i in self.received)
+        return data
+
+
+class ChunkedUploadService:
+    """
+    可续传的分片上传：会话信息保存在 UPLOAD_SESSION_DIR/{upload_id}.json，数据写入预分配的 .part 文件对应偏移处。
+    分片可乱序、并发、重复上传；客户端断开后调用 get_session 查询已收到的分片继续上传。
+
+    收到第一个分片后，已连续收到的前缀会按顺序交给 ffmpeg 抽取音频，最后一个分片到达时音频基本已就绪
+    """
+
+    def __init__(self, session_dir: str = UPLOAD_SESSION_DIR):
+        self.session_dir = session_dir
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # 边传边抽只在当前进程内进行，服务重启后在 complete 时回退为整体转换
+        self._extractors: Dict[str, EarlyAudioExtractor] = {}
+        self._fed: Dict[str, int] = {}
+
+    def _lock(self, upload_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.session_dir, f"{upload_id}.json")
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.session_dir, f"{upload_id}.part")
+
+    def _save(self, session: UploadSession) -> None:
+        tmp_path = self._meta_path(session.upload_id) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(session), f)
+        os.replace(tmp_path, self._meta_path(session.upload_id))
+
+    def get_session(self, upload_id: str) -> UploadSession:
+        # upload_id 由服务端生成，只允许十六进制，防止路径穿越
+        meta_path = self._meta_path(upload_id)
+        if not upload_id.isalnum() or not os.path.exists(meta_path):
+            raise NoteError(code=NoteErrorEnum.UPLOAD_NOT_FOUND.code, message=NoteErrorEnum.UPLOAD_NOT_FOUND.message)
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return UploadSession(**json.load(f))
+
+    def create_session(self, filename: str, size: int, sha256: Optional[str] = None,
+                       chunk_size: Optional[int] = None) -> UploadSession:
+        """
+        :param filename: 原始文件名
+        :param size: 文件总字节数
+        :param sha256: 整个文件的 sha256（可选），complete 时校验
+        :param chunk_size: 分片大小，默认 UPLOAD_CHUNK_SIZE
+        """
+        if size < 0:
+            raise NoteError(code=NoteErrorEnum.UPLOAD_INVALID.code,
+                            message=f"{NoteErrorEnum.UPLOAD_INVALID.message}：文件大小不能为负数")
+        _check_size(size)
+        chunk_size = min(max(chunk_size or UPLOAD_CHUNK_SIZE, 256 * 1024), UPLOAD_MAX_CHUNK_SIZE)
+        session = UploadSession(
+            upload_id=uuid.uuid4().hex,
+            filename=safe_filename(filename),
+            size=size,
+            chunk_size=chunk_size,
+            sha256=sha256.lower() if sha256 else None,
+        )
+        os.makedirs(self.session_dir, exist_ok=True)
+        self.cleanup_expired()
+        # 预分配文件，分片按偏移写入
+        with open(self._part_path(session.upload_id), "wb") as f:
+            f.truncate(size)
+        self._save(session)
+        return session
+
+    def write_chunk(self, upload_id: str, index: int, data: bytes, checksum: Optional[str] = None) -> UploadSession:
+        """
+        写入一个分片，重复上传同一分片会覆盖
+
+        :param index: 分片序号，从 0 开始
+        :param checksum: 该分片的 sha256
+        """
+        session = self.get_session(upload_id)
+        if not 0 <= index < session.total_chunks:
+            raise NoteError(code=NoteErrorEnum.UPLOAD_INVALID.code,
+                            message=f"{NoteErrorEnum.UPLOAD_INVALID.message}：分片序号 {index} 超出范围")
+        expected = session.chunk_length(index)
+        if len(data) != expected:
+            raise NoteError(code=NoteErrorEnum.UPLOAD_INVALID.code,
+                            message=f"{NoteErrorEnum.UPLOAD_INVALID.message}：分片 {index} 应为 {expected} 字节，实际 {len(data)}")
+        if checksum and hashlib.sha256(data).hexdigest() != checksum.lower():
+            raise _checksum_error(f"分片 {index}")
+
+        with open(self._part_path(upload_id), "r+b") as f:
+            f.seek(index * session.chunk_size)
+            f.write(data)
+
+        with self._lock(upload_id):
+            # 并发写入时以磁盘上最新的会话为准再合并
+            session = self.get_session(upload_id)
+            if index not in session.received:
+                session.received.append(index)
+                self._save(session)
+            if index == 0:
+                self._start_extractor(session)
+            self._feed_extractor(session)
+        return session
+
+    def _start_extractor(self, session: UploadSession) -> None:
+        """
+        收到第一个分片时才启动 ffmpeg，只创建会话而不上传的请求不占用进程
+        """
+        if (not UPLOAD_EARLY_EXTRACT or session.upload_id in self._extractors
+                or not needs_audio_extraction(session.filename)):
+            return
+        self._stop_idle_extractors()
+        # ffmpeg 直接把音频写到 uploads 目录
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        extractor = EarlyAudioExtractor.start(audio_path_for(os.path.join(UPLOAD_DIR, session.filename)))
+        if extractor is not None:
+            self._extractors[session.upload_id] = extractor
+            self._fed[session.upload_id] = 0
+
+    def _stop_idle_extractors(self) -> None:
+        # 会话文件在每次收到新分片时更新，长时间未更新视为客户端已放弃，complete 时回退为整体转换
+        deadline = time.time() - EXTRACTOR_IDLE_SECONDS
+        for upload_id in list(self._extractors):
+            try:
+                idle = os.path.getmtime(self._meta_path(upload_id)) < deadline
+            except OSError:
+                idle = True
+            lock = self._lock(upload_id)
+            # 拿不到锁说明该会话正在写入分片，并非空闲
+            if not idle or not lock.acquire(blocking=False):
+                continue
+            try:
+                extractor = self._extractors.pop(upload_id, None)
+                self._fed.pop(upload_id, None)
+            finally:
+                lock.release()
+            if extractor is not None:
+                logger.info(f"分片上传 {upload_id} 长时间无新分片，停止边传边抽音频")
+                extractor.abort()
+
+    def _feed_extractor(self, session: UploadSession) -> None:
+        extractor = self._extractors.get(session.upload_id)
+        if extractor is None:
+            return
+        received = set(session.received)
+        fed = self._fed[session.upload_id]
+        if fed not in received:
+            return
+        with open(self._part_path(session.upload_id), "rb") as f:
+            while fed in received and not extractor.failed:
+                f.seek(fed * session.chunk_size)
+                extractor.feed(f.read(session.chunk_length(fed)))
+                fed += 1
+        self._fed[session.upload_id] = fed
+
+    def complete(self, upload_id: str) -> str:
+        """
+        所有分片到齐后校验并移动到 uploads 目录
+        :return: 前端访问路径
+        """
+        with self._lock(upload_id):
+            session = self.get_session(upload_id)
+            missing = sorted(set(range(session.total_chunks)) - set(session.received))
+            if missing:
+                raise NoteError(code=NoteErrorEnum.UPLOAD_INCOMPLETE.code,
+                                message=f"{NoteErrorEnum.UPLOAD_INCOMPLETE.message}：缺少分片 {missing[:20]}")
+            part_path = self._part_path(upload_id)
+            if session.sha256:
+                digest = _file_sha256(part_path)
+                if digest != session.sha256:
+                    raise _checksum_error(f"期望 {session.sha256}，实际 {digest}")
+
+            extractor = self._extractors.pop(upload_id, None)
+            self._fed.pop(upload_id, None)
+            extracted = extractor.finish() if extractor is not None else False
+
+            target_path = os.path.join(UPLOAD_DIR, session.filename)
+            os.makedirs(UPLOAD_DIR, exist_ok=True)
+            shutil.move(part_path, target_path)
+            os.remove(self._meta_path(upload_id))
+        with self._locks_guard:
+            self._locks.pop(upload_id, None)
+
+        if UPLOAD_EARLY_EXTRACT and needs_audio_extraction(target_path) and not extracted:
+            extract_audio_in_background(target_path)
+        logger.info(f"分片上传完成：{target_path}（{session.total_chunks} 片，音频{'已' if extracted else '未'}提前抽取）")
+        return _upload_url(session.filename)
+
+    def abort(self, upload_id: str) -> None:
+        self.get_session(upload_id)
+        extractor = self._extractors.pop(upload_id, None)
+        self._fed.pop(upload_id, None)
+        if extractor is not None:
+            extractor.abort()
+        for path in (self._part_path(upload_id), self._meta_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def cleanup_expired(self) -> None:
+        """
+        删除超过 UPLOAD_SESSION_TTL_HOURS 未更新的会话与临时文件
+        """
+        deadline = time.time() - UPLOAD_SESSION_TTL_HOURS * 3600
+        for name in os.listdir(self.session_dir):
+            path = os.path.join(self.session_dir, name)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+                    upload_id = name.split(".", 1)[0]
+                    extractor = self._extractors.pop(upload_id, None)
+                    self._fed.pop(upload_id, None)
+                    if extractor is not None:
+                        extractor.abort()
+            except OSError:
+                continue
+
+
+chunked_upload_service = ChunkedUploadService()
@@ -1,6 +1,9 @@
+import asyncio
 from abc import ABC, abstractmethod
+from typing import Optional
 
 from app.models.transcriber_model import TranscriptResult
+from app.transcriber.job import ProgressCallback, TranscriptionJob
 
 
 class Transcriber(ABC):
@@ -13,6 +16,26 @@ class Transcriber(ABC):
         '''
         pass
 
+    async def atranscript(self, file_path: str, **kwargs) -> TranscriptResult:
+        '''
+        异步转写。默认实现把同步的 transcript 放到线程中执行（本地模型本身就要占用计算资源）；
+        远程接口（上传后轮询）应重写为原生协程，等待期间不占用线程
+
+        :param file_path: 音频路径
+        :return: 返回一个 TranscriptResult 类
+        '''
+        return await asyncio.to_thread(self.transcript, file_path, **kwargs)
+
+    def submit(self, file_path: str, on_progress: Optional[ProgressCallback] = None, **kwargs) -> TranscriptionJob:
+        '''
+        提交转写任务，立即返回任务句柄；任务在后台事件循环中执行
+
+        :param file_path: 音频路径
+        :param on_progress: 进度回调 (进度 0~1, 说明)
+        :return: TranscriptionJob，可 await 或 wait() 获取结果
+        '''
+        return TranscriptionJob(file_path, on_progress).start(self.atranscript(file_path, **kwargs))
+
     def on_finish(self,video_path:str,result: TranscriptResult)->None:
         '''
         当音频转录完成时调用
@@ -20,4 +43,4 @@ class Transcriber(ABC):
         :param result: 识别结果
         :return:
         '''
-        pass
\ No newline at end of file
+        pass
@@ -1,14 +1,24 @@
+import asyncio
 import json
 import logging
+import os
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Union
 
 import requests
+from dotenv import load_dotenv
 
 from app.decorators.timeit import timeit
 from app.models.transcriber_model import TranscriptSegment, TranscriptResult
 from app.transcriber.base import Transcriber
+from app.transcriber.job import report_progress
+from app.utils.async_runner import run_sync
+from app.utils.http_client import get_async_client
 from app.utils.logger import get_logger
+from app.utils.media_probe import TRANSCRIBE_REALTIME_FACTOR, ffprobe_media
 from events import transcription_finished
 
 __version__ = "0.0.3"
@@ -28,6 +38,38 @@ API_CREATE_TASK = API_BASE_URL + "/task"
 API_QUERY_RESULT = API_BASE_URL + "/task/result"
 
 logger = get_logger(__name__)
+load_dotenv()
+
+# 分片并发上传数、单个分片的重试次数与超时（秒）
+BCUT_UPLOAD_CONCURRENCY = int(os.getenv("BCUT_UPLOAD_CONCURRENCY", "4"))
+BCUT_UPLOAD_RETRIES = int(os.getenv("BCUT_UPLOAD_RETRIES", "3"))
+BCUT_UPLOAD_TIMEOUT = int(os.getenv("BCUT_UPLOAD_TIMEOUT", "60"))
+
+# 结果轮询：最小/最大间隔（秒）与最长等待时间（秒，长音频按预估时长放宽）
+BCUT_POLL_MIN_INTERVAL = float(os.getenv("BCUT_POLL_MIN_INTERVAL", "1"))
+BCUT_POLL_MAX_INTERVAL = float(os.getenv("BCUT_POLL_MAX_INTERVAL", "15"))
+BCUT_POLL_TIMEOUT = float(os.getenv("BCUT_POLL_TIMEOUT", "600"))
+# 处理 1 秒音频的预估耗时，用于推算首次查询时间
+BCUT_REALTIME_FACTOR = TRANSCRIBE_REALTIME_FACTOR["bcut"]
+
+
+@dataclass
+class _BcutSession:
+    """
+    单次识别的上传/任务状态。每次 transcript 调用各自持有一份，
+    共享同一个 BcutTranscriber 的并发任务互不干扰。
+    """
+    http: requests.Session = field(default_factory=requests.Session)
+    in_boss_key: Optional[str] = None
+    resource_id: Optional[str] = None
+    upload_id: Optional[str] = None
+    upload_urls: List[str] = field(default_factory=list)
+    per_size: Optional[int] = None
+    clips: Optional[int] = None
+    etags: List[str] = field(default_factory=list)
+    download_url: Optional[str] = None
+    task_id: Optional[str] = None
+
 
 class BcutTranscriber(Transcriber):
     """必剪 语音识别接口"""
@@ -37,41 +79,31 @@ class BcutTranscriber(Transcriber):
     }
 
     def __init__(self):
-        self.session = requests.Session()
-        self.task_id = None
-        self.__etags = []
-
-        self.__in_boss_key: Optional[str] = None
-        self.__resource_id: Optional[str] = None
-        self.__upload_id: Optional[str] = None
-        self.__upload_urls: List[str] = []
-        self.__per_size: Optional[int] = None
-        self.__clips: Optional[int] = None
-
-        self.__etags: List[str] = []
-        self.__download_url: Optional[str] = None
-        self.task_id: Optional[str] = None
-        
-    def _load_file(self, file_path: str) -> bytes:
-        """读取文件内容"""
+        # 实例本身无状态，上传与任务状态放在每次调用的 _BcutSession 中
+        pass
+
+    @staticmethod
+    def _read_range(file_path: str, start: int, end: int) -> bytes:
+        """按区间读取单个分片，避免把整个文件读入内存"""
         with open(file_path, 'rb') as f:
-            return f.read()
+            f.seek(start)
+            return f.read(end - start)
 
-    def _upload(self, file_path: str) -> None:
+    def _upload(self, session: _BcutSession, file_path: str) -> None:
         """申请上传"""
-        file_binary = self._load_file(file_path)
-        if not file_binary:
+        file_size = os.path.getsize(file_path)
+        if not file_size:
             raise ValueError("无法读取文件数据")
             
         payload = json.dumps({
             "type": 2,
             "name": "audio.mp3",
-            "size": len(file_binary),
+            "size": file_size,
             "ResourceFileType": "mp3",
             "model_id": "8",
         })
 
-        resp = self.session.post(
+        resp = session.http.post(
             API_REQ_UPLOAD,
             data=payload,
             headers=self.headers
@@ -80,64 +112,84 @@ class BcutTranscriber(Transcriber):
         resp = resp.json()
         resp_data = resp["data"]
 
-        self.__in_boss_key = resp_data["in_boss_key"]
-        self.__resource_id = resp_data["resource_id"]
-        self.__upload_id = resp_data["upload_id"]
-        self.__upload_urls = resp_data["upload_urls"]
-        self.__per_size = resp_data["per_size"]
-        self.__clips = len(resp_data["upload_urls"])
+        session.in_boss_key = resp_data["in_boss_key"]
+        session.resource_id = resp_data["resource_id"]
+        session.upload_id = resp_data["upload_id"]
+        session.upload_urls = resp_data["upload_urls"]
+        session.per_size = resp_data["per_size"]
+        session.clips = len(resp_data["upload_urls"])
 
         logger.info(
-            f"申请上传成功, 总计大小{resp_data['size'] // 1024}KB, {self.__clips}分片, 分片大小{resp_data['per_size'] // 1024}KB: {self.__in_boss_key}"
+            f"申请上传成功, 总计大小{resp_data['size'] // 1024}KB, {session.clips}分片, 分片大小{resp_data['per_size'] // 1024}KB: {session.in_boss_key}"
         )
-        self.__upload_part(file_binary)
-        self.__commit_upload()
-
-    def __upload_part(self, file_binary: bytes) -> None:
-        """上传音频数据"""
-        for clip in range(self.__clips):
-            start_range = clip * self.__per_size
-            end_range = min((clip + 1) * self.__per_size, len(file_binary))
-            logger.info(f"开始上传分片{clip}: {start_range}-{end_range}")
-            resp = self.session.put(
-                self.__upload_urls[clip],
-                data=file_binary[start_range:end_range],
-                headers={'Content-Type': 'application/octet-stream'}
-            )
-            resp.raise_for_status()
-            etag = resp.headers.get("Etag", "").strip('"')
-            self.__etags.append(etag)
-            logger.info(f"分片{clip}上传成功: {etag}")
-
-    def __commit_upload(self) -> None:
+        self._upload_parts(session, file_path, file_size)
+        self._commit_upload(session)
+
+    def _upload_part(self, session: _BcutSession, file_path: str, file_size: int, clip: int) -> str:
+        """上传单个分片，失败时按指数退避重试，返回 etag"""
+        start_range = clip * session.per_size
+        end_range = min((clip + 1) * session.per_size, file_size)
+        data = self._read_range(file_path, start_range, end_range)
+        for attempt in range(1, BCUT_UPLOAD_RETRIES + 1):
+            try:
+                resp = session.http.put(
+                    session.upload_urls[clip],
+                    data=data,
+                    headers={'Content-Type': 'application/octet-stream'},
+                    timeout=BCUT_UPLOAD_TIMEOUT,
+                )
+                resp.raise_for_status()
+                etag = resp.headers.get("Etag", "").strip('"')
+                logger.info(f"分片{clip}上传成功（{start_range}-{end_range}）: {etag}")
+                return etag
+            except requests.RequestException as e:
+                if attempt == BCUT_UPLOAD_RETRIES:
+                    raise
+                delay = 2 ** (attempt - 1)
+                logger.warning(f"分片{clip}上传失败（第{attempt}次）：{e}，{delay}s 后重试")
+                time.sleep(delay)
+
+    def _upload_parts(self, session: _BcutSession, file_path: str, file_size: int) -> None:
+        """并发上传全部分片，etag 按分片顺序回填"""
+        workers = max(1, min(BCUT_UPLOAD_CONCURRENCY, session.clips))
+        session.etags = [""] * session.clips
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcut-upload") as pool:
+            futures = {
+                pool.submit(self._upload_part, session, file_path, file_size, clip): clip
+                for clip in range(session.clips)
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                session.etags[futures[future]] = future.result()
+                report_progress(0.3 * done / session.clips, "上传音频")
+
+    def _commit_upload(self, session: _BcutSession) -> None:
         """提交上传数据"""
         data = json.dumps({
-            "InBossKey": self.__in_boss_key,
-            "ResourceId": self.__resource_id,
-            "Etags": ",".join(self.__etags),
-            "UploadId": self.__upload_id,
+            "InBossKey": session.in_boss_key,
+            "ResourceId": session.resource_id,
+            "Etags": ",".join(session.etags),
+            "UploadId": session.upload_id,
             "model_id": "8",
         })
-        resp = self.session.post(
+        resp = session.http.post(
             API_COMMIT_UPLOAD,
             data=data,
             headers=self.headers
         )
         resp.raise_for_status()
         resp = resp.json()
-        print('Bili',resp)
         if resp.get("code") != 0:
             error_msg = f"上传提交失败: {resp.get('message', '未知错误')}"
             logger.error(error_msg)
             raise Exception(error_msg)
             
-        self.__download_url = resp["data"]["download_url"]
-        logger.info(f"提交成功，下载链接: {self.__download_url}")
+        session.download_url = resp["data"]["download_url"]
+        logger.info(f"提交成功，下载链接: {session.download_url}")
 
-    def _create_task(self) -> str:
+    def _create_task(self, session: _BcutSession) -> str:
         """开始创建转换任务"""
-        resp = self.session.post(
-            API_CREATE_TASK, json={"resource": self.__download_url, "model_id": "8"}, headers=self.headers
+        resp = session.http.post(
+            API_CREATE_TASK, json={"resource": session.download_url, "model_id": "8"}, headers=self.headers
         )
         resp.raise_for_status()
         resp = resp.json()
@@ -146,15 +198,15 @@ class BcutTranscriber(Transcriber):
             logger.error(error_msg)
             raise Exception(error_msg)
             
-        self.task_id = resp["data"]["task_id"]
-        logger.info(f"任务已创建: {self.task_id}")
-        return self.task_id
-
-    def _query_result(self) -> dict:
-        """查询转换结果"""
-        resp = self.session.get(
-            API_QUERY_RESULT, 
-            params={"model_id": 7, "task_id": self.task_id}, 
+        session.task_id = resp["data"]["task_id"]
+        logger.info(f"任务已创建: {session.task_id}")
+        return session.task_id
+
+    async def _aquery_result(self, task_id: str) -> dict:
+        """查询转换结果（共享连接池，不占用工作线程）"""
+        resp = await get_async_client().get(
+            API_QUERY_RESULT,
+            params={"model_id": 7, "task_id": task_id},
             headers=self.headers
         )
         resp.raise_for_status()
@@ -163,85 +215,114 @@ class BcutTranscriber(Transcriber):
             error_msg = f"查询结果失败: {resp.get('message', '未知错误')}"
             logger.error(error_msg)
             raise Exception(error_msg)
-            
+
         return resp["data"]
 
-    @timeit
-    def transcript(self, file_path: str) -> TranscriptResult:
-        """执行识别过程，符合 Transcriber 接口"""
+    @staticmethod
+    def _probe_duration(file_path: str) -> Optional[float]:
+        try:
+            return float(ffprobe_media(file_path)["format"]["duration"])
+        except Exception:
+            return None
+
+    async def _await_result(self, task_id: str, duration: Optional[float]) -> dict:
+        """
+        自适应轮询：按音频时长预估完成时间，先等待预估时长的一部分再开始查询，
+        之后按指数退避（带抖动）拉长间隔。等待期间只占用事件循环，不阻塞线程。
+
+        :param task_id: 任务 id
+        :param duration: 音频时长（秒），未知时从最小间隔开始轮询
+        """
+        expected = (duration or 0) * BCUT_REALTIME_FACTOR
+        started = time.monotonic()
+        deadline = started + max(BCUT_POLL_TIMEOUT, expected * 10)
+        # 首次等待预估时长的一半，之后从最小间隔开始退避
+        wait = max(BCUT_POLL_MIN_INTERVAL, expected * 0.5)
+        delay = BCUT_POLL_MIN_INTERVAL
+        attempt = 0
+        while True:
+            await asyncio.sleep(wait * random.uniform(0.8, 1.2))
+            attempt += 1
+            task_resp = await self._aquery_result(task_id)
+            if task_resp["state"] == 4:  # 完成状态
+                logger.info(f"转录完成，共查询 {attempt} 次")
+                return task_resp
+            if task_resp["state"] == 3:  # 失败状态
+                error_msg = f"B站ASR任务失败，状态码: {task_resp['state']}"
+                logger.error(error_msg)
+                raise Exception(error_msg)
+            if time.monotonic() > deadline:
+                error_msg = f"B站ASR任务未能完成，状态: {task_resp.get('state')}"
+                logger.error(error_msg)
+                raise Exception(error_msg)
+            if expected:
+                # 接口不返回进度，按预估耗时推算，最多到 95%
+                report_progress(0.3 + 0.65 * min(1.0, (time.monotonic() - started) / expected), "等待识别结果")
+            if attempt % 5 == 0:
+                logger.info(f"转录进行中... 已查询 {attempt} 次，状态 {task_resp['state']}")
+            wait, delay = delay, min(BCUT_POLL_MAX_INTERVAL, delay * 1.5)
+
+    @staticmethod
+    def _parse_result(task_resp: dict) -> TranscriptResult:
+        result_json = json.loads(task_resp["result"])
+
+        # 提取分段数据
+        segments = []
+
+        for u in result_json.get("utterances", []):
+            text = u.get("transcript", "").strip()
+            # B站ASR返回的时间戳是毫秒，需要转换为秒
+            start_time = float(u.get("start_time", 0)) / 1000.0
+            end_time = float(u.get("end_time", 0)) / 1000.0
+
+            segments.append(TranscriptSegment(
+                start=start_time,
+                end=end_time,
+                text=text
+            ))
+
+        return TranscriptResult(
+            language=result_json.get("language", "zh"),
+            segments=segments,
+            raw=result_json
+        )
+
+    async def atranscript(self, file_path: str) -> TranscriptResult:
+        """
+        异步识别：上传与创建任务放到线程中执行，轮询在事件循环中等待，
+        大量远程任务同时进行时只需少量线程
+        """
+        session = _BcutSession()
         try:
             logger.info(f"开始处理文件: {file_path}")
-            
+
             # 上传文件
             logger.info("正在上传文件...")
-            self._upload(file_path)
-            
+            await asyncio.to_thread(self._upload, session, file_path)
+
             # 创建任务
             logger.info("提交转录任务...")
-            self._create_task()
-            
+            task_id = await asyncio.to_thread(self._create_task, session)
+
             # 轮询检查任务状态
-            logger.info("等待转录结果...")
-            task_resp = None
-            max_retries = 500
-            for i in range(max_retries):
-                task_resp = self._query_result()
-                
-                if task_resp["state"] == 4:  # 完成状态
-                    break
-                elif task_resp["state"] == 3:  # 失败状态
-                    error_msg = f"B站ASR任务失败，状态码: {task_resp['state']}"
-                    logger.error(error_msg)
-                    raise Exception(error_msg)
-                    
-                # 每隔一段时间打印进度
-                if i % 10 == 0:
-                    logger.info(f"转录进行中... {i}/{max_retries}")
-                    
-                time.sleep(1)
-                
-            if not task_resp or task_resp["state"] != 4:
-                error_msg = f"B站ASR任务未能完成，状态: {task_resp.get('state') if task_resp else 'Unknown'}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
-                
+            duration = await asyncio.to_thread(self._probe_duration, file_path)
+            logger.info(f"等待转录结果（音频时长 {duration or 0:.0f}s）...")
+            task_resp = await self._await_result(task_id, duration)
+
             # 解析结果
             logger.info("转录成功，处理结果...")
-            result_json = json.loads(task_resp["result"])
-            
-            # 提取分段数据
-            segments = []
-            full_text = ""
-            
-            for u in result_json.get("utterances", []):
-                text = u.get("transcript", "").strip()
-                # B站ASR返回的时间戳是毫秒，需要转换为秒
-                start_time = float(u.get("start_time", 0)) / 1000.0
-                end_time = float(u.get("end_time", 0)) / 1000.0
-                
-                full_text += text + " "
-                segments.append(TranscriptSegment(
-                    start=start_time,
-                    end=end_time,
-                    text=text
-                ))
-            
-            # 创建结果对象
-            result = TranscriptResult(
-                language=result_json.get("language", "zh"),
-                full_text=full_text.strip(),
-                segments=segments,
-                raw=result_json
-            )
-            
-            # 触发完成事件
-            # self.on_finish(file_path, result)
-            
-            return result
-            
+            return self._parse_result(task_resp)
+
         except Exception as e:
             logger.error(f"B站ASR处理失败: {str(e)}")
             raise
+        finally:
+            session.http.close()
+
+    @timeit
+    def transcript(self, file_path: str) -> TranscriptResult:
+        """执行识别过程，符合 Transcriber 接口"""
+        return run_sync(self.atranscript(file_path))
 
     def on_finish(self, video_path: str, result: TranscriptResult) -> None:
         """转录完成的回调"""
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+
+from app.models.transcriber_model import TranscriptResult
+from app.transcriber.base import Transcriber
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 各转写器同时进行的转写数上限。本地模型受 CPU/GPU 限制，云端接口受限流约束；
+# 可通过 <TYPE>_MAX_CONCURRENCY（如 FAST_WHISPER_MAX_CONCURRENCY）或 TRANSCRIBER_MAX_CONCURRENCY 覆盖
+DEFAULT_CONCURRENCY = {
+    # 与 WhisperModel 的 num_workers 保持一致
+    "fast-whisper": int(os.getenv("WHISPER_NUM_WORKERS", "1")),
+    "mlx-whisper": 1,
+    "bcut": 4,
+    "kuaishou": 4,
+    "groq": 2,
+}
+
+
+# 按转写器类型登记的限流实例（同一类型可能有多个，如不同尺寸的 whisper 模型），供路由读取负载
+_instances: Dict[str, "weakref.WeakSet[ConcurrencyLimitedTranscriber]"] = {}
+_instances_lock = threading.Lock()
+
+
+def get_load(transcriber_type: str) -> Tuple[int, int]:
+    """
+    当前负载
+
+    :param transcriber_type: 转写器类型，如 fast-whisper / bcut
+    :return: (进行中 + 排队中的任务数, 并发上限)；尚未创建过该类型时按空闲计
+    """
+    with _instances_lock:
+        instances = list(_instances.get(transcriber_type, ()))
+    if not instances:
+        return 0, get_concurrency_limit(transcriber_type)
+    busy = sum(t.in_flight + t.waiting for t in instances)
+    return busy, max(t.limit for t in instances)
+
+
+def get_concurrency_limit(transcriber_type: str) -> int:
+    env_key = transcriber_type.upper().replace("-", "_") + "_MAX_CONCURRENCY"
+    value = os.getenv(env_key) or os.getenv("TRANSCRIBER_MAX_CONCURRENCY")
+    if value:
+        return max(1, int(value))
+    return DEFAULT_CONCURRENCY.get(transcriber_type, 1)
+
+
+class FairSlots:
+    """
+    同步线程与异步协程共用的并发槽位，按先来先到分配。
+    释放时直接把槽位交给队首等待者：线程通过 Event 唤醒，协程通过所属事件循环的 Future 唤醒，无需轮询
+    """
+
+    def __init__(self, limit: int):
+        self._free = limit
+        self._waiters: Deque[Union[threading.Event, Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    # 尚未轮到，直接出队
+                    self._waiters.remove(waiter)
+                    raise
+            if future.done() and not future.cancelled():
+                # 槽位已交到手上但任务被取消，归还
+                self.release()
+            # 否则 _wake 会发现 Future 已取消并归还槽位
+            raise
+
+    def _wake(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._free += 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+            return
+        loop, future = waiter
+        try:
+            loop.call_soon_threadsafe(self._wake, future)
+        except RuntimeError:
+            # 等待者所在的事件循环已关闭，交给下一位
+            self.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class ConcurrencyLimitedTranscriber(Transcriber):
+    """
+    为单个转写器（单个模型）限制并发：超过上限的任务排队等待，避免多个任务同时推理导致 CPU/GPU 超额订阅。
+    其它属性透传给内部转写器。
+    """
+
+    def __init__(self, inner: Transcriber, limit: int, name: str, transcriber_type: Optional[str] = None):
+        """
+        :param transcriber_type: 转写器类型，用于按类型汇总负载，默认同 name
+        """
+        self.inner = inner
+        self.limit = limit
+        self.name = name
+        self.in_flight = 0
+        self.waiting = 0
+        self._slots = FairSlots(limit)
+        self._counter_lock = threading.Lock()
+        with _instances_lock:
+            _instances.setdefault(transcriber_type or name, weakref.WeakSet()).add(self)
+
+    def _count(self, waiting: int = 0, in_flight: int = 0) -> None:
+        with self._counter_lock:
+            self.waiting += waiting
+            self.in_flight += in_flight
+
+    def _log_wait(self, waited_at: float) -> None:
+        waited = time.monotonic() - waited_at
+        if waited > 1:
+            logger.info(f"[{self.name}] 排队 {waited:.1f}s 后开始转写（并发上限 {self.limit}）")
+
+    def transcript(self, file_path: str, **kwargs) -> TranscriptResult:
+        waited_at = time.monotonic()
+        self._count(waiting=1)
+        with self._slots:
+            self._count(waiting=-1, in_flight=1)
+            try:
+                self._log_wait(waited_at)
+                return self.inner.transcript(file_path=file_path, **kwargs)
+            finally:
+                self._count(in_flight=-1)
+
+    async def atranscript(self, file_path: str, **kwargs) -> TranscriptResult:
+        # 与同步调用共用同一组槽位，按先来先到排队；等待期间不占用线程
+        waited_at = time.monotonic()
+        self._count(waiting=1)
+        try:
+            await self._slots.aacquire()
+        finally:
+            self._count(waiting=-1)
+        self._count(in_flight=1)
+        try:
+            self._log_wait(waited_at)
+            return await self.inner.atranscript(file_path, **kwargs)
+        finally:
+            self._count(in_flight=-1)
+            self._slots.release()
+
+    def on_finish(self, video_path: str, result: TranscriptResult) -> None:
+        return self.inner.on_finish(video_path, result)
+
+    def __getattr__(self, item):
+        return getattr(self.inner, item)
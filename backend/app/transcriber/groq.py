@@ -1,68 +1,158 @@
+import asyncio
 from abc import ABC
+from typing import List, Tuple
 import os
+import shutil
+import subprocess
 
 from app.decorators.timeit import timeit
 from app.models.transcriber_model import TranscriptResult, TranscriptSegment
 from app.services.provider import ProviderService
 from app.transcriber.base import Transcriber
-from openai import OpenAI
-import ffmpeg
+from app.transcriber.job import report_progress
+from app.utils.async_runner import run_sync
+from app.utils.logger import get_logger
+from app.utils.vad import find_silence_points
 import tempfile
 from dotenv import load_dotenv
 load_dotenv()
+logger = get_logger(__name__)
+
 MAX_SIZE_MB = 18
 MAX_SIZE_BYTES = MAX_SIZE_MB * 1024 * 1024
-def compress_audio(input_path: str, target_bitrate='64k') -> str:
-    output_fd, output_path = tempfile.mkstemp(suffix=".mp3")  # 临时输出文件
-    os.close(output_fd)  # 关闭文件描述符，ffmpeg 会用路径操作
-    ffmpeg.input(input_path).output(output_path, audio_bitrate=target_bitrate).run(quiet=True, overwrite_output=True)
-    return output_path
+# 分块并发数与单块请求的重试次数（429 限流时 openai 客户端会按 Retry-After 退避重试）
+GROQ_CHUNK_CONCURRENCY = int(os.getenv("GROQ_CHUNK_CONCURRENCY", "3"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "5"))
 
-class GroqTranscriber(Transcriber, ABC):
+Chunk = Tuple[float, float]
 
 
-    @timeit
-    def transcript(self, file_path: str) -> TranscriptResult:
-        file_size = os.path.getsize(file_path)
-        if file_size > MAX_SIZE_BYTES:
-            print(f"文件超过 {MAX_SIZE_MB}MB，开始压缩（当前 {round(file_size / (1024 * 1024), 2)}MB）...")
-            file_path = compress_audio(file_path)
-            print(f"压缩完成，临时路径：{file_path}")
-        provider = ProviderService.get_provider_by_id('groq')
+def plan_chunks(duration: float, file_size: int, silence_points: List[float]) -> List[Chunk]:
+    """
+    按体积上限规划分块：每块时长不超过上限对应的时长，尽量在静音处切分，
+    找不到合适的静音时才在上限处硬切
+
+    :param duration: 音频总时长（秒）
+    :param file_size: 文件大小（字节）
+    :param silence_points: 可切分的静音位置
+    :return: [(开始秒, 结束秒)]
+    """
+    # 留 10% 余量，码率不均匀时单块也不会超限
+    max_chunk = duration * MAX_SIZE_BYTES / file_size * 0.9
+    chunks: List[Chunk] = []
+    start = 0.0
+    while duration - start > max_chunk:
+        limit = start + max_chunk
+        # 只在后半段找切分点，避免切出很短的块
+        candidates = [p for p in silence_points if start + max_chunk / 2 <= p <= limit]
+        end = candidates[-1] if candidates else limit
+        chunks.append((start, end))
+        start = end
+    chunks.append((start, duration))
+    return chunks
+
+
+def cut_chunk(input_path: str, start: float, end: float, output_dir: str, index: int) -> str:
+    """
+    无损截取一段音频（流复制，不重新编码）
+    """
+    ext = os.path.splitext(input_path)[1] or ".mp3"
+    output_path = os.path.join(output_dir, f"chunk_{index:03d}{ext}")
+    command = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-ss", str(start), "-to", str(end), "-i", input_path,
+        "-c", "copy", output_path,
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg 切分音频失败：{result.stderr.strip()}")
+    return output_path
+
 
+class GroqTranscriber(Transcriber, ABC):
 
+    @staticmethod
+    def _get_client():
+        provider = ProviderService.get_provider_by_id('groq')
         if not provider:
             raise Exception("Groq 供应商未配置,请配置以后使用。")
-        client = OpenAI(
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(
             api_key=provider.get('api_key'),
-            base_url=provider.get('base_url')
+            base_url=provider.get('base_url'),
+            max_retries=GROQ_MAX_RETRIES,
         )
-        filename = file_path
 
-        with open(filename, "rb") as file:
-            transcription = client.audio.transcriptions.create(
-                file=(filename, file.read()),
+    @staticmethod
+    async def _transcribe_file(client, file_path: str):
+        # 直接传文件对象，由 httpx 流式上传，不把整个文件读入内存
+        with open(file_path, "rb") as file:
+            return await client.audio.transcriptions.create(
+                file=(os.path.basename(file_path), file),
                 model=os.getenv('GROQ_TRANSCRIBER_MODEL'),
                 response_format="verbose_json",
             )
-            print(transcription.text)
-        print(transcription)
+
+    async def _transcribe_chunks(self, client, file_path: str, file_size: int) -> List[Tuple[float, object]]:
+        silence_points, duration = await asyncio.to_thread(find_silence_points, file_path)
+        if not duration:
+            raise RuntimeError(f"无法读取音频时长：{file_path}")
+        chunks = plan_chunks(duration, file_size, silence_points)
+        logger.info(f"文件超过 {MAX_SIZE_MB}MB（{file_size / 1024 / 1024:.1f}MB），按静音切分为 {len(chunks)} 块并发转写")
+
+        work_dir = tempfile.mkdtemp(prefix="groq_chunks_")
+        semaphore = asyncio.Semaphore(max(1, GROQ_CHUNK_CONCURRENCY))
+        finished = 0
+
+        async def run(index: int, chunk: Chunk):
+            nonlocal finished
+            async with semaphore:
+                chunk_path = await asyncio.to_thread(cut_chunk, file_path, chunk[0], chunk[1], work_dir, index)
+                transcription = await self._transcribe_file(client, chunk_path)
+            finished += 1
+            report_progress(finished / len(chunks), "分块转写")
+            logger.info(f"分块 {index + 1}/{len(chunks)} 转写完成（{chunk[0]:.0f}s-{chunk[1]:.0f}s）")
+            return chunk[0], transcription
+
+        try:
+            # gather 按分块顺序返回结果
+            return list(await asyncio.gather(*(run(i, chunk) for i, chunk in enumerate(chunks))))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    async def atranscript(self, file_path: str) -> TranscriptResult:
+        """
+        异步转写：上传与等待响应都在事件循环中进行，只有 ffmpeg 切分放到线程中，
+        多个任务、多个分块同时进行时不占用线程
+        """
+        file_size = os.path.getsize(file_path)
+        async with self._get_client() as client:
+            if file_size > MAX_SIZE_BYTES:
+                parts = await self._transcribe_chunks(client, file_path, file_size)
+            else:
+                parts = [(0.0, await self._transcribe_file(client, file_path))]
+
         segments = []
-        full_text = ""
 
-        for seg in transcription.segments:
-            text = seg.text.strip()
-            full_text += text + " "
-            segments.append(TranscriptSegment(
-                start=seg.start,
-                end=seg.end,
-                text=text
-            ))
+        # 各块的时间戳加上块的起始偏移，拼回原音频时间轴
+        for offset, transcription in parts:
+            for seg in transcription.segments or []:
+                text = seg.text.strip()
+                segments.append(TranscriptSegment(
+                    start=round(seg.start + offset, 3),
+                    end=round(seg.end + offset, 3),
+                    text=text
+                ))
 
         result = TranscriptResult(
-            language=transcription.language,
-            full_text=full_text.strip(),
+            language=parts[0][1].language,
             segments=segments,
-            raw=transcription.to_dict()
+            raw=parts[0][1].to_dict() if len(parts) == 1 else {
+                "chunks": [{"offset": offset, **transcription.to_dict()} for offset, transcription in parts]
+            }
         )
         return result
+
+    @timeit
+    def transcript(self, file_path: str) -> TranscriptResult:
+        return run_sync(self.atranscript(file_path))
@@ -0,0 +1,113 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import uuid
+from typing import Awaitable, Callable, List, Optional
+
+from app.models.transcriber_model import TranscriptResult
+from app.utils.async_runner import submit
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 进度回调：(进度 0~1, 可选说明)
+ProgressCallback = Callable[[float, Optional[str]], None]
+
+_current_job: contextvars.ContextVar[Optional["TranscriptionJob"]] = contextvars.ContextVar(
+    "current_transcription_job", default=None
+)
+
+
+def current_job() -> Optional["TranscriptionJob"]:
+    """
+    当前正在执行的转写任务。asyncio.to_thread 会复制上下文，因此在转写器的同步代码中同样可用；
+    自建线程池时需在提交前取出
+    """
+    return _current_job.get()
+
+
+def report_progress(progress: float, message: Optional[str] = None) -> None:
+    """
+    转写器内部上报进度，不在任务中执行（如直接调用 transcript）时忽略
+    """
+    job = _current_job.get()
+    if job is not None:
+        job.report(progress, message)
+
+
+class TranscriptionJob:
+    """
+    通过 Transcriber.submit 提交的转写任务句柄。
+
+    任务在后台事件循环中执行：异步代码 `await job`（或 `await job.result()`），
+    同步代码 `job.wait()`；进度通过回调推送，同时可随时读取 progress / status。
+    """
+
+    # 进度变化小于该值时不触发回调，避免逐段上报时频繁回调
+    MIN_PROGRESS_STEP = 0.01
+
+    def __init__(self, file_path: str, on_progress: Optional[ProgressCallback] = None):
+        self.job_id = uuid.uuid4().hex
+        self.file_path = file_path
+        self.progress = 0.0
+        self.message: Optional[str] = None
+        self._reported = -1.0
+        self._callbacks: List[ProgressCallback] = [on_progress] if on_progress else []
+        self._future: Optional[concurrent.futures.Future] = None
+
+    def start(self, coro: Awaitable[TranscriptResult]) -> "TranscriptionJob":
+        self._future = submit(self._run(coro))
+        return self
+
+    async def _run(self, coro: Awaitable[TranscriptResult]) -> TranscriptResult:
+        _current_job.set(self)
+        result = await coro
+        self.report(1.0)
+        return result
+
+    def add_progress_callback(self, callback: ProgressCallback) -> None:
+        self._callbacks.append(callback)
+
+    def report(self, progress: float, message: Optional[str] = None) -> None:
+        progress = min(1.0, max(self.progress, progress))
+        changed = message is not None and message != self.message
+        self.progress = progress
+        if message is not None:
+            self.message = message
+        finished = progress >= 1.0 > self._reported
+        if not changed and not finished and progress - self._reported < self.MIN_PROGRESS_STEP:
+            return
+        self._reported = progress
+        for callback in self._callbacks:
+            try:
+                callback(progress, self.message)
+            except Exception as e:
+                logger.warning(f"转写进度回调失败：{e}")
+
+    @property
+    def status(self) -> str:
+        if self._future is None:
+            return "pending"
+        if not self._future.done():
+            return "running"
+        if self._future.cancelled():
+            return "cancelled"
+        return "failed" if self._future.exception() is not None else "done"
+
+    def done(self) -> bool:
+        return self._future is not None and self._future.done()
+
+    def cancel(self) -> bool:
+        return self._future is not None and self._future.cancel()
+
+    def wait(self, timeout: Optional[float] = None) -> TranscriptResult:
+        """
+        同步等待结果（兼容原有的阻塞调用方式），不能在后台事件循环线程中调用
+        """
+        return self._future.result(timeout)
+
+    async def result(self) -> TranscriptResult:
+        return await asyncio.wrap_future(self._future)
+
+    def __await__(self):
+        return self.result().__await__()
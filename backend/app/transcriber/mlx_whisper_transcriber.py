@@ -56,11 +56,9 @@ class MLXWhisperTranscriber(Transcriber):
             
             # 转换为标准格式
             segments = []
-            full_text = ""
             
             for segment in result["segments"]:
                 text = segment["text"].strip()
-                full_text += text + " "
                 segments.append(TranscriptSegment(
                     start=segment["start"],
                     end=segment["end"],
@@ -69,7 +67,6 @@ class MLXWhisperTranscriber(Transcriber):
             
             transcript_result = TranscriptResult(
                 language=result.get("language", "unknown"),
-                full_text=full_text.strip(),
                 segments=segments,
                 raw=result
             )
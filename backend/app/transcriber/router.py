@@ -0,0 +1,196 @@
+import datetime
+import importlib.util
+import os
+import threading
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from app.transcriber.concurrency import get_load
+from app.utils.logger import get_logger
+from app.utils.media_probe import TRANSCRIBE_REALTIME_FACTOR
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 开启后按任务选择转写器，否则整个进程固定使用 TRANSCRIBER_TYPE
+TRANSCRIBER_ROUTING = os.getenv("TRANSCRIBER_ROUTING", "false").lower() == "true"
+# 参与路由的转写器，顺序即估算耗时相同时的优先级
+TRANSCRIBER_ROUTING_ENGINES = os.getenv("TRANSCRIBER_ROUTING_ENGINES", "fast-whisper,bcut,groq,kuaishou")
+# 时长未知时按该时长估算（秒）
+ROUTING_DEFAULT_DURATION = float(os.getenv("ROUTING_DEFAULT_DURATION", "600"))
+
+LOCAL_ENGINES = {"fast-whisper", "mlx-whisper"}
+
+# 各转写器支持的语言，None 表示多语种
+ENGINE_LANGUAGES = {
+    "bcut": {"zh", "en"},
+    "kuaishou": {"zh"},
+}
+
+# 远程接口的固定开销（上传、排队等，秒）
+ENGINE_OVERHEAD_SECONDS = {
+    "bcut": 10,
+    "kuaishou": 5,
+    "groq": 3,
+}
+
+# 远程接口每日可用的音频时长（秒），0 表示不限制；可通过 <TYPE>_DAILY_QUOTA_SECONDS 覆盖
+# Groq 免费额度为每天 8 小时音频
+DEFAULT_DAILY_QUOTA_SECONDS = {
+    "groq": 28800,
+}
+
+# 国内平台默认按中文处理，其它平台语言未知
+PLATFORM_LANGUAGES = {
+    "bilibili": "zh",
+    "douyin": "zh",
+    "kuaishou": "zh",
+    "xiaoyuzhoufm": "zh",
+}
+
+
+def _realtime_factors() -> Dict[str, float]:
+    """
+    实时率默认取 media_probe 中的估算值，可通过 ROUTING_REALTIME_FACTORS 覆盖，
+    如 "fast-whisper=0.05,groq=0.03"（GPU 上的本地模型远快于默认值）
+    """
+    factors = dict(TRANSCRIBE_REALTIME_FACTOR)
+    for item in os.getenv("ROUTING_REALTIME_FACTORS", "").split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            factors[key.strip()] = float(value)
+    return factors
+
+
+class DailyQuota:
+    """
+    远程接口的每日音频时长额度（进程内计数，按本地日期重置）
+    """
+
+    def __init__(self):
+        self._used: Dict[str, float] = {}
+        self._day = datetime.date.today()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def limit(engine: str) -> float:
+        env_key = engine.upper().replace("-", "_") + "_DAILY_QUOTA_SECONDS"
+        value = os.getenv(env_key)
+        return float(value) if value else DEFAULT_DAILY_QUOTA_SECONDS.get(engine, 0)
+
+    def _reset_if_new_day(self) -> None:
+        today = datetime.date.today()
+        if today != self._day:
+            self._day = today
+            self._used.clear()
+
+    def remaining(self, engine: str) -> Optional[float]:
+        """
+        :return: 剩余秒数，不限制时为 None
+        """
+        limit = self.limit(engine)
+        if not limit:
+            return None
+        with self._lock:
+            self._reset_if_new_day()
+            return max(0.0, limit - self._used.get(engine, 0.0))
+
+    def consume(self, engine: str, seconds: float) -> None:
+        with self._lock:
+            self._reset_if_new_day()
+            self._used[engine] = self._used.get(engine, 0.0) + seconds
+
+
+class TranscriberRouter:
+    """
+    按任务选择转写器：在可用的转写器中估算「排队等待 + 转写耗时 + 固定开销」，取最快的一个。
+
+    - 时长：短音频的固定开销占比高，通常本地模型更快；长音频远程接口的实时率优势更明显
+    - 语言：过滤不支持该语言的接口（如快手只支持中文）
+    - 负载：本地模型排满时等待时间按队列长度估算，超出后自然溢出到远程接口
+    - 额度：远程接口剩余的每日额度不足以处理本音频时跳过
+    """
+
+    def __init__(self, engines: Optional[List[str]] = None, quota: Optional[DailyQuota] = None):
+        self.engines = engines or [e.strip() for e in TRANSCRIBER_ROUTING_ENGINES.split(",") if e.strip()]
+        self.quota = quota or DailyQuota()
+
+    @staticmethod
+    def is_available(engine: str) -> bool:
+        if engine == "fast-whisper":
+            return importlib.util.find_spec("faster_whisper") is not None
+        if engine == "mlx-whisper":
+            from app.transcriber.transcriber_provider import is_mlx_whisper_available
+            return is_mlx_whisper_available()
+        if engine == "groq":
+            from app.services.provider import ProviderService
+            provider = ProviderService.get_provider_by_id("groq")
+            return bool(provider and provider.get("api_key"))
+        return engine in ("bcut", "kuaishou")
+
+    def estimate_seconds(self, engine: str, duration: float, factors: Dict[str, float]) -> float:
+        transcribe = duration * factors.get(engine, 0.3)
+        busy, limit = get_load(engine)
+        # 空闲槽位不足时，假设前面排队的任务与本任务时长相近
+        queued_rounds = max(0, busy - limit + 1) / limit
+        return transcribe * (1 + queued_rounds) + ENGINE_OVERHEAD_SECONDS.get(engine, 0)
+
+    def choose(self, duration: Optional[float], language: Optional[str] = None,
+               default: str = "fast-whisper") -> str:
+        """
+        :param duration: 音频时长（秒），未知时为 None 或 0
+        :param language: 语言代码（如 zh / en），未知时为 None，只考虑多语种转写器
+        :param default: 没有任何可用转写器时的回退
+        :return: 转写器类型
+        """
+        duration = duration or ROUTING_DEFAULT_DURATION
+        factors = _realtime_factors()
+        estimates = {}
+        for engine in self.engines:
+            languages = ENGINE_LANGUAGES.get(engine)
+            if languages is not None and language not in languages:
+                continue
+            remaining = self.quota.remaining(engine)
+            if remaining is not None and remaining < duration:
+                continue
+            try:
+                if not self.is_available(engine):
+                    continue
+            except Exception as e:
+                logger.warning(f"检查转写器 {engine} 可用性失败：{e}")
+                continue
+            estimates[engine] = self.estimate_seconds(engine, duration, factors)
+
+        if not estimates:
+            logger.warning(f"没有可用的转写器（语言 {language}，时长 {duration:.0f}s），使用 {default}")
+            return default
+
+        # min 遇到相同值时保留先出现的，即 TRANSCRIBER_ROUTING_ENGINES 中靠前的
+        engine = min(estimates, key=estimates.get)
+        logger.info(
+            f"转写路由：{engine}（时长 {duration:.0f}s，语言 {language or '未知'}，预估 "
+            + "，".join(f"{k} {v:.0f}s" for k, v in estimates.items()) + "）"
+        )
+        return engine
+
+    def record_usage(self, engine: str, duration: Optional[float]) -> None:
+        """
+        转写成功后计入远程接口的每日额度；选择时不扣除，失败或命中缓存的任务不占用额度
+
+        :param duration: 实际转写的音频时长（秒）
+        """
+        if engine not in LOCAL_ENGINES and duration:
+            self.quota.consume(engine, duration)
+
+
+transcriber_router = TranscriberRouter()
+
+
+def guess_language(platform: Optional[str], whisper_options: Optional[dict] = None) -> Optional[str]:
+    """
+    推断音频语言：请求中显式指定的 language 优先，其次按平台推断
+    """
+    if whisper_options and whisper_options.get("language"):
+        return whisper_options["language"]
+    return PLATFORM_LANGUAGES.get(platform or "")
@@ -0,0 +1,50 @@
+import os
+from typing import Iterable, List, Optional
+
+from app.models.transcriber_model import TranscriptResult, TranscriptSegment
+from app.transcriber.base import Transcriber
+from app.utils.audio_stream import AudioChunk
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def transcribe_chunks(transcriber: Transcriber, chunks: Iterable[AudioChunk]) -> TranscriptResult:
+    """
+    逐个转写流式产生的音频分片，并把分片内时间戳平移回原音频时间轴。
+
+    chunks 通常来自 StreamingAudioSegmenter.iter_chunks()：转写当前分片时，
+    ffmpeg 仍在后台继续下载下一个分片，因此总耗时接近 max(下载, 转写)。
+
+    :param transcriber: 任意 Transcriber 实现
+    :param chunks: 按时间顺序排列的音频分片
+    :return: 合并后的 TranscriptResult
+    """
+    segments: List[TranscriptSegment] = []
+    language: Optional[str] = None
+
+    for chunk in chunks:
+        logger.info(f"转写分片 {chunk.index}: {chunk.start:.1f}s - {chunk.end:.1f}s")
+        result = transcriber.transcript(file_path=chunk.file_path)
+        if result is None:
+            raise RuntimeError(f"分片 {chunk.index} 转写失败")
+
+        language = language or result.language
+        for seg in result.segments:
+            segments.append(TranscriptSegment(
+                start=seg.start + chunk.start,
+                end=seg.end + chunk.start,
+                text=seg.text,
+            ))
+
+        # 分片转写完即删除，磁盘占用与分片数量无关
+        try:
+            os.remove(chunk.file_path)
+        except OSError:
+            pass
+
+    return TranscriptResult(
+        language=language,
+        segments=segments,
+        raw=None,
+    )
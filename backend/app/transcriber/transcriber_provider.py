@@ -1,11 +1,11 @@
+import importlib
 import os
 import platform
+import threading
 from enum import Enum
 
-from app.transcriber.groq import GroqTranscriber
-from app.transcriber.whisper import WhisperTranscriber
-from app.transcriber.bcut import BcutTranscriber
-from app.transcriber.kuaishou import KuaishouTranscriber
+from app.transcriber.concurrency import ConcurrencyLimitedTranscriber, get_concurrency_limit
+from app.transcriber.vad_transcriber import VAD_PRETRIM, VadTrimTranscriber
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -17,15 +17,37 @@ class TranscriberType(str, Enum):
     KUAISHOU = "kuaishou"
     GROQ = "groq"
 
-# 仅在 Apple 平台启用 MLX Whisper
-MLX_WHISPER_AVAILABLE = False
-if platform.system() == "Darwin" and os.environ.get("TRANSCRIBER_TYPE") == "mlx-whisper":
-    try:
-        from app.transcriber.mlx_whisper_transcriber import MLXWhisperTranscriber
-        MLX_WHISPER_AVAILABLE = True
-        logger.info("MLX Whisper 可用，已导入")
-    except ImportError:
-        logger.warning("MLX Whisper 导入失败，可能未安装或平台不支持")
+# 转写器实现按需导入：只有真正用到某种转写器时才加载对应模块（及 faster_whisper / openai 等重依赖）
+_TRANSCRIBER_CLASSES = {
+    TranscriberType.FAST_WHISPER: "app.transcriber.whisper:WhisperTranscriber",
+    TranscriberType.MLX_WHISPER: "app.transcriber.mlx_whisper_transcriber:MLXWhisperTranscriber",
+    TranscriberType.BCUT: "app.transcriber.bcut:BcutTranscriber",
+    TranscriberType.KUAISHOU: "app.transcriber.kuaishou:KuaishouTranscriber",
+    TranscriberType.GROQ: "app.transcriber.groq:GroqTranscriber",
+}
+
+
+def _load_class(key: TranscriberType):
+    module_path, class_name = _TRANSCRIBER_CLASSES[key].split(":")
+    return getattr(importlib.import_module(module_path), class_name)
+
+
+# 仅在 Apple 平台启用 MLX Whisper（首次使用时检测）
+_mlx_whisper_available = None
+
+
+def is_mlx_whisper_available() -> bool:
+    global _mlx_whisper_available
+    if _mlx_whisper_available is None:
+        _mlx_whisper_available = False
+        if platform.system() == "Darwin" and os.environ.get("TRANSCRIBER_TYPE") == "mlx-whisper":
+            try:
+                _load_class(TranscriberType.MLX_WHISPER)
+                _mlx_whisper_available = True
+                logger.info("MLX Whisper 可用，已导入")
+            except ImportError:
+                logger.warning("MLX Whisper 导入失败，可能未安装或平台不支持")
+    return _mlx_whisper_available
 
 logger.info('初始化转录服务提供器')
 
@@ -37,47 +59,73 @@ _transcribers = {
     TranscriberType.KUAISHOU: None,
     TranscriberType.GROQ: None,
 }
+# 多个任务线程可能同时首次获取转写器，创建过程需串行，避免重复加载
+_transcribers_lock = threading.Lock()
 
 # 公共实例初始化函数
-def _init_transcriber(key: TranscriberType, cls, *args, **kwargs):
-    if _transcribers[key] is None:
-        logger.info(f'创建 {cls.__name__} 实例: {key}')
-        try:
-            _transcribers[key] = cls(*args, **kwargs)
-            logger.info(f'{cls.__name__} 创建成功')
-        except Exception as e:
-            logger.error(f"{cls.__name__} 创建失败: {e}")
-            raise
+def _init_transcriber(key: TranscriberType, *args, **kwargs):
+    if _transcribers[key] is not None:
+        return _transcribers[key]
+    with _transcribers_lock:
+        if _transcribers[key] is None:
+            cls = _load_class(key)
+            logger.info(f'创建 {cls.__name__} 实例: {key}')
+            try:
+                _transcribers[key] = ConcurrencyLimitedTranscriber(
+                    cls(*args, **kwargs), get_concurrency_limit(key.value), key.value
+                )
+                logger.info(f'{cls.__name__} 创建成功')
+            except Exception as e:
+                logger.error(f"{cls.__name__} 创建失败: {e}")
+                raise
     return _transcribers[key]
 
 # 各类型获取方法
 def get_groq_transcriber():
-    return _init_transcriber(TranscriberType.GROQ, GroqTranscriber)
+    return _init_transcriber(TranscriberType.GROQ)
+
+def get_whisper_transcriber(model_size="base", device="cuda", whisper_options=None):
+    # 多个尺寸的模型由 WhisperModelManager 统一常驻和淘汰
+    from app.transcriber.whisper import ConfiguredWhisperTranscriber
+    from app.transcriber.whisper_model_manager import whisper_model_manager
 
-def get_whisper_transcriber(model_size="base", device="cuda"):
-    return _init_transcriber(TranscriberType.FAST_WHISPER, WhisperTranscriber, model_size=model_size, device=device)
+    whisper_options = dict(whisper_options or {})
+    transcriber = whisper_model_manager.get(model_size, device, compute_type=whisper_options.pop("compute_type", None))
+    if not any(v is not None for v in whisper_options.values()):
+        return transcriber
+    return ConfiguredWhisperTranscriber(transcriber, transcriber.default_options.merged(whisper_options))
 
 def get_bcut_transcriber():
-    return _init_transcriber(TranscriberType.BCUT, BcutTranscriber)
+    return _init_transcriber(TranscriberType.BCUT)
 
 def get_kuaishou_transcriber():
-    return _init_transcriber(TranscriberType.KUAISHOU, KuaishouTranscriber)
+    return _init_transcriber(TranscriberType.KUAISHOU)
 
 def get_mlx_whisper_transcriber(model_size="base"):
-    if not MLX_WHISPER_AVAILABLE:
+    if not is_mlx_whisper_available():
         logger.warning("MLX Whisper 不可用，请确保在 Apple 平台且已安装 mlx_whisper")
         raise ImportError("MLX Whisper 不可用")
-    return _init_transcriber(TranscriberType.MLX_WHISPER, MLXWhisperTranscriber, model_size=model_size)
+    return _init_transcriber(TranscriberType.MLX_WHISPER, model_size=model_size)
 
 # 通用入口
-def get_transcriber(transcriber_type="fast-whisper", model_size="base", device="cuda"):
+def get_transcriber(transcriber_type="fast-whisper", model_size=None, device="cuda", whisper_options=None):
+    """
+    获取指定类型的转录器实例，参数同 _select_transcriber。
+    开启 VAD_PRETRIM 时外层包一层 VadTrimTranscriber，只把语音部分交给转写器
+    """
+    transcriber = _select_transcriber(transcriber_type, model_size, device, whisper_options)
+    return VadTrimTranscriber(transcriber) if VAD_PRETRIM else transcriber
+
+
+def _select_transcriber(transcriber_type="fast-whisper", model_size=None, device="cuda", whisper_options=None):
     """
     获取指定类型的转录器实例
 
     参数:
         transcriber_type: 支持 "fast-whisper", "mlx-whisper", "bcut", "kuaishou", "groq"
-        model_size: 模型大小，适用于 whisper 类
+        model_size: 模型大小，适用于 whisper 类；为空时使用 WHISPER_MODEL_SIZE（默认 base）
         device: 设备类型（如 cuda / cpu），仅 whisper 使用
+        whisper_options: 单次任务的 faster-whisper 参数（beam_size / vad_filter / batched / batch_size / language / compute_type），仅 fast-whisper 使用
 
     返回:
         对应类型的转录器实例
@@ -90,15 +138,15 @@ def get_transcriber(transcriber_type="fast-whisper", model_size="base", device="
         logger.warning(f'未知转录器类型 "{transcriber_type}"，默认使用 fast-whisper')
         transcriber_enum = TranscriberType.FAST_WHISPER
 
-    whisper_model_size = os.environ.get("WHISPER_MODEL_SIZE", model_size)
+    whisper_model_size = model_size or os.environ.get("WHISPER_MODEL_SIZE", "base")
 
     if transcriber_enum == TranscriberType.FAST_WHISPER:
-        return get_whisper_transcriber(whisper_model_size, device=device)
+        return get_whisper_transcriber(whisper_model_size, device=device, whisper_options=whisper_options)
 
     elif transcriber_enum == TranscriberType.MLX_WHISPER:
-        if not MLX_WHISPER_AVAILABLE:
+        if not is_mlx_whisper_available():
             logger.warning("MLX Whisper 不可用，回退到 fast-whisper")
-            return get_whisper_transcriber(whisper_model_size, device=device)
+            return get_whisper_transcriber(whisper_model_size, device=device, whisper_options=whisper_options)
         return get_mlx_whisper_transcriber(whisper_model_size)
 
     elif transcriber_enum == TranscriberType.BCUT:
@@ -112,4 +160,4 @@ def get_transcriber(transcriber_type="fast-whisper", model_size="base", device="
 
     # fallback
     logger.warning(f'未识别转录器类型 "{transcriber_type}"，使用 fast-whisper 作为默认')
-    return get_whisper_transcriber(whisper_model_size, device=device)
+    return get_whisper_transcriber(whisper_model_size, device=device, whisper_options=whisper_options)
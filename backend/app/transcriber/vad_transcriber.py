@@ -0,0 +1,101 @@
+import asyncio
+import os
+import tempfile
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from app.models.transcriber_model import SegmentStore, TranscriptResult, TranscriptSegment
+from app.transcriber.base import Transcriber
+from app.utils.logger import get_logger
+from app.utils.vad import SpeechRegion, TimelineMap, detect_speech_regions, extract_speech_audio
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 开启后所有转写器都先裁掉静音/音乐段再识别
+VAD_PRETRIM = os.getenv("VAD_PRETRIM", "false").lower() == "true"
+# 可裁掉的比例低于该值时直接转写原音频，省去一次重新编码
+VAD_MIN_TRIM_RATIO = float(os.getenv("VAD_MIN_TRIM_RATIO", "0.1"))
+
+
+class VadTrimTranscriber(Transcriber):
+    """
+    VAD 预处理：只把语音部分交给内部转写器（本地模型少算、云端接口少传），
+    再把分段时间戳映射回原音频时间轴。适用于任意 Transcriber 实现。
+    """
+
+    def __init__(self, inner: Transcriber):
+        self.inner = inner
+
+    @staticmethod
+    def _detect(file_path: str) -> Optional[List[SpeechRegion]]:
+        """
+        返回需要保留的语音区间；检测失败或可裁剪部分太少时返回 None（直接转写原音频）
+        """
+        try:
+            regions, duration = detect_speech_regions(file_path)
+        except Exception as e:
+            logger.warning(f"VAD 检测失败，直接转写原音频：{e}")
+            return None
+
+        speech = sum(end - start for start, end in regions)
+        if not regions or not duration or (duration - speech) / duration < VAD_MIN_TRIM_RATIO:
+            return None
+        logger.info(f"VAD 裁剪：{duration:.0f}s -> {speech:.0f}s（{file_path}）")
+        return regions
+
+    @staticmethod
+    def _trimmed_path(file_path: str) -> str:
+        fd, trimmed_path = tempfile.mkstemp(suffix=".mp3", dir=os.path.dirname(file_path) or None)
+        os.close(fd)
+        return trimmed_path
+
+    @staticmethod
+    def _remap(result: TranscriptResult, regions: List[SpeechRegion]) -> TranscriptResult:
+        if result is None:
+            return result
+        timeline = TimelineMap(regions)
+        result.segments = SegmentStore.from_segments(
+            TranscriptSegment(
+                start=timeline.to_original(seg.start),
+                end=timeline.to_original(seg.end, is_end=True),
+                text=seg.text,
+            )
+            for seg in result.segments
+        )
+        return result
+
+    def transcript(self, file_path: str, **kwargs) -> TranscriptResult:
+        regions = self._detect(file_path)
+        if regions is None:
+            return self.inner.transcript(file_path=file_path, **kwargs)
+
+        trimmed_path = self._trimmed_path(file_path)
+        try:
+            extract_speech_audio(file_path, regions, trimmed_path)
+            result = self.inner.transcript(file_path=trimmed_path, **kwargs)
+        finally:
+            if os.path.exists(trimmed_path):
+                os.remove(trimmed_path)
+        return self._remap(result, regions)
+
+    async def atranscript(self, file_path: str, **kwargs) -> TranscriptResult:
+        regions = await asyncio.to_thread(self._detect, file_path)
+        if regions is None:
+            return await self.inner.atranscript(file_path, **kwargs)
+
+        trimmed_path = self._trimmed_path(file_path)
+        try:
+            await asyncio.to_thread(extract_speech_audio, file_path, regions, trimmed_path)
+            result = await self.inner.atranscript(trimmed_path, **kwargs)
+        finally:
+            if os.path.exists(trimmed_path):
+                os.remove(trimmed_path)
+        return self._remap(result, regions)
+
+    def on_finish(self, video_path: str, result: TranscriptResult) -> None:
+        return self.inner.on_finish(video_path, result)
+
+    def __getattr__(self, item):
+        return getattr(self.inner, item)
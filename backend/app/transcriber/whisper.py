@@ -1,23 +1,26 @@
-from faster_whisper import WhisperModel
-
 from app.decorators.timeit import timeit
 from app.models.transcriber_model import TranscriptSegment, TranscriptResult
 from app.transcriber.base import Transcriber
+from app.transcriber.job import report_progress
 from app.utils.env_checker import is_cuda_available, is_torch_installed
 from app.utils.logger import get_logger
 from app.utils.path_helper import get_model_dir
 
 from events import transcription_finished
+from dataclasses import dataclass, fields, replace
 from pathlib import Path
+from typing import Optional
 import os
+import threading
 from tqdm import tqdm
-from modelscope import snapshot_download
+from dotenv import load_dotenv
 
 
 '''
  Size of the model to use (tiny, tiny.en, base, base.en, small, small.en, distil-small.en, medium, medium.en, distil-medium.en, large-v1, large-v2, large-v3, large, distil-large-v2, distil-large-v3, large-v3-turbo, or turbo
 '''
 logger=get_logger(__name__)
+load_dotenv()
 
 MODEL_MAP={
     "tiny": "pengzhendong/faster-whisper-tiny",
@@ -30,15 +33,50 @@ MODEL_MAP={
     'large-v3-turbo':'pengzhendong/faster-whisper-large-v3-turbo',
 }
 
+# 支持的量化精度，auto 由 CTranslate2 按设备选择
+COMPUTE_TYPES = ("int8", "int8_float16", "float16", "float32", "auto")
+
+
+def _env_bool(key: str, default: str = "false") -> bool:
+    return os.getenv(key, default).lower() == "true"
+
+
+@dataclass
+class WhisperInferenceOptions:
+    """
+    单次推理参数，默认取环境变量，可按请求覆盖（见 merged）。
+
+    batched=True 时使用 BatchedInferencePipeline 按批并行解码，CPU 上吞吐可提升数倍；
+    批处理依赖 VAD 切分语音段，因此会强制开启 vad_filter。
+    beam_size 调小（如 1）以精度换速度。
+    """
+    beam_size: int = int(os.getenv("WHISPER_BEAM_SIZE", "5"))
+    vad_filter: bool = _env_bool("WHISPER_VAD_FILTER")
+    batched: bool = _env_bool("WHISPER_BATCHED")
+    batch_size: int = int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+    language: Optional[str] = os.getenv("WHISPER_LANGUAGE") or None
+
+    def merged(self, overrides: Optional[dict]) -> "WhisperInferenceOptions":
+        if not overrides:
+            return self
+        names = {f.name for f in fields(self)}
+        return replace(self, **{k: v for k, v in overrides.items() if k in names and v is not None})
+
+
 class WhisperTranscriber(Transcriber):
-    # TODO:修改为可配置
     def __init__(
             self,
             model_size: str = "base",
             device: str = 'cpu',
             compute_type: str = None,
-            cpu_threads: int = 1,
+            cpu_threads: int = None,
+            num_workers: int = None,
     ):
+        """
+        :param compute_type: COMPUTE_TYPES 之一，默认 WHISPER_COMPUTE_TYPE，未设置时 GPU 用 float16、CPU 用 int8
+        :param cpu_threads: CPU 推理线程数，默认 WHISPER_CPU_THREADS，0 为 CTranslate2 默认值
+        :param num_workers: 可同时推理的工作线程数，默认 WHISPER_NUM_WORKERS（并发上限同时按此放开）
+        """
         if device == 'cpu' or device is None:
             self.device = 'cpu'
         else:
@@ -46,7 +84,18 @@ class WhisperTranscriber(Transcriber):
             if device == 'cuda' and self.device == 'cpu':
                 print('没有 cuda 使用 cpu进行计算')
 
-        self.compute_type = compute_type or ("float16" if self.device == "cuda" else "int8")
+        self.model_size = model_size
+        self.compute_type = compute_type or os.getenv("WHISPER_COMPUTE_TYPE") or (
+            "float16" if self.device == "cuda" else "int8")
+        self.cpu_threads = cpu_threads if cpu_threads is not None else int(os.getenv("WHISPER_CPU_THREADS", "0"))
+        self.num_workers = num_workers if num_workers is not None else int(os.getenv("WHISPER_NUM_WORKERS", "1"))
+        self.default_options = WhisperInferenceOptions()
+        self._batched_pipeline = None
+        self._pipeline_lock = threading.Lock()
+
+        # faster_whisper / modelscope 导入耗时较长，只在真正创建转写器时加载
+        from faster_whisper import WhisperModel
+        from modelscope import snapshot_download
 
         model_dir = get_model_dir("whisper")
         model_path = os.path.join(model_dir, f"whisper-{model_size}")
@@ -64,8 +113,22 @@ class WhisperTranscriber(Transcriber):
             model_size_or_path=model_path,
             device=self.device,
             compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+            num_workers=self.num_workers,
             download_root=model_dir
         )
+        logger.info(
+            f"Whisper 模型已加载：{model_size}，device={self.device}，compute_type={self.compute_type}，"
+            f"cpu_threads={self.cpu_threads}，num_workers={self.num_workers}"
+        )
+
+    def _get_batched_pipeline(self):
+        if self._batched_pipeline is None:
+            with self._pipeline_lock:
+                if self._batched_pipeline is None:
+                    from faster_whisper import BatchedInferencePipeline
+                    self._batched_pipeline = BatchedInferencePipeline(model=self.model)
+        return self._batched_pipeline
     @staticmethod
     def is_torch_installed() -> bool:
         try:
@@ -91,17 +154,25 @@ class WhisperTranscriber(Transcriber):
             return False
 
     @timeit
-    def transcript(self, file_path: str) -> TranscriptResult:
+    def transcript(self, file_path: str, options: Optional[WhisperInferenceOptions] = None) -> TranscriptResult:
+        options = options or self.default_options
         try:
-
-            segments_raw, info = self.model.transcribe(file_path)
+            kwargs = dict(beam_size=options.beam_size, language=options.language, vad_filter=options.vad_filter)
+            if options.batched:
+                kwargs["vad_filter"] = True
+                segments_raw, info = self._get_batched_pipeline().transcribe(
+                    file_path, batch_size=options.batch_size, **kwargs
+                )
+            else:
+                segments_raw, info = self.model.transcribe(file_path, **kwargs)
 
             segments = []
-            full_text = ""
 
             for seg in segments_raw:
+                # segments_raw 是惰性生成器，逐段解码时上报进度
+                if info.duration:
+                    report_progress(seg.end / info.duration)
                 text = seg.text.strip()
-                full_text += text + " "
                 segments.append(TranscriptSegment(
                     start=seg.start,
                     end=seg.end,
@@ -110,7 +181,6 @@ class WhisperTranscriber(Transcriber):
 
             result= TranscriptResult(
                 language=info.language,
-                full_text=full_text.strip(),
                 segments=segments,
                 raw=info
             )
@@ -126,3 +196,24 @@ class WhisperTranscriber(Transcriber):
             "file_path": video_path,
         })
 
+
+class ConfiguredWhisperTranscriber(Transcriber):
+    """
+    把单次任务的推理参数绑定到共享的 Whisper 转写器上，不改变共享实例本身
+    """
+
+    def __init__(self, inner: Transcriber, options: WhisperInferenceOptions):
+        self.inner = inner
+        self.options = options
+
+    def transcript(self, file_path: str) -> TranscriptResult:
+        return self.inner.transcript(file_path=file_path, options=self.options)
+
+    async def atranscript(self, file_path: str, **kwargs) -> TranscriptResult:
+        return await self.inner.atranscript(file_path, options=self.options)
+
+    def on_finish(self, video_path: str, result: TranscriptResult) -> None:
+        return self.inner.on_finish(video_path, result)
+
+    def __getattr__(self, item):
+        return getattr(self.inner, item)
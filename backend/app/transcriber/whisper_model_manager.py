@@ -0,0 +1,176 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from app.transcriber.concurrency import ConcurrencyLimitedTranscriber, get_concurrency_limit
+from app.transcriber.whisper import MODEL_MAP, WhisperTranscriber
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 常驻模型的内存预算（MB），超出时按最近最少使用淘汰；0 表示不限制
+WHISPER_MEMORY_BUDGET_MB = int(os.getenv("WHISPER_MEMORY_BUDGET_MB", "4096"))
+# 启动时预加载的模型，逗号分隔，如 "base,large-v3-turbo"
+WHISPER_PRELOAD_SIZES = os.getenv("WHISPER_PRELOAD_SIZES", "")
+
+# 各尺寸模型加载后的大致内存占用（MB，int8 / float16 量级），用于预算估算
+MODEL_MEMORY_MB = {
+    "tiny": 150,
+    "base": 300,
+    "small": 700,
+    "medium": 1600,
+    "large-v1": 3200,
+    "large-v2": 3200,
+    "large-v3": 3200,
+    "large-v3-turbo": 1700,
+}
+
+# (模型尺寸, 设备, compute_type)
+ModelKey = Tuple[str, str, str]
+
+
+class WhisperModelManager:
+    """
+    faster-whisper 模型常驻池。
+
+    同时保留多个尺寸的模型（如短视频用 base、长讲座用 large-v3-turbo），按请求选择，已加载的模型直接复用。
+    新模型加载成功后若超出内存预算，按最近最少使用淘汰其它模型（优先淘汰空闲的），加载失败时不淘汰任何模型。
+    被淘汰但仍有任务在转写的模型暂存在 _retired 中，期间再次请求该模型时直接放回常驻池，
+    不会加载第二份，也保证同一模型只有一组并发槽位。
+    """
+
+    def __init__(self, memory_budget_mb: int = WHISPER_MEMORY_BUDGET_MB):
+        self.memory_budget_mb = memory_budget_mb
+        self._models: "OrderedDict[ModelKey, ConcurrencyLimitedTranscriber]" = OrderedDict()
+        self._retired: Dict[ModelKey, ConcurrencyLimitedTranscriber] = {}
+        self._lock = threading.Lock()
+        # 串行加载：避免同一模型重复加载，也避免多个大模型同时加载撑爆内存
+        self._load_lock = threading.Lock()
+
+    @staticmethod
+    def estimate_memory_mb(model_size: str) -> int:
+        return MODEL_MEMORY_MB.get(model_size, MODEL_MEMORY_MB["large-v3"])
+
+    def resident(self) -> List[ModelKey]:
+        with self._lock:
+            return list(self._models.keys())
+
+    def resident_memory_mb(self) -> int:
+        with self._lock:
+            return sum(self.estimate_memory_mb(size) for size, *_ in self._models)
+
+    def get(self, model_size: str = "base", device: str = "cuda",
+            compute_type: Optional[str] = None) -> ConcurrencyLimitedTranscriber:
+        """
+        获取指定尺寸的转写器，未加载时加载（必要时淘汰其它模型）。
+        每个模型单独限制并发推理数（FAST_WHISPER_MAX_CONCURRENCY）
+
+        :param model_size: 模型尺寸，需在 MODEL_MAP 中
+        :param device: cuda / cpu
+        :param compute_type: 量化精度，为空时按 WHISPER_COMPUTE_TYPE / 设备自动选择；不同精度视为不同模型
+        """
+        if model_size not in MODEL_MAP:
+            raise ValueError(f"不支持的 Whisper 模型：{model_size}，可选：{', '.join(MODEL_MAP)}")
+
+        key = (model_size, device, compute_type or "auto")
+        with self._lock:
+            transcriber = self._models.get(key)
+            if transcriber is not None:
+                self._models.move_to_end(key)
+                return transcriber
+
+        with self._load_lock:
+            with self._lock:
+                transcriber = self._models.get(key) or self._reinstate(key)
+                if transcriber is not None:
+                    self._models.move_to_end(key)
+                    return transcriber
+                victims = self._plan_eviction(model_size)
+
+            logger.info(f"加载 Whisper 模型：{model_size}（{device}，{key[2]}）")
+            # 加载失败（下载出错、设备不支持该 compute_type 等）时直接抛出，常驻池保持不变
+            transcriber = ConcurrencyLimitedTranscriber(
+                WhisperTranscriber(model_size=model_size, device=device, compute_type=compute_type),
+                get_concurrency_limit("fast-whisper"),
+                f"whisper-{model_size}",
+                transcriber_type="fast-whisper",
+            )
+
+            with self._lock:
+                for victim in victims:
+                    self._remove(victim)
+                self._models[key] = transcriber
+            logger.info(f"Whisper 模型已常驻：{[size for size, *_ in self.resident()]}，约 {self.resident_memory_mb()}MB")
+            return transcriber
+
+    @staticmethod
+    def _busy(transcriber: ConcurrencyLimitedTranscriber) -> bool:
+        return transcriber.in_flight + transcriber.waiting > 0
+
+    def _reinstate(self, key: ModelKey) -> Optional[ConcurrencyLimitedTranscriber]:
+        # 调用方需持有 self._lock；顺带清理已空闲的淘汰模型
+        for retired_key in [k for k, t in self._retired.items() if not self._busy(t)]:
+            del self._retired[retired_key]
+        transcriber = self._retired.pop(key, None)
+        if transcriber is not None:
+            logger.info(f"Whisper 模型 {key[0]}（{key[1]}，{key[2]}）仍有任务在转写，放回常驻池")
+            self._models[key] = transcriber
+        return transcriber
+
+    def _plan_eviction(self, model_size: str) -> List[ModelKey]:
+        """
+        计算为加载新模型需要淘汰的模型，此时不做修改，加载成功后再由 _remove 执行。调用方需持有 self._lock
+        """
+        if self.memory_budget_mb <= 0:
+            return []
+        needed = self.estimate_memory_mb(model_size)
+        if needed > self.memory_budget_mb:
+            logger.warning(f"Whisper 模型 {model_size} 预估 {needed}MB，超过预算 {self.memory_budget_mb}MB")
+        used = sum(self.estimate_memory_mb(size) for size, *_ in self._models)
+        # 按最近最少使用排序，空闲的模型优先淘汰
+        candidates = sorted(self._models, key=lambda k: self._busy(self._models[k]))
+        victims = []
+        for key in candidates:
+            if used + needed <= self.memory_budget_mb:
+                break
+            victims.append(key)
+            used -= self.estimate_memory_mb(key[0])
+        return victims
+
+    def _remove(self, key: ModelKey) -> None:
+        # 调用方需持有 self._lock
+        transcriber = self._models.pop(key, None)
+        if transcriber is None:
+            return
+        size, device, compute_type = key
+        logger.info(f"卸载 Whisper 模型：{size}（{device}，{compute_type}）")
+        if self._busy(transcriber):
+            self._retired[key] = transcriber
+
+    def evict(self, model_size: str, device: Optional[str] = None) -> None:
+        with self._lock:
+            for key in [k for k in self._models if k[0] == model_size and (device is None or k[1] == device)]:
+                self._remove(key)
+
+    def preload(self, sizes: List[str], device: str = "cuda") -> None:
+        for size in sizes:
+            try:
+                self.get(size, device)
+            except Exception as e:
+                logger.error(f"预加载 Whisper 模型 {size} 失败：{e}")
+
+
+whisper_model_manager = WhisperModelManager()
+
+
+def preload_whisper_models(device: str = "cuda") -> None:
+    """
+    按 WHISPER_PRELOAD_SIZES 预加载模型
+    """
+    sizes = [s.strip() for s in WHISPER_PRELOAD_SIZES.split(",") if s.strip()]
+    if sizes:
+        whisper_model_manager.preload(sizes, device)
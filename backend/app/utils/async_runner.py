@@ -0,0 +1,60 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    获取后台共享事件循环（守护线程中常驻运行）。
+
+    笔记任务运行在 BackgroundTasks 的线程池中，下载/转写的异步 IO 统一提交到这个循环，
+    共享同一个连接池，多个任务的网络等待可以在一个线程里并发推进。
+    """
+    global _loop
+    if _loop is not None and _loop.is_running():
+        return _loop
+    with _lock:
+        if _loop is None or not _loop.is_running():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_run_loop, args=(loop,), name="bilinote-async", daemon=True)
+            thread.start()
+            _loop = loop
+            logger.info("后台事件循环已启动")
+    return _loop
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+    """
+    把协程提交到后台事件循环，立即返回 concurrent.futures.Future
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop())
+
+
+def run_sync(coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    """
+    在同步代码中执行协程并等待结果（供 Downloader / Transcriber 的同步接口使用）。
+    不能在后台事件循环自身的线程中调用，否则会死锁。
+    """
+    loop = get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        raise RuntimeError("run_sync 不能在后台事件循环中调用，请直接 await")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
@@ -0,0 +1,164 @@
+import os
+import queue
+import subprocess
+import threading
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# ffmpeg 处理落后于上传时最多积压的字节数，超出后放弃边传边抽，避免占用过多内存
+EXTRACT_MAX_PENDING_BYTES = 64 * 1024 * 1024
+# 同时进行边传边抽的 ffmpeg 进程上限，超出的上传在完成后再整体转换
+UPLOAD_MAX_EXTRACTORS = int(os.getenv("UPLOAD_MAX_EXTRACTORS", "4"))
+_extractor_slots = threading.BoundedSemaphore(max(UPLOAD_MAX_EXTRACTORS, 0))
+
+
+def audio_path_for(video_path: str) -> str:
+    """
+    与 LocalDownloader.convert_to_mp3 默认输出一致：同目录同名 .mp3
+    """
+    base, _ = os.path.splitext(video_path)
+    return base + ".mp3"
+
+
+def needs_audio_extraction(path: str) -> bool:
+    """
+    上传的已经是 mp3 时无需抽取：输出路径与原文件相同，转换会就地有损重编码原文件
+    """
+    return os.path.splitext(path)[1].lower() != ".mp3"
+
+
+def extract_audio(video_path: str, output_path: Optional[str] = None) -> Optional[str]:
+    """
+    从完整的视频文件中抽取 mp3，先写临时文件再重命名，失败时返回 None
+    """
+    output_path = output_path or audio_path_for(video_path)
+    if os.path.abspath(output_path) == os.path.abspath(video_path):
+        return output_path
+    part_path = output_path + ".part"
+    command = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-i", video_path,
+        "-vn", "-acodec", "libmp3lame", "-f", "mp3",
+        part_path,
+    ]
+    try:
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+        os.replace(part_path, output_path)
+        return output_path
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning(f"抽取音频失败：{video_path}，{e}")
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return None
+
+
+def extract_audio_in_background(video_path: str) -> None:
+    threading.Thread(target=extract_audio, args=(video_path,), name="audio-extract", daemon=True).start()
+
+
+class EarlyAudioExtractor:
+    """
+    边上传边抽取音频：按文件顺序把已收到的字节写入 ffmpeg 标准输入，上传结束时 mp3 也基本转换完成。
+
+    写入由后台线程完成，feed() 不会阻塞调用方。MP4 的 moov 位于文件末尾等无法流式解码的文件，
+    ffmpeg 会提前退出，此时 finish() 返回 False，由调用方在上传完成后改为整体转换
+    """
+
+    def __init__(self, output_path: str, max_pending_bytes: int = EXTRACT_MAX_PENDING_BYTES):
+        self.output_path = output_path
+        self.part_path = output_path + ".part"
+        self.max_pending_bytes = max_pending_bytes
+        self.failed = False
+        self._slot_held = True
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self._process = subprocess.Popen(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+                "-i", "pipe:0",
+                "-vn", "-acodec", "libmp3lame", "-f", "mp3",
+                self.part_path,
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self._thread = threading.Thread(target=self._pump, name="audio-early-extract", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def start(cls, output_path: str) -> Optional["EarlyAudioExtractor"]:
+        """
+        启动 ffmpeg，未安装或进程数已达 UPLOAD_MAX_EXTRACTORS 时返回 None
+        """
+        if not _extractor_slots.acquire(blocking=False):
+            logger.info(f"边传边抽音频的进程已达上限 {UPLOAD_MAX_EXTRACTORS}，改为上传完成后再抽取")
+            return None
+        try:
+            return cls(output_path)
+        except OSError as e:
+            _extractor_slots.release()
+            logger.warning(f"无法启动边传边抽音频：{e}")
+            return None
+
+    def feed(self, data: bytes) -> None:
+        if self.failed or not data:
+            return
+        with self._lock:
+            if self._pending + len(data) > self.max_pending_bytes:
+                logger.info("ffmpeg 处理落后于上传，改为上传完成后再抽取音频")
+                self.failed = True
+                self._process.kill()
+                return
+            self._pending += len(data)
+        self._queue.put(data)
+
+    def _pump(self) -> None:
+        stdin = self._process.stdin
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            if not self.failed:
+                try:
+                    stdin.write(data)
+                except OSError:
+                    # ffmpeg 已退出（格式无法流式解码或被终止），继续消费队列直到结束标记
+                    self.failed = True
+            with self._lock:
+                self._pending -= len(data)
+        try:
+            stdin.close()
+        except OSError:
+            pass
+
+    def finish(self) -> bool:
+        """
+        所有数据已写入后调用，等待 ffmpeg 结束
+        :return: 是否成功生成 mp3
+        """
+        self._queue.put(None)
+        self._thread.join()
+        returncode = self._process.wait()
+        with self._lock:
+            if self._slot_held:
+                self._slot_held = False
+                _extractor_slots.release()
+        if self.failed or returncode != 0:
+            if os.path.exists(self.part_path):
+                os.remove(self.part_path)
+            return False
+        os.replace(self.part_path, self.output_path)
+        return True
+
+    def abort(self) -> None:
+        self.failed = True
+        self._process.kill()
+        self.finish()
@@ -0,0 +1,172 @@
+import csv
+import os
+import subprocess
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class AudioChunk:
+    index: int          # 分片序号
+    file_path: str      # 分片 wav 路径
+    start: float        # 分片在原音频中的起始时间（秒）
+    end: float          # 分片在原音频中的结束时间（秒）
+
+
+class StreamingAudioSegmenter:
+    """
+    使用 ffmpeg 直接读取远程音频流，一边下载一边切成固定时长的 wav 分片，
+    同时把完整音频转存为 mp3，供缓存与后续流程使用。
+
+    ffmpeg 每写完一个分片就会向 segment_list 追加一行，
+    iter_chunks() 通过跟踪该列表把已完成的分片交给转写器，从而让下载与转写重叠进行。
+    """
+
+    def __init__(
+            self,
+            stream_url: str,
+            output_dir: str,
+            file_stem: str,
+            http_headers: Optional[Dict[str, str]] = None,
+            chunk_seconds: int = 300,
+            poll_interval: float = 0.5,
+            rw_timeout: float = 30,
+            stall_timeout: Optional[float] = None,
+    ):
+        """
+        :param rw_timeout: 单次网络读写超时（秒），连接卡住时 ffmpeg 会报错退出
+        :param stall_timeout: ffmpeg 仍在运行、但超过该秒数既没有新分片也没有输出增长时，视为上游卡住，
+                              终止 ffmpeg 并抛出异常，由调用方回退到常规下载；None 表示不检测
+        """
+        self.stream_url = stream_url
+        self.output_dir = output_dir
+        self.file_stem = file_stem
+        self.http_headers = http_headers or {}
+        self.chunk_seconds = chunk_seconds
+        self.poll_interval = poll_interval
+        self.rw_timeout = rw_timeout
+        self.stall_timeout = stall_timeout
+
+        self.chunk_dir = os.path.join(output_dir, f"{file_stem}_chunks")
+        self.audio_path = os.path.join(output_dir, f"{file_stem}.mp3")
+        self.segment_list = os.path.join(self.chunk_dir, "segments.csv")
+        self._process: Optional[subprocess.Popen] = None
+
+    def _build_command(self) -> List[str]:
+        command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"]
+        if self.http_headers:
+            headers = "".join(f"{k}: {v}\r\n" for k, v in self.http_headers.items())
+            command += ["-headers", headers]
+        # 读写超时单位为微秒；HTTP 源断线后自动重连，避免上游卡住时任务永久挂起
+        command += ["-rw_timeout", str(int(self.rw_timeout * 1_000_000))]
+        if self.stream_url.startswith(("http://", "https://")):
+            command += ["-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "5"]
+        command += [
+            "-i", self.stream_url,
+            # 输出 1：完整 mp3
+            "-map", "0:a", "-vn", "-acodec", "libmp3lame", "-b:a", "64k", self.audio_path,
+            # 输出 2：16k 单声道 wav 分片，转写模型的原生输入格式
+            "-map", "0:a", "-vn", "-ac", "1", "-ar", "16000",
+            "-f", "segment",
+            "-segment_time", str(self.chunk_seconds),
+            "-segment_list", self.segment_list,
+            "-segment_list_type", "csv",
+            "-reset_timestamps", "1",
+            os.path.join(self.chunk_dir, "chunk_%04d.wav"),
+        ]
+        return command
+
+    def start(self) -> None:
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        if os.path.exists(self.segment_list):
+            os.remove(self.segment_list)
+        logger.info(f"开始流式拉取音频：{self.file_stem}，分片时长 {self.chunk_seconds}s")
+        self._process = subprocess.Popen(
+            self._build_command(),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+
+    def _read_segment_list(self, consumed: int) -> List[AudioChunk]:
+        if not os.path.exists(self.segment_list):
+            return []
+        with open(self.segment_list, "r", encoding="utf-8", newline="") as f:
+            # 只取以换行结尾的完整行，避免读到 ffmpeg 写了一半的记录
+            lines = [line for line in f.readlines() if line.endswith("\n")]
+        rows = [row for row in csv.reader(lines) if len(row) >= 3]
+        chunks = []
+        for index, row in enumerate(rows[consumed:], start=consumed):
+            chunks.append(AudioChunk(
+                index=index,
+                file_path=os.path.join(self.chunk_dir, row[0]),
+                start=float(row[1]),
+                end=float(row[2]),
+            ))
+        return chunks
+
+    def _output_size(self) -> int:
+        try:
+            return os.path.getsize(self.audio_path)
+        except OSError:
+            return 0
+
+    def iter_chunks(self) -> Iterator[AudioChunk]:
+        """
+        按顺序产出已写完的分片，直到 ffmpeg 退出且所有分片都被消费；
+        ffmpeg 卡住超过 stall_timeout 时终止 ffmpeg 并抛出 TimeoutError
+        """
+        if self._process is None:
+            self.start()
+
+        consumed = 0
+        output_size = self._output_size()
+        last_progress = time.monotonic()
+        while True:
+            finished = self._process.poll() is not None
+            chunks = self._read_segment_list(consumed)
+            for chunk in chunks:
+                consumed += 1
+                yield chunk
+            if finished:
+                break
+
+            size = self._output_size()
+            if chunks or size != output_size:
+                # 调用方在 yield 中转写分片的耗时不计入卡住时间
+                output_size = size
+                last_progress = time.monotonic()
+            elif (self.stall_timeout and time.monotonic() - last_progress > self.stall_timeout
+                  and self._process.poll() is None):
+                self._process.kill()
+                self._process.wait()
+                raise TimeoutError(f"流式拉取 {self.stall_timeout:.0f}s 无进展，判定上游卡住：{self.file_stem}")
+            time.sleep(self.poll_interval)
+
+        if self._process.returncode != 0:
+            stderr = self._process.stderr.read().decode("utf-8", errors="ignore") if self._process.stderr else ""
+            raise RuntimeError(f"ffmpeg 流式拉取失败（code={self._process.returncode}）：{stderr.strip()}")
+
+    def close(self) -> None:
+        """
+        终止仍在运行的 ffmpeg，并清理分片目录（保留完整 mp3）
+        """
+        if self._process and self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        if self._process and self._process.stderr:
+            self._process.stderr.close()
+        if os.path.isdir(self.chunk_dir):
+            for name in os.listdir(self.chunk_dir):
+                try:
+                    os.remove(os.path.join(self.chunk_dir, name))
+                except OSError:
+                    pass
+            try:
+                os.rmdir(self.chunk_dir)
+            except OSError:
+                pass
@@ -0,0 +1,96 @@
+import gzip
+import os
+
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+load_dotenv()
+
+# 可选依赖：未安装 brotli 时只使用 gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "true").lower() == "true"
+# 小于该字节数的响应不压缩
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+
+# 只压缩文本类响应，图片、音视频本身已压缩
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def _choose_encoding(accept_encoding: str) -> str:
+    accepted = {item.split(";")[0].strip().lower() for item in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return ""
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        # 质量 5 在压缩率与 CPU 开销之间较均衡，笔记 JSON 通常只有几十 KB
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class CompressionMiddleware:
+    """
+    按 Accept-Encoding 对 JSON / 文本响应做 brotli（已安装时优先）或 gzip 压缩。
+
+    只处理一次性发送完整响应体的响应（JSONResponse 等）；流式响应与静态文件原样透传，
+    已带 Content-Encoding 的响应也不重复压缩
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = RESPONSE_COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not RESPONSE_COMPRESSION:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message = {}
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # 等拿到响应体再决定是否压缩
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or not start_message:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+            compressible = (
+                not message.get("more_body", False)
+                and "content-encoding" not in headers
+                and len(body) >= self.minimum_size
+                and content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            if compressible:
+                body = _compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+                message = {**message, "body": body}
+            elif content_type.startswith(COMPRESSIBLE_TYPES):
+                headers.add_vary_header("Accept-Encoding")
+
+            await send(start_message)
+            start_message = {}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,7 +1,6 @@
 import os
 import re
 from urllib.parse import quote
-from markdown_pdf import MarkdownPdf, Section
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -140,6 +139,8 @@ class ExportUtils:
         """
         将 Markdown 内容转换为 PDF
         """
+        from markdown_pdf import MarkdownPdf, Section
+
         try:
             # 创建 PDF 对象，启用优化
             pdf = MarkdownPdf(
@@ -0,0 +1,65 @@
+import asyncio
+import os
+import weakref
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Dict, Optional
+
+import httpx
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 流式写盘的分块大小
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _new_client() -> httpx.AsyncClient:
+    # 共享客户端不保存任何响应 cookie，避免不同任务之间串号；需要 cookie 时由调用方显式放进请求头
+    no_cookie_jar = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+    return httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(retries=3),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        cookies=httpx.Cookies(no_cookie_jar),
+        follow_redirects=True,
+    )
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    获取当前事件循环共享的 httpx.AsyncClient（连接池复用）。
+    AsyncClient 绑定创建它的事件循环，因此按循环分别缓存。
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _new_client()
+        _clients[loop] = client
+    return client
+
+
+async def stream_to_file(url: str, output_path: str, headers: Optional[Dict[str, str]] = None) -> int:
+    """
+    分块下载到本地文件，内存占用与文件大小无关。
+    先写入 .part 临时文件，完成后原子替换，避免中断留下残缺文件。
+
+    :param url: 下载地址
+    :param output_path: 目标路径
+    :param headers: 请求头
+    :return: 写入的字节数
+    """
+    client = get_async_client()
+    part_path = output_path + ".part"
+    written = 0
+    async with client.stream("GET", url, headers=headers) as resp:
+        resp.raise_for_status()
+        with open(part_path, "wb") as f:
+            async for chunk in resp.aiter_bytes(STREAM_CHUNK_SIZE):
+                f.write(chunk)
+                written += len(chunk)
+    os.replace(part_path, output_path)
+    logger.info(f"下载完成：{output_path}（{written // 1024}KB）")
+    return written
@@ -0,0 +1,301 @@
+import asyncio
+import hashlib
+import io
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+from app.utils.http_client import get_async_client
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 可选依赖：未安装 Pillow 时不做缩放，直接返回原图
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_CACHE_DIR = Path(os.getenv("IMAGE_CACHE_DIR", "image_cache"))
+# 内存 / 磁盘缓存上限（MB），超出后按最近最少使用淘汰；0 表示关闭该级缓存
+IMAGE_CACHE_MEMORY_MB = int(os.getenv("IMAGE_CACHE_MEMORY_MB", "32"))
+IMAGE_CACHE_DISK_MB = int(os.getenv("IMAGE_CACHE_DISK_MB", "512"))
+# 单张图片的最大字节数，防止代理被用来下载大文件
+IMAGE_PROXY_MAX_BYTES = int(os.getenv("IMAGE_PROXY_MAX_BYTES", str(10 * 1024 * 1024)))
+# 允许的缩略图宽度，请求的宽度向上取到最近的一档，避免任意宽度撑爆缓存
+IMAGE_THUMBNAIL_WIDTHS = sorted(
+    int(w) for w in os.getenv("IMAGE_THUMBNAIL_WIDTHS", "160,320,480,640,960").split(",") if w.strip()
+)
+
+# 只代理各平台图片 CDN 的地址（按域名后缀匹配），避免代理被用来抓取任意站点内容并以本站名义长期缓存
+IMAGE_PROXY_ALLOWED_HOSTS = [
+    host.strip().lower().lstrip(".") for host in os.getenv(
+        "IMAGE_PROXY_ALLOWED_HOSTS",
+        "hdslb.com,biliimg.com,"                                  # B 站
+        "ytimg.com,ggpht.com,googleusercontent.com,"              # YouTube
+        "douyinpic.com,douyinstatic.com,byteimg.com,pstatp.com,"  # 抖音
+        "yximgs.com,kwimgs.com,kwaicdn.com,"                      # 快手
+        "xyzcdn.net",                                             # 小宇宙
+    ).split(",") if host.strip()
+]
+
+IMAGE_PROXY_HEADERS = {
+    "Referer": "https://www.bilibili.com/",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+}
+
+
+class ImageProxyError(Exception):
+    """
+    图片代理拒绝或回源失败，status_code 为返回给客户端的 HTTP 状态码
+    """
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def is_allowed_image_url(url: str) -> bool:
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if parsed.scheme not in ("http", "https") or not host:
+        return False
+    return any(host == allowed or host.endswith("." + allowed) for allowed in IMAGE_PROXY_ALLOWED_HOSTS)
+
+
+@dataclass
+class CachedImage:
+    content: bytes
+    content_type: str
+
+    @property
+    def etag(self) -> str:
+        return '"' + hashlib.sha256(self.content).hexdigest()[:32] + '"'
+
+
+class MemoryLRU:
+    """
+    按字节数限制容量的内存 LRU，只在事件循环线程中访问
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: "OrderedDict[str, CachedImage]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CachedImage]:
+        image = self._items.get(key)
+        if image is not None:
+            self._items.move_to_end(key)
+        return image
+
+    def put(self, key: str, image: CachedImage) -> None:
+        # 单张超过容量 1/8 的图片不进内存，避免一张大图挤掉大量小图
+        if len(image.content) > self.max_bytes // 8:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.size -= len(old.content)
+        self._items[key] = image
+        self.size += len(image.content)
+        while self.size > self.max_bytes and self._items:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted.content)
+
+
+class DiskLRU:
+    """
+    磁盘缓存：文件名为 key 的哈希加图片后缀，访问时更新 mtime，超出容量时删除 mtime 最早的文件
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def _files(self) -> List[Path]:
+        return [p for p in self.directory.glob("*") if p.is_file() and not p.name.endswith(".tmp")]
+
+    def _ensure_size(self) -> int:
+        if self._size is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._size = sum(p.stat().st_size for p in self._files())
+        return self._size
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedImage]:
+        for path in self.directory.glob(self._name(key) + ".*"):
+            if path.name.endswith(".tmp"):
+                continue
+            try:
+                content = path.read_bytes()
+                os.utime(path)
+            except OSError:
+                return None
+            content_type = mimetypes.guess_type(path.name)[0] or "image/jpeg"
+            return CachedImage(content=content, content_type=content_type)
+        return None
+
+    def put(self, key: str, image: CachedImage) -> None:
+        suffix = mimetypes.guess_extension(image.content_type.split(";")[0].strip()) or ".img"
+        path = self.directory / f"{self._name(key)}{suffix}"
+        with self._lock:
+            self._ensure_size()
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_bytes(image.content)
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+            self._size += len(image.content) - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # 淘汰到容量的 90%，避免每次写入都扫描目录
+        target = int(self.max_bytes * 0.9)
+        files = []
+        for p in self._files():
+            try:
+                files.append((p.stat().st_mtime, p.stat().st_size, p))
+            except OSError:
+                continue
+        files.sort()
+        self._size = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if self._size <= target:
+                break
+            try:
+                path.unlink()
+                self._size -= size
+            except OSError:
+                continue
+
+
+def snap_width(width: Optional[int]) -> Optional[int]:
+    """
+    将请求的宽度向上取到允许的缩略图档位，超过最大档位时返回原图（None）
+    """
+    if not width or not IMAGE_THUMBNAIL_WIDTHS:
+        return None
+    for allowed in IMAGE_THUMBNAIL_WIDTHS:
+        if width <= allowed:
+            return allowed
+    return None
+
+
+def make_thumbnail(image: CachedImage, width: int) -> CachedImage:
+    """
+    按宽度等比缩放；原图不比目标宽或无法解码时返回原图
+    """
+    if Image is None:
+        return image
+    try:
+        with Image.open(io.BytesIO(image.content)) as img:
+            if img.width <= width:
+                return image
+            height = max(1, round(img.height * width / img.width))
+            resized = img.resize((width, height), Image.LANCZOS)
+            has_alpha = resized.mode in ("RGBA", "LA", "P")
+            output = io.BytesIO()
+            if has_alpha:
+                resized.save(output, format="PNG", optimize=True)
+                content_type = "image/png"
+            else:
+                resized.convert("RGB").save(output, format="JPEG", quality=85, optimize=True)
+                content_type = "image/jpeg"
+            return CachedImage(content=output.getvalue(), content_type=content_type)
+    except Exception as e:
+        logger.warning(f"生成缩略图失败，返回原图：{e}")
+        return image
+
+
+class ImageProxyCache:
+    """
+    图片代理缓存：内存 LRU -> 磁盘 LRU -> 回源，相同 key 的并发请求合并为一次回源。
+    缩略图以「URL + 宽度」为 key 单独缓存，由原图（同样走缓存）缩放得到
+    """
+
+    def __init__(self, memory_mb: int = IMAGE_CACHE_MEMORY_MB, disk_mb: int = IMAGE_CACHE_DISK_MB,
+                 directory: Path = IMAGE_CACHE_DIR):
+        self.memory = MemoryLRU(memory_mb * 1024 * 1024) if memory_mb > 0 else None
+        self.disk = DiskLRU(directory, disk_mb * 1024 * 1024) if disk_mb > 0 else None
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get(self, url: str, width: Optional[int] = None) -> CachedImage:
+        """
+        :param url: 图片地址
+        :param width: 缩略图宽度，需先经过 snap_width；None 表示原图
+        """
+        key = f"{url}|{width or ''}"
+        if self.memory is not None:
+            image = self.memory.get(key)
+            if image is not None:
+                return image
+
+        task = self._inflight.get(key)
+        if task is None:
+            # 回源在独立任务中进行：发起请求的客户端断开时，其它等待者不受影响
+            task = asyncio.ensure_future(self._load(key, url, width))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        # 所有等待者都已断开时读取一次异常，避免 "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    async def _load(self, key: str, url: str, width: Optional[int]) -> CachedImage:
+        image = await asyncio.to_thread(self.disk.get, key) if self.disk is not None else None
+        if image is None:
+            if width:
+                original = await self.get(url)
+                image = await asyncio.to_thread(make_thumbnail, original, width)
+            else:
+                image = await self._fetch(url)
+            if self.disk is not None:
+                await asyncio.to_thread(self.disk.put, key, image)
+        if self.memory is not None:
+            self.memory.put(key, image)
+        return image
+
+    @staticmethod
+    async def _fetch(url: str) -> CachedImage:
+        if not is_allowed_image_url(url):
+            raise ImageProxyError(403, f"不支持代理该地址的图片：{url}")
+        client = get_async_client()
+        # 不跟随重定向：跳转目标可能不在允许的域名内
+        async with client.stream("GET", url, headers=IMAGE_PROXY_HEADERS, timeout=10.0,
+                                 follow_redirects=False) as resp:
+            if resp.is_redirect:
+                raise ImageProxyError(502, f"图片地址发生重定向：{url}")
+            resp.raise_for_status()
+            content_type = resp.headers.get("Content-Type", "")
+            mime = content_type.split(";")[0].strip().lower()
+            # SVG 可内嵌脚本，以本站名义返回有 XSS 风险，一并拒绝
+            if not mime.startswith("image/") or mime == "image/svg+xml":
+                raise ImageProxyError(502, f"上游返回的不是图片（{content_type or '未知类型'}）：{url}")
+            chunks = []
+            received = 0
+            async for chunk in resp.aiter_bytes():
+                received += len(chunk)
+                if received > IMAGE_PROXY_MAX_BYTES:
+                    raise ImageProxyError(413, f"图片超过 {IMAGE_PROXY_MAX_BYTES // 1024 // 1024}MB：{url}")
+                chunks.append(chunk)
+        return CachedImage(content=b"".join(chunks), content_type=content_type)
+
+
+image_proxy_cache = ImageProxyCache()
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from app.enmus.exception import NoteErrorEnum
+from app.exceptions.note import NoteError
+from app.models.audio_model import MediaProbe
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 预检限制，0 表示不限制
+MAX_MEDIA_DURATION = int(os.getenv("MAX_MEDIA_DURATION", "0"))      # 秒
+MAX_MEDIA_SIZE_MB = int(os.getenv("MAX_MEDIA_SIZE_MB", "0"))        # MB
+
+# 成本估算参数：下载带宽（MB/s）与各转写器的实时率（处理 1 秒音频所需秒数）
+ESTIMATED_DOWNLOAD_MBPS = float(os.getenv("ESTIMATED_DOWNLOAD_MBPS", "5"))
+TRANSCRIBE_REALTIME_FACTOR = {
+    "fast-whisper": 0.3,
+    "mlx-whisper": 0.1,
+    "bcut": 0.1,
+    "kuaishou": 0.1,
+    "groq": 0.05,
+}
+SUMMARIZE_SECONDS = 30
+
+
+def ffprobe_media(file_path: str) -> dict:
+    """
+    使用 ffprobe 读取本地文件的容器与流信息
+
+    :param file_path: 本地媒体路径
+    :return: ffprobe 输出的 json（format / streams）
+    """
+    command = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration,size,bit_rate,format_name:stream=codec_type,codec_name",
+        "-of", "json",
+        file_path,
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe 读取失败: {result.stderr.strip()}")
+    return json.loads(result.stdout or "{}")
+
+
+def check_media_limits(probe: MediaProbe) -> None:
+    """
+    根据预检结果执行时长/体积限制，超限时抛出 NoteError，在下载开始前拒绝任务
+    """
+    if MAX_MEDIA_DURATION and probe.duration > MAX_MEDIA_DURATION:
+        logger.warning(f"视频时长 {probe.duration:.0f}s 超出限制 {MAX_MEDIA_DURATION}s：{probe.video_id}")
+        raise NoteError(code=NoteErrorEnum.MEDIA_TOO_LONG.code,
+                        message=f"{NoteErrorEnum.MEDIA_TOO_LONG.message}（{probe.duration:.0f}s > {MAX_MEDIA_DURATION}s）")
+
+    if MAX_MEDIA_SIZE_MB and probe.filesize and probe.filesize > MAX_MEDIA_SIZE_MB * 1024 * 1024:
+        size_mb = probe.filesize / 1024 / 1024
+        logger.warning(f"视频体积 {size_mb:.1f}MB 超出限制 {MAX_MEDIA_SIZE_MB}MB：{probe.video_id}")
+        raise NoteError(code=NoteErrorEnum.MEDIA_TOO_LARGE.code,
+                        message=f"{NoteErrorEnum.MEDIA_TOO_LARGE.message}（{size_mb:.1f}MB > {MAX_MEDIA_SIZE_MB}MB）")
+
+
+def estimate_processing_seconds(probe: MediaProbe, transcriber_type: Optional[str] = None) -> float:
+    """
+    粗略估算任务耗时（下载 + 转写 + 总结），供任务状态展示与转写调度参考
+
+    :param probe: 预检结果
+    :param transcriber_type: 转写器类型
+    :return: 预估秒数
+    """
+    download = (probe.filesize or 0) / 1024 / 1024 / ESTIMATED_DOWNLOAD_MBPS
+    transcribe = probe.duration * TRANSCRIBE_REALTIME_FACTOR.get(transcriber_type or "", 0.3)
+    return round(download + transcribe + SUMMARIZE_SECONDS, 1)
@@ -0,0 +1,175 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 可选依赖：未安装时自动退回标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 缓存与结果文件的格式：auto / json / orjson / msgpack；auto 依次选择 msgpack、orjson、json
+CACHE_SERIALIZER = os.getenv("CACHE_SERIALIZER", "auto").lower()
+# 压缩：none / zstd（需安装 zstandard）
+CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "none").lower()
+CACHE_ZSTD_LEVEL = int(os.getenv("CACHE_ZSTD_LEVEL", "3"))
+
+
+class Serializer:
+    """
+    序列化器：对象 <-> bytes，suffix 为文件后缀，binary 表示能否直接写入 bytes（如数组的原始字节）
+    """
+    name = ""
+    suffix = ""
+    binary = False
+
+    def dumps(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonSerializer(Serializer):
+    name = "json"
+    suffix = ".json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer(Serializer):
+    # 输出仍是标准 JSON，未安装 orjson 的环境也能读取
+    name = "orjson"
+    suffix = ".json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackSerializer(Serializer):
+    name = "msgpack"
+    suffix = ".msgpack"
+    binary = True
+
+    def dumps(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+
+class ZstdSerializer(Serializer):
+    def __init__(self, inner: Serializer, level: int = CACHE_ZSTD_LEVEL):
+        self.inner = inner
+        self.level = level
+        self.name = f"{inner.name}+zstd"
+        self.suffix = f"{inner.suffix}.zst"
+        self.binary = inner.binary
+
+    def dumps(self, obj: Any) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(self.inner.dumps(obj))
+
+    def loads(self, data: bytes) -> Any:
+        return self.inner.loads(zstandard.ZstdDecompressor().decompress(data))
+
+
+def _json_serializer() -> Serializer:
+    return OrjsonSerializer() if orjson else JsonSerializer()
+
+
+def _create_serializer() -> Serializer:
+    available = {
+        "json": JsonSerializer,
+        "orjson": OrjsonSerializer if orjson else None,
+        "msgpack": MsgpackSerializer if msgpack else None,
+    }
+    if CACHE_SERIALIZER == "auto":
+        serializer = MsgpackSerializer() if msgpack else _json_serializer()
+    elif available.get(CACHE_SERIALIZER):
+        serializer = available[CACHE_SERIALIZER]()
+    else:
+        logger.warning(f"序列化格式 {CACHE_SERIALIZER} 不可用（未安装或不支持），使用 JSON")
+        serializer = _json_serializer()
+
+    if CACHE_COMPRESSION == "zstd":
+        if zstandard:
+            serializer = ZstdSerializer(serializer)
+        else:
+            logger.warning("CACHE_COMPRESSION=zstd 需要安装 zstandard，已关闭压缩")
+    return serializer
+
+
+serializer = _create_serializer()
+
+# 读取时按后缀选择，兼容切换格式前写入的文件
+_readers: Dict[str, Serializer] = {".json": _json_serializer()}
+if msgpack:
+    _readers[".msgpack"] = MsgpackSerializer()
+
+
+def serializer_for(path: Path) -> Serializer:
+    """
+    根据文件后缀返回对应的序列化器
+    """
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"读取 {path.name} 需要安装 zstandard")
+        return ZstdSerializer(serializer_for(path.with_suffix("")))
+    reader = _readers.get(path.suffix)
+    if reader is None:
+        raise RuntimeError(f"无法读取 {path.name}：未安装对应的序列化库")
+    return reader
+
+
+def cache_path(directory: Path, name: str) -> Path:
+    """
+    缓存文件路径：当前格式的文件存在时直接使用；否则沿用已有的其它格式文件（含旧版 JSON）；都不存在时返回当前格式路径
+
+    :param directory: 所在目录
+    :param name: 不含后缀的文件名，如 "{task_id}_audio"
+    """
+    preferred = directory / f"{name}{serializer.suffix}"
+    if preferred.exists():
+        return preferred
+    for suffix in (".json", ".msgpack", ".json.zst", ".msgpack.zst"):
+        candidate = directory / f"{name}{suffix}"
+        if candidate.exists():
+            return candidate
+    return preferred
+
+
+def dump(path: Path, obj: Any) -> None:
+    """
+    按文件后缀对应的格式写入，先写临时文件再原子替换，轮询方不会读到写了一半的文件
+    """
+    data = serializer_for(path).dumps(obj)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def load(path: Path) -> Any:
+    return serializer_for(path).loads(path.read_bytes())
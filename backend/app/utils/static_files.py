@@ -0,0 +1,69 @@
+import hashlib
+import os
+import re
+from pathlib import Path
+
+from dotenv import load_dotenv
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+load_dotenv()
+
+# 带内容哈希的静态文件缓存时长（秒），文件名随内容变化，可视为永久缓存
+STATIC_CACHE_MAX_AGE = int(os.getenv("STATIC_CACHE_MAX_AGE", "31536000"))
+
+HASH_LENGTH = 16
+# 形如 screenshot_003_<16 位十六进制>.jpg、cover_<16 位十六进制>.jpg
+_HASHED_NAME_RE = re.compile(rf"_[0-9a-f]{{{HASH_LENGTH}}}\.[A-Za-z0-9]+$")
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()[:HASH_LENGTH]
+
+
+def is_content_hashed(name: str) -> bool:
+    return bool(_HASHED_NAME_RE.search(name))
+
+
+def rename_to_content_hash(path: str, prefix: str) -> str:
+    """
+    将文件重命名为 {prefix}_{内容哈希}{后缀}，同一内容只保留一份
+
+    :param path: 已生成的文件路径
+    :param prefix: 文件名前缀，如 screenshot_003
+    :return: 重命名后的路径
+    """
+    src = Path(path)
+    target = src.with_name(f"{prefix}_{file_digest(path)}{src.suffix}")
+    if target.exists():
+        src.unlink()
+    else:
+        os.replace(src, target)
+    return str(target)
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    为静态文件附加缓存策略：
+    - 文件名带内容哈希的（截图、封面）：public, max-age=一年, immutable，浏览器与 nginx 不再回源
+    - 其它文件：no-cache，每次用 ETag / Last-Modified 协商，未变化时返回 304
+
+    文件名由用户决定的目录（如 uploads，同名上传会就地覆盖）需传 hashed_immutable=False，全部只做协商缓存
+    """
+
+    def __init__(self, *args, hashed_immutable: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hashed_immutable = hashed_immutable
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if self.hashed_immutable and is_content_hashed(os.path.basename(full_path)):
+            response.headers["Cache-Control"] = f"public, max-age={STATIC_CACHE_MAX_AGE}, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
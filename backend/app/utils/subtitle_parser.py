@@ -0,0 +1,109 @@
+import json
+import re
+from typing import List, Optional
+
+from app.models.transcriber_model import TranscriptResult, TranscriptSegment
+
+# 按优先级排列的可解析字幕格式
+SUPPORTED_SUBTITLE_EXTS = ["json3", "vtt", "srt", "json"]
+
+_TIME_RE = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})")
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _parse_timestamp(value: str) -> float:
+    match = _TIME_RE.search(value)
+    if not match:
+        raise ValueError(f"无法解析的时间戳: {value}")
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis.ljust(3, "0")) / 1000.0
+
+
+def _parse_cues(content: str) -> List[TranscriptSegment]:
+    """
+    解析 WebVTT / SRT：两者都是「时间行 + 若干文本行 + 空行」的结构
+    """
+    segments: List[TranscriptSegment] = []
+    blocks = re.split(r"\r?\n\s*\r?\n", content.strip())
+    for block in blocks:
+        lines = [line.strip() for line in block.splitlines() if line.strip()]
+        time_idx = next((i for i, line in enumerate(lines) if "-->" in line), None)
+        if time_idx is None:
+            continue
+        start_str, end_str = lines[time_idx].split("-->", 1)
+        text = " ".join(_TAG_RE.sub("", line) for line in lines[time_idx + 1:]).strip()
+        if not text:
+            continue
+        start = _parse_timestamp(start_str)
+        end = _parse_timestamp(end_str)
+        # 自动字幕常见的滚动重复：与上一条文本相同则只延长结束时间
+        if segments and segments[-1].text == text:
+            segments[-1].end = end
+            continue
+        segments.append(TranscriptSegment(start=start, end=end, text=text))
+    return segments
+
+
+def _parse_json3(content: str) -> List[TranscriptSegment]:
+    """
+    解析 YouTube json3 字幕
+    """
+    data = json.loads(content)
+    segments: List[TranscriptSegment] = []
+    for event in data.get("events", []):
+        segs = event.get("segs")
+        if not segs:
+            continue
+        text = "".join(s.get("utf8", "") for s in segs).replace("\n", " ").strip()
+        if not text:
+            continue
+        start = event.get("tStartMs", 0) / 1000.0
+        end = start + event.get("dDurationMs", 0) / 1000.0
+        segments.append(TranscriptSegment(start=start, end=end, text=text))
+    return segments
+
+
+def _parse_bilibili_json(content: str) -> List[TranscriptSegment]:
+    """
+    解析 Bilibili CC 字幕（{"body": [{"from", "to", "content"}]}）
+    """
+    data = json.loads(content)
+    segments: List[TranscriptSegment] = []
+    for item in data.get("body", []):
+        text = str(item.get("content", "")).strip()
+        if not text:
+            continue
+        segments.append(TranscriptSegment(
+            start=float(item.get("from", 0)),
+            end=float(item.get("to", 0)),
+            text=text,
+        ))
+    return segments
+
+
+def parse_subtitle(content: str, ext: str, language: Optional[str] = None) -> Optional[TranscriptResult]:
+    """
+    将平台字幕文本转换为 TranscriptResult
+
+    :param content: 字幕原文
+    :param ext: 字幕格式（json3 / vtt / srt / json）
+    :param language: 字幕语言
+    :return: TranscriptResult，解析不到任何片段时返回 None
+    """
+    if ext == "json3":
+        segments = _parse_json3(content)
+    elif ext in ("vtt", "srt"):
+        segments = _parse_cues(content)
+    elif ext == "json":
+        segments = _parse_bilibili_json(content)
+    else:
+        raise ValueError(f"不支持的字幕格式: {ext}")
+
+    if not segments:
+        return None
+
+    return TranscriptResult(
+        language=language,
+        segments=segments,
+        raw={"source": "subtitle", "ext": ext, "language": language},
+    )
@@ -0,0 +1,75 @@
+import sys
+from array import array
+from pathlib import Path
+
+from app.models.transcriber_model import SegmentStore, TranscriptResult
+from app.utils.logger import get_logger
+from app.utils.serializer import cache_path, dump, load, serializer_for
+
+logger = get_logger(__name__)
+
+CACHE_VERSION = 2
+
+
+def transcript_cache_path(output_dir: Path, task_id: str) -> Path:
+    """
+    转写缓存路径，格式由 CACHE_SERIALIZER / CACHE_COMPRESSION 决定，已有其它格式的缓存时沿用
+    """
+    return cache_path(output_dir, f"{task_id}_transcript")
+
+
+def _pack_array(values: array, binary: bool):
+    return values.tobytes() if binary else values.tolist()
+
+
+def _unpack_array(typecode: str, data, byteorder: str) -> array:
+    values = array(typecode)
+    if isinstance(data, (bytes, bytearray)):
+        values.frombytes(data)
+        if byteorder != sys.byteorder:
+            values.byteswap()
+    else:
+        values.extend(data)
+    return values
+
+
+def dump_transcript(path: Path, transcript: TranscriptResult) -> None:
+    """
+    按列式结构写入转写缓存：时间与偏移量为数组，文字为一个字符串；不写 full_text 与 raw（读取时按需拼接）。
+    二进制格式（msgpack）下数组直接以原始字节写入
+    """
+    store = transcript.segments
+    binary = serializer_for(path).binary
+    data = {
+        "version": CACHE_VERSION,
+        "language": transcript.language,
+        "byteorder": sys.byteorder,
+        "starts": _pack_array(store.starts, binary),
+        "ends": _pack_array(store.ends, binary),
+        "offsets": _pack_array(store.offsets, binary),
+        "text": store.text_buffer,
+    }
+    dump(path, data)
+
+
+def load_transcript(path: Path) -> TranscriptResult:
+    """
+    读取转写缓存，兼容旧版（segments 为对象列表的缩进 JSON）
+    """
+    data = load(path)
+
+    if data.get("version") != CACHE_VERSION:
+        return TranscriptResult(
+            language=data.get("language"),
+            full_text=data.get("full_text"),
+            segments=data.get("segments", []),
+        )
+
+    byteorder = data.get("byteorder", sys.byteorder)
+    store = SegmentStore(
+        starts=_unpack_array("d", data["starts"], byteorder),
+        ends=_unpack_array("d", data["ends"], byteorder),
+        offsets=_unpack_array("q", data["offsets"], byteorder),
+        text_buffer=data["text"],
+    )
+    return TranscriptResult(language=data.get("language"), segments=store)
@@ -1,6 +1,7 @@
 import re
 from typing import Optional
-import requests
+
+from app.utils.url_resolver import is_short_url, resolve_short_url_sync
 
 
 def extract_video_id(url: str, platform: str) -> Optional[str]:
@@ -8,7 +9,7 @@ def extract_video_id(url: str, platform: str) -> Optional[str]:
     从视频链接中提取视频 ID
 
     :param url: 视频链接
-    :param platform: 平台名（bilibili / youtube / douyin）
+    :param platform: 平台名（bilibili / youtube / douyin / kuaishou）
     :return: 提取到的视频 ID 或 None
     """
     if platform == "bilibili":
@@ -28,23 +29,28 @@ def extract_video_id(url: str, platform: str) -> Optional[str]:
         return match.group(1) if match else None
 
     elif platform == "douyin":
+        if is_short_url(url):
+            url = resolve_short_url_sync(url)
         # 匹配 douyin.com/video/1234567890123456789
         match = re.search(r"/video/(\d+)", url)
         return match.group(1) if match else None
 
+    elif platform == "kuaishou":
+        if is_short_url(url):
+            url = resolve_short_url_sync(url)
+        # 匹配 kuaishou.com/short-video/3xxxxxxxx
+        match = re.search(r"short-video/(\w+)", url)
+        return match.group(1) if match else None
+
     return None
 
 
 def resolve_bilibili_short_url(short_url: str) -> Optional[str]:
     """
-    解析哔哩哔哩短链接以获取真实视频链接
+    解析哔哩哔哩短链接以获取真实视频链接（结果会被缓存，见 app.utils.url_resolver）
 
     :param short_url: Bilibili短链接（如"https://b23.tv/xxxxxx"）
     :return: 真实的视频链接或None
     """
-    try:
-        response = requests.head(short_url, allow_redirects=True)
-        return response.url
-    except requests.RequestException as e:
-        print(f"Error resolving short URL: {e}")
-        return None
+    resolved = resolve_short_url_sync(short_url)
+    return resolved if resolved != short_url else None
@@ -0,0 +1,129 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+from app.utils.async_runner import run_sync
+from app.utils.http_client import get_async_client
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 需要跟随跳转才能拿到真实地址的短链域名
+SHORT_URL_HOSTS = {"b23.tv", "v.douyin.com", "v.kuaishou.com"}
+SHORT_URL_CACHE_SIZE = int(os.getenv("SHORT_URL_CACHE_SIZE", "1024"))
+SHORT_URL_CACHE_TTL = int(os.getenv("SHORT_URL_CACHE_TTL", "3600"))
+
+
+class LRUTTLCache:
+    """
+    线程安全的 LRU + TTL 缓存：超过 maxsize 淘汰最久未使用的条目，超过 ttl 秒的条目视为不存在
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            stored_at, value = item
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_cache = LRUTTLCache(SHORT_URL_CACHE_SIZE, SHORT_URL_CACHE_TTL)
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def is_short_url(url: str) -> bool:
+    return urlparse(url).netloc.lower() in SHORT_URL_HOSTS
+
+
+async def _follow_redirects(url: str, headers: Optional[dict]) -> str:
+    client = get_async_client()
+    response = await client.head(url, headers=headers)
+    if response.status_code < 400:
+        return str(response.url)
+    # 部分短链服务不支持 HEAD，退回 GET，但不读取响应体
+    async with client.stream("GET", url, headers=headers) as response:
+        response.raise_for_status()
+        return str(response.url)
+
+
+async def _resolve_and_cache(url: str, headers: Optional[dict]) -> str:
+    resolved = await _follow_redirects(url, headers)
+    _cache.set(url, resolved)
+    logger.info(f"短链解析：{url} -> {resolved}")
+    return resolved
+
+
+async def resolve_short_url(url: str, headers: Optional[dict] = None) -> str:
+    """
+    解析 b23.tv / v.douyin.com / v.kuaishou.com 短链接，返回跳转后的真实地址。
+    结果按短链缓存，路由、下载器对同一短链只会真正请求一次；同时到达的并发请求共享同一次解析。
+    非短链原样返回，解析失败时返回原链接（不缓存）。
+
+    :param url: 链接
+    :param headers: 请求头（部分平台需要 User-Agent）
+    :return: 真实链接
+    """
+    if not is_short_url(url):
+        return url
+
+    cached = _cache.get(url)
+    if cached:
+        return cached
+
+    task = _inflight.get(url)
+    if task is None or task.get_loop() is not asyncio.get_running_loop():
+        task = asyncio.ensure_future(_resolve_and_cache(url, headers))
+        _inflight[url] = task
+
+        def _done(t: asyncio.Task) -> None:
+            if _inflight.get(url) is t:
+                _inflight.pop(url, None)
+
+        task.add_done_callback(_done)
+
+    try:
+        return await asyncio.shield(task)
+    except Exception as e:
+        logger.warning(f"短链解析失败 {url}：{e}")
+        return url
+
+
+def resolve_short_url_sync(url: str, headers: Optional[dict] = None) -> str:
+    """
+    resolve_short_url 的同步版本，命中缓存时不经过事件循环
+    """
+    if not is_short_url(url):
+        return url
+    cached = _cache.get(url)
+    if cached:
+        return cached
+    return run_sync(resolve_short_url(url, headers))
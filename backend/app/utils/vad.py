@@ -0,0 +1,190 @@
+import bisect
+import json
+import os
+import re
+import subprocess
+import tempfile
+from typing import List, Tuple
+
+from dotenv import load_dotenv
+
+from app.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__name__)
+
+# 只裁掉长于 VAD_MIN_SILENCE_SECONDS 的静音/音乐段，语音段两侧各保留 VAD_PADDING_SECONDS
+VAD_MIN_SILENCE_SECONDS = float(os.getenv("VAD_MIN_SILENCE_SECONDS", "2.0"))
+VAD_PADDING_SECONDS = float(os.getenv("VAD_PADDING_SECONDS", "0.3"))
+# ffmpeg silencedetect 的静音阈值（未安装 faster-whisper 时使用）
+VAD_NOISE_DB = os.getenv("VAD_NOISE_DB", "-35dB")
+
+SpeechRegion = Tuple[float, float]
+
+_SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end: ([\d.]+)")
+_DURATION = re.compile(r"Duration: (\d+):(\d+):([\d.]+)")
+
+
+def _merge_regions(regions: List[SpeechRegion], duration: float) -> List[SpeechRegion]:
+    """
+    两侧补齐 padding，合并间隔短于最小静音时长的相邻语音段
+    """
+    merged: List[List[float]] = []
+    for start, end in sorted(regions):
+        start = max(0.0, start - VAD_PADDING_SECONDS)
+        end = min(duration, end + VAD_PADDING_SECONDS) if duration else end + VAD_PADDING_SECONDS
+        if merged and start - merged[-1][1] < VAD_MIN_SILENCE_SECONDS:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(round(s, 3), round(e, 3)) for s, e in merged if e > s]
+
+
+def _detect_with_silero(audio_path: str) -> Tuple[List[SpeechRegion], float]:
+    from faster_whisper.audio import decode_audio
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    sampling_rate = 16000
+    audio = decode_audio(audio_path, sampling_rate=sampling_rate)
+    options = VadOptions(min_silence_duration_ms=int(VAD_MIN_SILENCE_SECONDS * 1000), speech_pad_ms=0)
+    timestamps = get_speech_timestamps(audio, vad_options=options, sampling_rate=sampling_rate)
+    regions = [(t["start"] / sampling_rate, t["end"] / sampling_rate) for t in timestamps]
+    return regions, len(audio) / sampling_rate
+
+
+def _detect_with_ffmpeg(audio_path: str, min_silence: float = VAD_MIN_SILENCE_SECONDS) -> Tuple[List[SpeechRegion], float]:
+    command = [
+        "ffmpeg", "-hide_banner", "-nostats", "-i", audio_path,
+        "-af", f"silencedetect=noise={VAD_NOISE_DB}:d={min_silence}",
+        "-f", "null", "-",
+    ]
+    stderr = subprocess.run(command, capture_output=True, text=True).stderr
+
+    match = _DURATION.search(stderr)
+    duration = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3)) if match else 0.0
+
+    regions: List[SpeechRegion] = []
+    cursor = 0.0
+    for line in stderr.splitlines():
+        start = _SILENCE_START.search(line)
+        if start:
+            silence_start = max(0.0, float(start.group(1)))
+            if cursor is not None and silence_start > cursor:
+                regions.append((cursor, silence_start))
+            cursor = None
+            continue
+        end = _SILENCE_END.search(line)
+        if end:
+            cursor = float(end.group(1))
+    # 末尾不是静音时补上最后一段语音
+    if cursor is not None and duration > cursor:
+        regions.append((cursor, duration))
+    return regions, duration
+
+
+def detect_speech_regions(audio_path: str) -> Tuple[List[SpeechRegion], float]:
+    """
+    计算音频中的语音区间。结果缓存在音频旁的 .speech.json 中（按文件大小与修改时间校验），
+    同一音频重试或换转写器时不会重复计算。
+
+    优先使用 faster-whisper 自带的 Silero VAD（能区分音乐与人声），未安装时退回 ffmpeg silencedetect。
+
+    :param audio_path: 本地音频路径
+    :return: ([(开始秒, 结束秒)], 音频总时长)
+    """
+    stat = os.stat(audio_path)
+    cache_path = audio_path + ".speech.json"
+    fingerprint = f"{stat.st_size}-{int(stat.st_mtime)}-{VAD_MIN_SILENCE_SECONDS}-{VAD_PADDING_SECONDS}"
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("fingerprint") == fingerprint:
+                return [tuple(r) for r in cached["regions"]], cached["duration"]
+        except Exception:
+            pass
+
+    try:
+        regions, duration = _detect_with_silero(audio_path)
+        method = "silero"
+    except ImportError:
+        regions, duration = _detect_with_ffmpeg(audio_path)
+        method = "silencedetect"
+
+    regions = _merge_regions(regions, duration)
+    speech = sum(e - s for s, e in regions)
+    logger.info(f"VAD（{method}）：语音 {speech:.0f}s / 总时长 {duration:.0f}s，共 {len(regions)} 段")
+
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint, "regions": regions, "duration": duration}, f)
+    return regions, duration
+
+
+def find_silence_points(audio_path: str, min_silence: float = 0.5) -> Tuple[List[float], float]:
+    """
+    找出适合切分音频的位置（各段静音的中点），用于分块转写时避免把一句话切成两半
+
+    :param audio_path: 本地音频路径
+    :param min_silence: 静音最短时长（秒），切分只需要短停顿，默认比 VAD 裁剪宽松
+    :return: ([切分点秒数], 音频总时长)
+    """
+    regions, duration = _detect_with_ffmpeg(audio_path, min_silence)
+    points = [round((prev_end + start) / 2, 3) for (_, prev_end), (start, _) in zip(regions, regions[1:])]
+    return points, duration
+
+
+def extract_speech_audio(audio_path: str, regions: List[SpeechRegion], output_path: str) -> str:
+    """
+    把语音区间拼接成一个新的音频文件（mp3，便于直接上传给云端转写接口）
+
+    :param audio_path: 原音频
+    :param regions: 语音区间
+    :param output_path: 输出路径
+    """
+    expression = "+".join(f"between(t,{s},{e})" for s, e in regions)
+    # 区间多时表达式很长，写入 filter_script 避免超出命令行长度限制
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write(f"aselect='{expression}',asetpts=N/SR/TB")
+        script_path = f.name
+    try:
+        command = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-i", audio_path,
+            "-filter_script:a", script_path,
+            "-ac", "1", "-b:a", "64k",
+            output_path,
+        ]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg 裁剪静音失败：{result.stderr.strip()}")
+    finally:
+        os.remove(script_path)
+    return output_path
+
+
+class TimelineMap:
+    """
+    裁剪后音频时间 -> 原音频时间 的映射
+    """
+
+    def __init__(self, regions: List[SpeechRegion]):
+        self.regions = regions
+        self._trimmed_starts: List[float] = []
+        offset = 0.0
+        for start, end in regions:
+            self._trimmed_starts.append(offset)
+            # 区间端点已保留 3 位小数，偏移同样取整，避免浮点误差让边界上的时间落到相邻区间
+            offset = round(offset + end - start, 3)
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        """
+        :param t: 裁剪后音频中的时间
+        :param is_end: 结束时间恰好落在两段交界处时归到前一段末尾，而不是下一段开头
+        """
+        if not self.regions:
+            return t
+        index = (bisect.bisect_left if is_end else bisect.bisect_right)(self._trimmed_starts, t) - 1
+        index = max(0, min(index, len(self.regions) - 1))
+        start, end = self.regions[index]
+        return round(min(end, start + (t - self._trimmed_starts[index])), 3)
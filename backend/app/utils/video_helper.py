@@ -5,6 +5,9 @@ from dotenv import load_dotenv
 import subprocess
 import os
 import uuid
+
+from app.utils.static_files import rename_to_content_hash
+
 load_dotenv()
 api_path = os.getenv("API_BASE_URL", "http://localhost")
 BACKEND_PORT= os.getenv("BACKEND_PORT", 8483)
@@ -15,6 +18,7 @@ from typing import Optional
 def generate_screenshot(video_path: str, output_dir: str, timestamp: int, index: int) -> str:
     """
     使用 ffmpeg 生成截图，返回生成图片路径
+    文件名带内容哈希（screenshot_003_<hash>.jpg），可被浏览器与 nginx 永久缓存
     """
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -37,8 +41,9 @@ def generate_screenshot(video_path: str, output_dir: str, timestamp: int, index:
 
     if result.returncode != 0:
         print("ffmpeg failed:", result.stderr)
+        return str(output_path)
 
-    return str(output_path)
+    return rename_to_content_hash(str(output_path), f"screenshot_{index:03}")
 
 
 
@@ -47,7 +52,7 @@ def save_cover_to_static(local_cover_path: str, subfolder: Optional[str] = "cove
     将封面图片保存到 static 目录下，并返回前端可访问的路径
     :param local_cover_path: 本地原封面路径（比如提取出来的jpg）
     :param subfolder: 子目录，默认是 cover，可以自定义
-    :return: 前端访问路径，例如 /static/cover/xxx.jpg
+    :return: 前端访问路径，例如 /static/cover/cover_<hash>.jpg
     """
     # 项目根目录
     project_root = os.getcwd()
@@ -59,10 +64,11 @@ def save_cover_to_static(local_cover_path: str, subfolder: Optional[str] = "cove
     target_dir = os.path.join(static_dir, subfolder or "cover")
     os.makedirs(target_dir, exist_ok=True)
 
-    # 拷贝文件
-    file_name = os.path.basename(local_cover_path)
-    target_path = os.path.join(target_dir, file_name)
-    shutil.copy2(local_cover_path, target_path)  # 保留原时间戳、权限
+    # 拷贝文件，文件名带内容哈希，同一封面只保留一份且可永久缓存
+    suffix = os.path.splitext(local_cover_path)[1] or ".jpg"
+    tmp_path = os.path.join(target_dir, f".{uuid.uuid4()}{suffix}")
+    shutil.copy2(local_cover_path, tmp_path)  # 保留原时间戳、权限
+    file_name = os.path.basename(rename_to_content_hash(tmp_path, "cover"))
     image_relative_path = f"/static/{subfolder}/{file_name}".replace("\\", "/")
     url_path = f"{BACKEND_BASE_URL.rstrip('/')}/{image_relative_path.lstrip('/')}"
     # 返回前端可访问的路径
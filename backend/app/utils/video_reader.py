@@ -2,7 +2,6 @@ import base64
 import os
 import re
 import subprocess
-import ffmpeg
 from PIL import Image, ImageDraw, ImageFont
 
 from app.utils.logger import get_logger
@@ -44,6 +43,7 @@ class VideoReader:
         return float('inf')
 
     def extract_frames(self, max_frames=1000) -> list[str]:
+        import ffmpeg
 
         try:
             os.makedirs(self.frame_dir, exist_ok=True)
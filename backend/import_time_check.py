@@ -0,0 +1,98 @@
+"""
+启动导入耗时检查：用 `python -X importtime` 导入 main，统计 main 的累计耗时（多次运行取中位数），
+并确认重依赖没有在启动时被加载。解释器自身启动（site、encodings 等）不计入预算。
+
+用法（在 backend 目录下）：
+    python import_time_check.py            # 默认预算 BUDGET_MS
+    IMPORT_TIME_BUDGET_MS=800 IMPORT_TIME_RUNS=7 python import_time_check.py
+
+超出预算或加载了禁止的模块时以非零状态码退出，可直接用于 CI。
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BUDGET_MS = int(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+# 测量次数，取中位数以排除偶发的磁盘 / 调度抖动
+RUNS = int(os.getenv("IMPORT_TIME_RUNS", "5"))
+
+# 只应在真正转写 / 下载 / 导出时才加载的模块
+FORBIDDEN_MODULES = [
+    "faster_whisper",
+    "ctranslate2",
+    "modelscope",
+    "torch",
+    "mlx_whisper",
+    "openai",
+    "ffmpeg",
+    "markdown_pdf",
+    "yt_dlp",
+]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def measure(module: str = "main") -> List[Tuple[str, int, int, int]]:
+    """
+    :return: [(模块名, 自身耗时us, 累计耗时us, 嵌套层级)]
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败：\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def main() -> int:
+    # 第一次运行包含 .pyc 编译，丢弃
+    measure()
+    runs = [measure() for _ in range(max(1, RUNS))]
+    samples = [
+        next((cumulative for name, _, cumulative, level in rows if name == "main" and level == 0), 0) / 1000
+        for rows in runs
+    ]
+    main_ms = statistics.median(samples)
+
+    # main 的直接依赖：-X importtime 按后序输出，子模块排在父模块之前
+    children: Dict[str, int] = {}
+    pending: Dict[str, int] = {}
+    for name, _, cumulative, level in runs[-1]:
+        if level == 1:
+            pending[name] = cumulative
+        elif level == 0:
+            if name == "main":
+                children = pending
+            pending = {}
+    loaded = {name for rows in runs for name, *_ in rows}
+    forbidden = [m for m in FORBIDDEN_MODULES if m in loaded]
+
+    print(f"导入 main 累计耗时：中位数 {main_ms:.0f}ms（{RUNS} 次：{', '.join(f'{x:.0f}' for x in samples)}；预算 {BUDGET_MS}ms）")
+    print("main 中累计耗时最高的导入：")
+    for name, cumulative in sorted(children.items(), key=lambda x: x[1], reverse=True)[:10]:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+    ok = True
+    if forbidden:
+        print(f"启动时加载了应延迟导入的模块：{', '.join(forbidden)}")
+        ok = False
+    if main_ms > BUDGET_MS:
+        print("超出导入耗时预算")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,10 @@
 import os
+import threading
 from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
-from starlette.staticfiles import StaticFiles
 from dotenv import load_dotenv
 
 from app.db.init_db import init_db
@@ -12,7 +12,9 @@ from app.db.provider_dao import seed_default_providers
 from app.exceptions.exception_handlers import register_exception_handlers
 # from app.db.model_dao import init_model_table
 # from app.db.provider_dao import init_provider_table
+from app.utils.compression import CompressionMiddleware
 from app.utils.logger import get_logger
+from app.utils.static_files import CachedStaticFiles
 from app import create_app
 from app.transcriber.transcriber_provider import get_transcriber
 from events import register_handler
@@ -36,11 +38,25 @@ if not os.path.exists(uploads_dir):
 if not os.path.exists(out_dir):
     os.makedirs(out_dir)
 
+def preload_transcriber():
+    try:
+        transcriber_type = os.getenv("TRANSCRIBER_TYPE", "fast-whisper")
+        get_transcriber(transcriber_type=transcriber_type)
+        if transcriber_type == "fast-whisper":
+            # WHISPER_PRELOAD_SIZES 中的其它尺寸一并常驻
+            from app.transcriber.whisper_model_manager import preload_whisper_models
+            preload_whisper_models()
+    except Exception as e:
+        logger.error(f"预加载转写器失败：{e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     register_handler()
     init_db()
-    get_transcriber(transcriber_type=os.getenv("TRANSCRIBER_TYPE", "fast-whisper"))
+    # 转写模型在后台线程加载，不阻塞服务就绪；只做总结的实例可设置 TRANSCRIBER_PRELOAD=false 完全跳过
+    if os.getenv("TRANSCRIBER_PRELOAD", "true").lower() == "true":
+        threading.Thread(target=preload_transcriber, name="transcriber-preload", daemon=True).start()
     seed_default_providers()
     yield
 
@@ -58,9 +74,12 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 笔记 JSON 等文本响应按 Accept-Encoding 压缩（brotli / gzip）
+app.add_middleware(CompressionMiddleware)
 register_exception_handlers(app)
-app.mount(static_path, StaticFiles(directory=static_dir), name="static")
-app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
+app.mount(static_path, CachedStaticFiles(directory=static_dir), name="static")
+# 上传文件名由用户决定且同名上传会覆盖，不能按文件名判定为不可变
+app.mount("/uploads", CachedStaticFiles(directory=uploads_dir, hashed_immutable=False), name="uploads")
 
 
 